@@ -0,0 +1,374 @@
+#!/usr/bin/env python
+# coding:utf-8
+"""Benchmarks for command line interface definition, parsing and dispatch at scale.
+
+CLIs are synthesized with N subcommands x M typed parameters, cycling through ints, floats, nested mappings of tuples,
+NamedTuples, Unions, enums, lists and files, and the following are measured for each size:
+
+- definition: time to define the whole interface from a class via `CommandLineInterface.definition`
+- parse_args: mean time to parse one command line, over all subcommands
+- config_decode: mean time to decode one subcommand's args from a parsed config, over all subcommands
+- empty_config: time to generate an empty config for the whole interface
+- peak_memory: peak memory allocated during definition, as measured by tracemalloc
+
+Times are the minimum over repeats. Results can be saved as a baseline, and later runs compared against it with a
+regression threshold, exiting with a nonzero code on regression:
+
+    python benchmarks/bench_cli.py --save benchmarks/baseline.json
+    # ... make changes ...
+    python benchmarks/bench_cli.py --compare benchmarks/baseline.json --threshold 1.25
+
+Baselines are machine-specific; save one on the machine you intend to compare on.
+"""
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional as Opt, Tuple
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+DEFAULT_SIZES = ("10x5", "50x10", "200x20")
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 1.25
+METRICS = ("definition", "parse_args", "config_decode", "empty_config", "peak_memory")
+MEMORY_METRICS = ("peak_memory",)
+
+
+class ParamKind(NamedTuple):
+    """How to declare, pass on the command line, and configure a parameter of one type"""
+
+    annotation: str
+    # args following the --option on the command line; None if the type is only parseable from config
+    cli_args: Opt[Callable[[str], List[str]]]
+    config_value: Callable[[str], object]
+
+
+# NamedTuple and nested collections can't be parsed from the command line, so they're config-only
+PARAM_KINDS = (
+    ParamKind("int", lambda path: ["1"], lambda path: 1),
+    ParamKind("float", lambda path: ["2.5"], lambda path: 2.5),
+    ParamKind("Mapping[str, Tuple[int, float]]", None, lambda path: {"a": [1, 2.0]}),
+    ParamKind("Point", None, lambda path: {"x": 1, "y": 2.0}),
+    ParamKind("Union[int, str]", lambda path: ["x"], lambda path: "x"),
+    ParamKind("Color", lambda path: ["red"], lambda path: "red"),
+    ParamKind("File['r']", lambda path: [path], lambda path: path),
+    ParamKind("List[int]", lambda path: ["1", "2", "3"], lambda path: [1, 2, 3]),
+    ParamKind(
+        "Tuple[Color, ...]", lambda path: ["red", "blue"], lambda path: ["red", "blue"]
+    ),
+)
+
+SOURCE_HEADER = '''
+from enum import Enum
+from typing import List, Mapping, NamedTuple, Optional, Tuple, Union
+from bourbaki.application.cli import CommandLineInterface, File, cli_spec
+
+
+class Color(Enum):
+    red = "red"
+    blue = "blue"
+
+
+class Point(NamedTuple):
+    x: int
+    y: float
+
+
+cli = CommandLineInterface(
+    prog="bench",
+    require_subcommand=True,
+    use_config_file=True,
+    add_install_bash_completion_flag=False,
+)
+
+
+def define():
+    @cli.definition
+    class App:
+        """A synthesized app for benchmarking"""
+'''
+
+METHOD_TEMPLATE = '''
+        @cli_spec.ignore_on_cmd_line({config_only})
+        def cmd_{i}(self, *, {params}):
+            """Command {i}
+
+{param_docs}
+            """
+            return None
+'''
+
+
+class CLISpec(NamedTuple):
+    n_commands: int
+    n_params: int
+
+    @classmethod
+    def parse(cls, size: str) -> "CLISpec":
+        n, m = size.lower().split("x")
+        return cls(int(n), int(m))
+
+    def __str__(self):
+        return "{}x{}".format(self.n_commands, self.n_params)
+
+    def kinds(self) -> List[ParamKind]:
+        return [PARAM_KINDS[j % len(PARAM_KINDS)] for j in range(self.n_params)]
+
+    def source(self) -> str:
+        kinds = self.kinds()
+        config_only = ", ".join(
+            repr("p{}".format(j)) for j, k in enumerate(kinds) if k.cli_args is None
+        )
+        params = ", ".join(
+            "p{}: {}".format(j, k.annotation)
+            if k.cli_args is not None
+            else "p{}: Optional[{}] = None".format(j, k.annotation)
+            for j, k in enumerate(kinds)
+        )
+        param_docs = "\n".join(
+            "            :param p{}: parameter {} of type {}".format(j, j, k.annotation)
+            for j, k in enumerate(kinds)
+        )
+        methods = (
+            METHOD_TEMPLATE.format(
+                i=i, config_only=config_only, params=params, param_docs=param_docs
+            )
+            for i in range(self.n_commands)
+        )
+        return SOURCE_HEADER + "".join(methods) + "\n    return App\n"
+
+    def argv(self, i: int, path: str) -> List[str]:
+        args = ["cmd-{}".format(i)]
+        for j, k in enumerate(self.kinds()):
+            if k.cli_args is not None:
+                args.append("--p{}".format(j))
+                args.extend(k.cli_args(path))
+        return args
+
+    def config(self, path: str) -> Dict[str, Dict[str, object]]:
+        section = {
+            "p{}".format(j): k.config_value(path) for j, k in enumerate(self.kinds())
+        }
+        return {"cmd-{}".format(i): dict(section) for i in range(self.n_commands)}
+
+
+def _exec_source(source: str, filename: str) -> dict:
+    # a fresh namespace each time, so that new functions and types are defined and caches keyed on them don't apply
+    namespace = {"__name__": "bench_cli_synthesized"}
+    exec(compile(source, filename, "exec"), namespace)
+    return namespace
+
+
+def _define(source: str, filename: str):
+    namespace = _exec_source(source, filename)
+    tic = perf_counter()
+    namespace["define"]()
+    cli = namespace["cli"]
+    cli.finalize_definition()
+    return cli, perf_counter() - tic
+
+
+def _close_files(values):
+    for value in values:
+        close = getattr(value, "close", None)
+        if close is not None:
+            close()
+
+
+def bench_cli(spec: CLISpec, repeat: int = DEFAULT_REPEAT) -> Dict[str, float]:
+    """Run all benchmarks for one CLI size, returning metric name -> seconds (or bytes, for memory metrics)"""
+    source = spec.source()
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write("benchmark input\n")
+        path = f.name
+
+    try:
+        definition = []
+        for _ in range(repeat):
+            gc.collect()
+            cli, elapsed = _define(source, "<bench {}>".format(spec))
+            definition.append(elapsed)
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            _define(source, "<bench {}>".format(spec))
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        all_argv = [spec.argv(i, path) for i in range(spec.n_commands)]
+        parse_args = []
+        for _ in range(repeat):
+            tic = perf_counter()
+            for argv in all_argv:
+                cli.parse_args(argv)
+            parse_args.append((perf_counter() - tic) / spec.n_commands)
+
+        config = spec.config(path)
+        commands = [cmd for _, cmd in cli.all_subcommands() if not cmd._main]
+        config_decode = []
+        for _ in range(repeat):
+            tic = perf_counter()
+            results = [cmd.prepare_args_kwargs({}, config) for cmd in commands]
+            config_decode.append((perf_counter() - tic) / len(commands))
+            for _, kwargs, _, _ in results:
+                _close_files(kwargs.values())
+
+        empty_config = []
+        for _ in range(repeat):
+            tic = perf_counter()
+            cli.empty_config()
+            empty_config.append(perf_counter() - tic)
+    finally:
+        os.remove(path)
+
+    return dict(
+        definition=min(definition),
+        parse_args=min(parse_args),
+        config_decode=min(config_decode),
+        empty_config=min(empty_config),
+        peak_memory=float(peak_memory),
+    )
+
+
+def run_benchmarks(
+    sizes=DEFAULT_SIZES, repeat: int = DEFAULT_REPEAT, log=None
+) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for size in sizes:
+        spec = CLISpec.parse(size) if isinstance(size, str) else CLISpec(*size)
+        if log is not None:
+            print("benchmarking {} ...".format(spec), file=log, flush=True)
+        results[str(spec)] = bench_cli(spec, repeat=repeat)
+    return results
+
+
+def environment_info() -> Dict[str, str]:
+    from bourbaki.application import __version__
+
+    return dict(
+        python=platform.python_version(),
+        implementation=platform.python_implementation(),
+        platform=platform.platform(),
+        machine=platform.machine(),
+        version=__version__,
+    )
+
+
+def compare(
+    results: Mapping[str, Mapping[str, float]],
+    baseline: Mapping[str, Mapping[str, float]],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Tuple[str, str, float, float, float]]:
+    """Return (size, metric, baseline, current, ratio) for each metric that exceeds `threshold` times its baseline"""
+    regressions = []
+    for size, metrics in results.items():
+        base_metrics = baseline.get(size)
+        if base_metrics is None:
+            continue
+        for metric, value in metrics.items():
+            base = base_metrics.get(metric)
+            if not base:
+                continue
+            ratio = value / base
+            if ratio > threshold:
+                regressions.append((size, metric, base, value, ratio))
+    return regressions
+
+
+def _fmt(metric: str, value: float) -> str:
+    if metric in MEMORY_METRICS:
+        return "{:.1f} KiB".format(value / 1024.0)
+    return "{:.3f} ms".format(value * 1000.0)
+
+
+def format_results(
+    results: Mapping[str, Mapping[str, float]],
+    baseline: Opt[Mapping[str, Mapping[str, float]]] = None,
+) -> str:
+    lines = []
+    for size, metrics in results.items():
+        lines.append("{} (subcommands x params):".format(size))
+        base_metrics = (baseline or {}).get(size, {})
+        for metric in METRICS:
+            value = metrics[metric]
+            line = "    {:<14} {:>14}".format(metric, _fmt(metric, value))
+            base = base_metrics.get(metric)
+            if base:
+                line += "  ({:.2f}x baseline {})".format(
+                    value / base, _fmt(metric, base)
+                )
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark command line interface definition, parsing and dispatch at scale"
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        metavar="NxM",
+        help="CLI sizes to benchmark, as <number of subcommands>x<number of params>",
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--save", metavar="PATH", help="save results as a baseline")
+    parser.add_argument(
+        "--compare", metavar="PATH", help="compare results to a saved baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="with --compare, exit with code 1 if any metric exceeds this multiple of its baseline",
+    )
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    results = run_benchmarks(args.sizes, repeat=args.repeat, log=sys.stderr)
+
+    if args.json:
+        print(
+            json.dumps(dict(environment=environment_info(), results=results), indent=2)
+        )
+    else:
+        print(format_results(results, baseline))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                dict(environment=environment_info(), results=results), f, indent=2
+            )
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for size, metric, base, value, ratio in regressions:
+            print(
+                "REGRESSION {} {}: {} -> {} ({:.2f}x > {:.2f}x)".format(
+                    size,
+                    metric,
+                    _fmt(metric, base),
+                    _fmt(metric, value),
+                    ratio,
+                    args.threshold,
+                ),
+                file=sys.stderr,
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
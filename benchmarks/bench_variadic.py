@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# coding:utf-8
+"""Benchmarks for parsing very long variable-length argument lists from the command line.
+
+For each kind of variadic parameter (`List[int]` and `Tuple[float, ...]` options, a `Set[Path]` option and `*args: int`
+positionals), a command is run with N values for each N in the sizes, and the time to parse and decode the command line
+and call the command is measured (the minimum over repeats). Parsing should scale linearly with N; the scaling factor
+reported for each kind is its time per value at the largest size divided by its time per value at the smallest, and
+is ~1 for linear scaling. With --max-scaling, the exit code is 1 if any kind scales worse than that:
+
+    python benchmarks/bench_variadic.py --sizes 1000 10000 100000 --max-scaling 2
+"""
+from typing import Dict, List, Mapping, NamedTuple, Sequence
+import argparse
+import gc
+import json
+import sys
+from time import perf_counter
+
+DEFAULT_SIZES = (1000, 10000, 50000)
+DEFAULT_REPEAT = 3
+DEFAULT_MAX_SCALING = 2.0
+
+
+class VariadicKind(NamedTuple):
+    command: str
+    # args preceding the values on the command line
+    prefix: List[str]
+
+
+KINDS = (
+    VariadicKind("ints", ["--values"]),
+    VariadicKind("floats", ["--values"]),
+    VariadicKind("paths", ["--values"]),
+    VariadicKind("positional", []),
+)
+
+SOURCE = """
+from pathlib import Path
+from typing import List, Set, Tuple
+from bourbaki.application.cli import CommandLineInterface
+
+cli = CommandLineInterface(
+    prog="bench_variadic",
+    require_subcommand=True,
+    require_options=False,
+    add_install_bash_completion_flag=False,
+    suppress_setup_warnings=True,
+)
+
+
+@cli.subcommand(require_options=True)
+def ints(values: List[int]):
+    return len(values)
+
+
+@cli.subcommand(require_options=True)
+def floats(values: Tuple[float, ...]):
+    return len(values)
+
+
+@cli.subcommand(require_options=True)
+def paths(values: Set[Path]):
+    return len(values)
+
+
+@cli.subcommand()
+def positional(*values: int):
+    return len(values)
+"""
+
+
+def define_cli():
+    namespace = {"__name__": "bench_variadic_synthesized"}
+    exec(compile(SOURCE, "<bench_variadic>", "exec"), namespace)
+    cli = namespace["cli"]
+    cli.finalize_definition()
+    return cli
+
+
+def bench_kind(
+    cli, kind: VariadicKind, sizes: Sequence[int], repeat: int = DEFAULT_REPEAT
+) -> Dict[int, float]:
+    """Seconds to run `kind`'s command with each number of values in `sizes`"""
+    times = {}
+    for n in sizes:
+        argv = [kind.command, *kind.prefix, *map(str, range(n))]
+        elapsed = []
+        for _ in range(repeat):
+            gc.collect()
+            tic = perf_counter()
+            result = cli.run(argv)
+            elapsed.append(perf_counter() - tic)
+            assert result == n, (kind.command, n, result)
+        times[n] = min(elapsed)
+    return times
+
+
+def scaling(times: Mapping[int, float]) -> float:
+    """Time per value at the largest size divided by time per value at the smallest; ~1 for linear scaling"""
+    smallest, largest = min(times), max(times)
+    return (times[largest] / largest) / (times[smallest] / smallest)
+
+
+def run_benchmarks(
+    sizes: Sequence[int] = DEFAULT_SIZES, repeat: int = DEFAULT_REPEAT, log=None
+) -> Dict[str, Dict[int, float]]:
+    cli = define_cli()
+    results = {}
+    for kind in KINDS:
+        if log is not None:
+            print("benchmarking {} ...".format(kind.command), file=log, flush=True)
+        results[kind.command] = bench_kind(cli, kind, sizes, repeat=repeat)
+    return results
+
+
+def format_results(results: Mapping[str, Mapping[int, float]]) -> str:
+    lines = []
+    for command, times in results.items():
+        lines.append("{} (scaling {:.2f}):".format(command, scaling(times)))
+        for n, t in times.items():
+            lines.append(
+                "    {:>9} values {:>12.3f} ms {:>10.3f} us/value".format(
+                    n, t * 1000.0, t * 1e6 / n
+                )
+            )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark parsing of very long variable-length argument lists"
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=list(DEFAULT_SIZES),
+        metavar="N",
+        help="numbers of values to pass on the command line",
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument(
+        "--max-scaling",
+        type=float,
+        help="exit with code 1 if any kind's time per value grows by more than this factor from the smallest size "
+        "to the largest (default {})".format(DEFAULT_MAX_SCALING),
+    )
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, repeat=args.repeat, log=sys.stderr)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_results(results))
+
+    if args.max_scaling is not None:
+        nonlinear = [
+            (command, scaling(times))
+            for command, times in results.items()
+            if scaling(times) > args.max_scaling
+        ]
+        for command, factor in nonlinear:
+            print(
+                "NONLINEAR {}: {:.2f}x time per value > {:.2f}x".format(
+                    command, factor, args.max_scaling
+                ),
+                file=sys.stderr,
+            )
+        if nonlinear:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
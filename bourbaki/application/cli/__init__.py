@@ -1,8 +1,32 @@
 # coding:utf-8
-from .main import CommandLineInterface
+# imported first so that import time can be profiled
+from . import profiling
+from .main import (
+    CommandLineInterface,
+    InvocationContext,
+    current_invocation,
+    execute_flag,
+    last_run_metrics,
+)
 from .helpers import sibling_files
 from bourbaki.application.typed_io import ArgSource, CLI, CONFIG, ENV
 from .decorators import cli_spec
+from .streaming import StreamingOutputHandler, LinesOutput
 from .actions import InstallShellCompletionAction, InfoAction, PackageVersionAction
-from bourbaki.application.typed_io.utils import File, TextFile, BinaryFile
+from bourbaki.application.typed_io.utils import (
+    File,
+    TextFile,
+    BinaryFile,
+    LazyFile,
+    MMapFile,
+)
 from bourbaki.introspection.imports import lazy_imports, from_, import_
+
+profiling.mark("imported")
+
+
+def __getattr__(name):
+    # the execution flag of the current invocation; see `CommandLineInterface(use_execution_flag=...)`
+    if name == "EXECUTE":
+        return execute_flag()
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -118,12 +118,34 @@ class InstallShellCompletionAction(Action):
         exit(0)
 
 
-class SetExecuteFlagAction(Action):
+class DumpManifestAction(Action):
     def __init__(
         self,
         option_strings,
         dest=SUPPRESS,
         default=SUPPRESS,
+        metavar="PATH",
+        help="write a JSON manifest of this CLI to PATH ('-' for stdout) and exit",
+    ):
+        super().__init__(
+            option_strings=option_strings,
+            dest=dest,
+            default=default,
+            metavar=metavar,
+            help=help,
+        )
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        parser.dump_manifest(values)
+        exit(0)
+
+
+class SetExecuteFlagAction(Action):
+    def __init__(
+        self,
+        option_strings,
+        dest="_bourbaki_execute",
+        default=False,
         help="only execute disk-altering, expensive, or external-resource-dependent commands if "
         "this flag is passed",
     ):
@@ -136,6 +158,5 @@ class SetExecuteFlagAction(Action):
         )
 
     def __call__(self, parser, namespace, values, option_string=None):
-        from bourbaki.application.cli import main
-
-        main.EXECUTE = True
+        # recorded in the namespace rather than globally, so that parsing has no side effects
+        setattr(namespace, self.dest, True)
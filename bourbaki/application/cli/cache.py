@@ -0,0 +1,168 @@
+# coding:utf-8
+# on-disk caching of fully-defined command line interfaces, keyed on the modification times of their source files
+from typing import Any, Dict, Iterable, Mapping, Optional as Opt
+import os
+import sys
+import pickle
+import tempfile
+from hashlib import sha1
+from types import FunctionType
+
+from bourbaki.introspection.imports import import_object
+from .. import __version__
+
+DEFINITION_CACHE_DIR_ENV_VAR = "BOURBAKI_CLI_CACHE_DIR"
+DEFAULT_DEFINITION_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join("~", ".cache")),
+    "bourbaki",
+    "application",
+)
+DEFINITION_CACHE_EXT = ".pkl"
+
+_CLI_REF = "cli"
+_SOURCE_REF = "source"
+
+
+class StaleDefinitionCache(ValueError):
+    def __init__(self, path, reason):
+        super().__init__(path, reason)
+
+    def __str__(self):
+        return "definition cache at {} is stale: {}".format(*self.args)
+
+
+class DeferredSourceRef:
+    """Placeholder for a function or class defined in the CLI's source module which was not yet bound in that module's
+    namespace when the cache was loaded; usually the function currently being decorated"""
+
+    def __init__(self, module: str, qualname: str):
+        self.module = module
+        self.qualname = qualname
+
+    def __repr__(self):
+        return "{}({}, {})".format(
+            type(self).__name__, repr(self.module), repr(self.qualname)
+        )
+
+    def resolve(self):
+        return _lookup_qualname(self.module, self.qualname)
+
+
+def default_definition_cache_path(cmd_name: str, source_path: Opt[str]) -> str:
+    cache_dir = os.environ.get(
+        DEFINITION_CACHE_DIR_ENV_VAR, DEFAULT_DEFINITION_CACHE_DIR
+    )
+    # disambiguate CLIs with the same name defined in different places
+    key = sha1(str(source_path).encode()).hexdigest()[:12]
+    filename = "{}-{}{}".format(cmd_name, key, DEFINITION_CACHE_EXT)
+    return os.path.join(os.path.expanduser(cache_dir), filename)
+
+
+def definition_cache_meta(
+    module: str, source_files: Iterable[str], last_edit_time: float
+) -> Dict[str, Any]:
+    return dict(
+        version=__version__,
+        python=tuple(sys.version_info[:2]),
+        module=module,
+        source_files=tuple(source_files),
+        last_edit_time=last_edit_time,
+    )
+
+
+def dump_definition_cache(
+    path: str, cli, state: Mapping[str, Any], meta: Mapping[str, Any]
+):
+    """Atomically write the pickled `state` of `cli` to `path`, preceded by `meta` for validation on load"""
+    dirname = os.path.dirname(path)
+    os.makedirs(dirname, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dirname, suffix=DEFINITION_CACHE_EXT)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(dict(meta), f, protocol=pickle.HIGHEST_PROTOCOL)
+            _DefinitionPickler(f, cli, meta["module"]).dump(state)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_definition_cache(
+    path: str, cli, meta: Mapping[str, Any], known: Opt[Mapping[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Load the pickled state of `cli` from `path`, raising `FileNotFoundError` if no cache exists there and
+    `StaleDefinitionCache` if the cache metadata disagrees with `meta`.
+
+    :param known: optional mapping of qualified name -> object for objects in the CLI's source module which may not
+        yet be bound in the module namespace at load time (e.g. a class currently being decorated)
+    """
+    with open(path, "rb") as f:
+        cached_meta = pickle.load(f)
+        for key, value in meta.items():
+            cached_value = cached_meta.get(key)
+            if cached_value != value:
+                raise StaleDefinitionCache(
+                    path,
+                    "{} is {}; expected {}".format(
+                        key, repr(cached_value), repr(value)
+                    ),
+                )
+        return _DefinitionUnpickler(f, cli, meta["module"], known).load()
+
+
+class _DefinitionPickler(pickle.Pickler):
+    def __init__(self, file, cli, module: str):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.cli = cli
+        self.module = module
+
+    def persistent_id(self, obj):
+        if obj is self.cli:
+            return (_CLI_REF,)
+        if isinstance(obj, (type, FunctionType)):
+            qualname = getattr(obj, "__qualname__", None)
+            if (
+                qualname is not None
+                and "<" not in qualname
+                and getattr(obj, "__module__", None) == self.module
+            ):
+                # resolved by name on load; the CLI source module may be __main__, or may not be fully executed yet
+                return (_SOURCE_REF, qualname)
+        return None
+
+
+class _DefinitionUnpickler(pickle.Unpickler):
+    def __init__(self, file, cli, module: str, known: Opt[Mapping[str, Any]] = None):
+        super().__init__(file)
+        self.cli = cli
+        self.module = module
+        self.known = known or {}
+
+    def persistent_load(self, pid):
+        kind = pid[0]
+        if kind == _CLI_REF:
+            return self.cli
+        elif kind == _SOURCE_REF:
+            qualname = pid[1]
+            try:
+                return _lookup_qualname(self.module, qualname, self.known)
+            except (AttributeError, ImportError):
+                return DeferredSourceRef(self.module, qualname)
+        raise pickle.UnpicklingError("unknown persistent id {}".format(pid))
+
+
+def _lookup_qualname(module: str, qualname: str, known: Opt[Mapping[str, Any]] = None):
+    for prefix, obj in (known or {}).items():
+        if qualname == prefix or qualname.startswith(prefix + "."):
+            tail = qualname[len(prefix) :].split(".")[1:]
+            break
+    else:
+        mod = sys.modules.get(module)
+        if mod is None:
+            return import_object("{}.{}".format(module, qualname))
+        obj, tail = mod, qualname.split(".")
+
+    for name in tail:
+        obj = getattr(obj, name)
+    return obj
@@ -0,0 +1,631 @@
+# coding:utf-8
+"""Generation of standalone entry point modules for command line interfaces.
+
+`generate_module` takes a fully defined `CommandLineInterface` and emits the source of a plain python module which
+builds the equivalent `argparse` parser directly, without `bourbaki.application` or any of the application's modules:
+
+    python -m bourbaki.application.cli.codegen my_app.cli:cli -o my_app_main.py
+    python my_app_main.py --help
+
+Help, usage and argument errors are handled entirely by that parser. Once a command line parses, the generated module
+hands off to `run_generated`, which restores the interface from its pickled state without any signature, type or
+docstring introspection. The pickled definition of each command is kept separately in a dispatch table, and only that
+of the command being run is loaded. The application's source modules are imported with the interface's decorators
+passed through, so that they don't define the interface again. For this to work, the functions and classes the
+interface was defined from must be importable, i.e. not defined in a `__main__` script.
+
+The generated module reflects the interface as it was when it was generated; regenerate it whenever the interface
+changes.
+"""
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Mapping,
+    Optional as Opt,
+    Sequence,
+    Tuple,
+    Union,
+)
+from argparse import (
+    ArgumentParser,
+    _AppendAction,
+    _AppendConstAction,
+    _CountAction,
+    _HelpAction,
+    _StoreAction,
+    _StoreConstAction,
+    _StoreFalseAction,
+    _StoreTrueAction,
+    _SubParsersAction,
+    _VersionAction,
+)
+from pathlib import Path
+from pprint import pformat
+from types import FunctionType
+import ast
+import io
+import pickle
+import sys
+
+from .. import __version__
+
+_CLI_REF = "cli"
+_COMMAND_REF = "command"
+_PARSER_REF = "parser"
+_SOURCE_REF = "source"
+
+# state that refers to caches on the generating machine
+_UNSAFE_STATE_ATTRS = (
+    "_pickle_load_path",
+    "_pickle_dump_path",
+    "_last_edit_time",
+    "_definition_cache_current",
+    "_definition_cache_module",
+    "_deferred_source_refs",
+    "_help_cache_path",
+)
+
+# argparse's own action classes, by their registered names, with the keyword args each accepts
+_ACTION_KINDS = {
+    _StoreAction: "store",
+    _StoreConstAction: "store_const",
+    _StoreTrueAction: "store_true",
+    _StoreFalseAction: "store_false",
+    _AppendAction: "append",
+    _AppendConstAction: "append_const",
+    _CountAction: "count",
+    _HelpAction: "help",
+    _VersionAction: "version",
+}
+_ACTION_KWARGS = {
+    "store": ("nargs", "const", "default", "choices", "required", "help", "metavar"),
+    "store_const": ("const", "default", "required", "help"),
+    "store_true": ("default", "required", "help"),
+    "store_false": ("default", "required", "help"),
+    "append": ("nargs", "const", "default", "choices", "required", "help", "metavar"),
+    "append_const": ("const", "default", "required", "help"),
+    "count": ("default", "required", "help"),
+    "help": ("default", "help"),
+    "version": ("version", "default", "help"),
+}
+# any other action may have side effects, and is left to the full interface
+_DEFERRED_ACTION = "deferred"
+_ACTION_KWARGS[_DEFERRED_ACTION] = _ACTION_KWARGS["store"]
+_PARSER_KWARGS = (
+    "prog",
+    "usage",
+    "description",
+    "epilog",
+    "prefix_chars",
+    "fromfile_prefix_chars",
+    "allow_abbrev",
+)
+
+
+#################
+# parser specs  #
+#################
+
+
+def _literal(value) -> bool:
+    try:
+        return ast.literal_eval(repr(value)) == value
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return False
+
+
+def parser_spec(parser: ArgumentParser) -> Dict[str, Any]:
+    """A literal description of `parser` and all of its subparsers, from which the generated module constructs the
+    equivalent `argparse` parser. Types are omitted (the interface's own parsers don't convert args), as are defaults
+    and choices which have no literal representation; these only affect help text."""
+    from .main import PicklableArgumentParser
+
+    if isinstance(parser, PicklableArgumentParser):
+        parser.add_deferred_arguments()
+
+    subparsers_groups = {
+        id(group)
+        for group in parser._action_groups[2:]
+        if any(isinstance(a, _SubParsersAction) for a in group._group_actions)
+    }
+    groups = [
+        g
+        for i, g in enumerate(parser._action_groups)
+        if i < 2 or id(g) not in subparsers_groups
+    ]
+    group_ix = {id(a): i for i, g in enumerate(groups) for a in g._group_actions}
+    exclusive = parser._mutually_exclusive_groups
+    exclusive_ix = {id(a): i for i, g in enumerate(exclusive) for a in g._group_actions}
+
+    actions = []
+    for action in parser._actions:
+        if isinstance(action, _SubParsersAction):
+            spec = _subparsers_spec(action, parser)
+        else:
+            spec = _action_spec(action)
+            spec.update(
+                group=group_ix.get(id(action), 0 if not action.option_strings else 1),
+                exclusive=exclusive_ix.get(id(action)),
+            )
+        actions.append(spec)
+
+    return dict(
+        kwargs={name: getattr(parser, name) for name in _PARSER_KWARGS},
+        groups=[(g.title, g.description) for g in groups],
+        exclusive=[
+            (groups.index(g._container) if g._container in groups else 0, g.required)
+            for g in exclusive
+        ],
+        actions=actions,
+    )
+
+
+def _action_spec(action) -> Dict[str, Any]:
+    kind = _ACTION_KINDS.get(type(action), _DEFERRED_ACTION)
+    kwargs = {}
+    for name in _ACTION_KWARGS[kind]:
+        if name == "required" and not action.option_strings:
+            # argparse infers this for positionals
+            continue
+        value = getattr(action, name)
+        if name == "choices" and value is not None:
+            value = list(value)
+        if not _literal(value):
+            value = None
+        kwargs[name] = value
+
+    if action.option_strings:
+        args = list(action.option_strings)
+        kwargs["dest"] = action.dest
+    else:
+        args = [action.dest]
+
+    return dict(kind=kind, args=args, kwargs=kwargs)
+
+
+def _subparsers_spec(
+    action: _SubParsersAction, parser: ArgumentParser
+) -> Dict[str, Any]:
+    kwargs = dict(
+        dest=action.dest,
+        required=action.required,
+        help=action.help,
+        metavar=action.metavar,
+        prog=action._prog_prefix,
+    )
+    group = next(
+        (g for g in parser._action_groups[2:] if action in g._group_actions), None
+    )
+    if group is not None:
+        kwargs.update(title=group.title, description=group.description)
+
+    helps = {a.dest: a.help for a in action._choices_actions}
+    names = {}
+    for name, subparser in action.choices.items():
+        names.setdefault(id(subparser), []).append(name)
+
+    choices = []
+    for name, subparser in action.choices.items():
+        name, *aliases = names[id(subparser)]
+        if not any(c["name"] == name for c in choices):
+            choice = dict(name=name, aliases=aliases, parser=parser_spec(subparser))
+            if name in helps:
+                choice["help"] = helps[name]
+            choices.append(choice)
+
+    return dict(
+        kind="parsers",
+        cmd_prefix=tuple(getattr(action, "cmd_prefix", ())),
+        kwargs=kwargs,
+        choices=choices,
+    )
+
+
+############
+# pickling #
+############
+
+
+def _lookup(module: str, qualname: str):
+    import importlib
+
+    obj = importlib.import_module(module)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+class _GeneratedPickler(pickle.Pickler):
+    def __init__(
+        self,
+        file,
+        cli,
+        commands: Mapping[int, Tuple[str, ...]],
+        parsers: Mapping[int, Tuple[str, ...]],
+        root=None,
+    ):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.cli = cli
+        self.commands = commands
+        self.parsers = parsers
+        self.root = root
+
+    def persistent_id(self, obj):
+        if obj is self.cli:
+            return (_CLI_REF,)
+        if obj is self.root:
+            return None
+        path = self.commands.get(id(obj))
+        if path is not None:
+            return (_COMMAND_REF, path)
+        path = self.parsers.get(id(obj))
+        if path is not None:
+            return (_PARSER_REF, path)
+        if isinstance(obj, (type, FunctionType)):
+            module = getattr(obj, "__module__", None)
+            qualname = getattr(obj, "__qualname__", None)
+            if module == "__main__":
+                raise pickle.PicklingError(
+                    "{} is defined in __main__; a generated entry point can only run commands defined in importable "
+                    "modules".format(obj)
+                )
+            if module is None or qualname is None or "<" in qualname:
+                return None
+            try:
+                bound = _lookup(module, qualname)
+            except (ImportError, AttributeError):
+                return None
+            if bound is not obj and getattr(bound, "func", None) is obj:
+                # bound to the command it was decorated into; undecorated when the module is imported at run time
+                return (_SOURCE_REF, module, qualname)
+        return None
+
+
+class _GeneratedUnpickler(pickle.Unpickler):
+    def __init__(
+        self,
+        file,
+        cli,
+        load_command: Opt[Callable[[Tuple[str, ...]], Any]] = None,
+        parsers: Opt[Mapping[Tuple[str, ...], ArgumentParser]] = None,
+    ):
+        super().__init__(file)
+        self.cli = cli
+        self.load_command = load_command
+        self.parsers = parsers
+
+    def persistent_load(self, pid):
+        kind = pid[0]
+        if kind == _CLI_REF:
+            return self.cli
+        elif kind == _COMMAND_REF and self.load_command is not None:
+            return self.load_command(tuple(pid[1]))
+        elif kind == _PARSER_REF and self.parsers is not None:
+            return self.parsers[tuple(pid[1])]
+        elif kind == _SOURCE_REF:
+            from .main import SubCommandFunc
+
+            obj = _lookup(pid[1], pid[2])
+            # the module may already have been imported with its decorators in effect
+            return obj.func if isinstance(obj, SubCommandFunc) else obj
+        raise pickle.UnpicklingError("unknown persistent id {}".format(pid))
+
+
+def _dumps(objs, cli, commands, parsers, root=None) -> bytes:
+    f = io.BytesIO()
+    pickler = _GeneratedPickler(f, cli, commands, parsers, root=root)
+    for obj in objs:
+        pickler.dump(obj)
+    return f.getvalue()
+
+
+def pickle_cli(cli) -> Tuple[bytes, Dict[Tuple[str, ...], bytes]]:
+    """The pickled state of `cli` with references to its commands in place of their definitions, and a dict of
+    command path -> pickled command definition (the main command has the empty path)"""
+    from .main import _all_parsers
+
+    commands = dict(cli.all_subcommands())
+    if cli._main is not None:
+        commands[()] = cli._main
+    command_paths = {id(cmd): path for path, cmd in commands.items()}
+    parser_paths = {}
+    for path, parser in _all_parsers(cli):
+        parser_paths.setdefault(id(parser), path)
+
+    state = cli.__getstate__()
+    for attr in _UNSAFE_STATE_ATTRS:
+        state.pop(attr, None)
+
+    # the class first, so that the instance can be created before any references to it in its state are loaded
+    cli_state = _dumps((type(cli), state), cli, command_paths, {})
+    pickled_commands = {
+        path: _dumps((cmd,), cli, command_paths, parser_paths, root=cmd)
+        for path, cmd in commands.items()
+    }
+    return cli_state, pickled_commands
+
+
+class _DeferredCommand:
+    """Stands in for a command of a generated entry point's interface until it is used, when its definition is
+    loaded and installed in the interface in place of this"""
+
+    def __init__(self, cli, path: Tuple[str, ...], pickled: bytes):
+        self._cli = cli
+        self._path = path
+        self._pickled = pickled
+        self._command = None
+
+    def resolve(self):
+        if self._command is None:
+            self._command = _load_command(self._cli, self._pickled)
+            _install_command(self._cli, self._path, self, self._command)
+        return self._command
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __reduce__(self):
+        return self.resolve().__reduce_ex__(pickle.HIGHEST_PROTOCOL)
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, " ".join(self._path) or "MAIN")
+
+
+def _load_command(cli, pickled: bytes):
+    from .main import _all_parsers, _passthrough_definitions
+
+    parsers = {}
+    for path, parser in _all_parsers(cli):
+        parsers.setdefault(path, parser)
+    with _passthrough_definitions():
+        return _GeneratedUnpickler(io.BytesIO(pickled), cli, parsers=parsers).load()
+
+
+def _install_command(cli, path: Tuple[str, ...], old, new):
+    if not path:
+        if cli._main is old:
+            cli._main = new
+        return
+    cmds = cli.subcommands
+    for name in path[:-1]:
+        _, cmds = cmds[name]
+    cmd, subcmds = cmds[path[-1]]
+    if cmd is old:
+        cmds[path[-1]] = new, subcmds
+
+
+def load_cli(
+    cli_state: bytes,
+    commands: Mapping[Tuple[str, ...], bytes],
+    preload: Sequence[Tuple[str, ...]] = (),
+):
+    """Restore a command line interface pickled by `pickle_cli`. Command definitions are loaded on first use, except
+    for those at the paths in `preload`"""
+    from .main import _passthrough_definitions
+
+    def deferred(path):
+        return _DeferredCommand(cli, path, commands[path])
+
+    with _passthrough_definitions():
+        unpickler = _GeneratedUnpickler(io.BytesIO(cli_state), None, deferred)
+        cls = unpickler.load()
+        cli = unpickler.cli = cls.__new__(cls)
+        state = unpickler.load()
+    cli.__setstate__(state)
+
+    for path in preload:
+        if path in commands:
+            _, cmd = cli.get_subcommand_func(path) if path else (None, cli._main)
+            if isinstance(cmd, _DeferredCommand):
+                cmd.resolve()
+    return cli
+
+
+def run_generated(
+    cli_state: bytes,
+    commands: Mapping[Tuple[str, ...], bytes],
+    args: Sequence[str],
+    cmd_path: Opt[Sequence[str]] = None,
+):
+    """Run the interface pickled by `pickle_cli` on the command line `args`, which has been parsed by a generated
+    entry point to find the command path `cmd_path` (None if the entry point couldn't determine it)"""
+    preload = [()] if cmd_path is None else [tuple(cmd_path), ()]
+    cli = load_cli(cli_state, commands, preload=preload)
+    return cli.run(list(args))
+
+
+##############
+# generation #
+##############
+
+_MODULE_TEMPLATE = """# coding:utf-8
+# Entry point for the command line interface {prog!r}, generated by bourbaki.application {version}.
+# Don\'t edit this file; regenerate it when the interface changes:
+#     python -m bourbaki.application.cli.codegen {target}
+# Help, usage and argument errors are handled by the plain argparse parser built here; bourbaki.application and the
+# application\'s modules are only imported to run a command, and then only that command\'s definition is loaded.
+import argparse
+import shutil
+import sys
+
+SUBCOMMAND_PATH_ATTR = {path_attr!r}
+
+PARSER_SPEC = {spec}
+
+CLI_STATE = {cli_state}
+
+COMMANDS = {commands}
+
+
+class _HandOff(Exception):
+    pass
+
+
+class _DeferredAction(argparse.Action):
+    # actions with side effects are carried out by the full interface
+    def __call__(self, parser, namespace, values, option_string=None):
+        raise _HandOff(option_string)
+
+
+class _SubcommandPathAction(argparse._SubParsersAction):
+    cmd_prefix = ()
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        setattr(namespace, SUBCOMMAND_PATH_ATTR, (*self.cmd_prefix, values[0]))
+        super().__call__(parser, namespace, values, option_string)
+
+
+class _HelpFormatter(argparse.RawDescriptionHelpFormatter):
+    def __init__(self, prog, indent_increment=2, max_help_position=40, width=None):
+        if width is None:
+            width = shutil.get_terminal_size().columns
+        super().__init__(
+            prog,
+            indent_increment=indent_increment,
+            max_help_position=max_help_position,
+            width=width,
+        )
+
+
+def _add_arguments(parser, spec):
+    parser.register("action", "parsers", _SubcommandPathAction)
+    groups = [parser._positionals, parser._optionals]
+    for group, (title, description) in zip(groups, spec["groups"]):
+        group.title, group.description = title, description
+    for title, description in spec["groups"][2:]:
+        groups.append(parser.add_argument_group(title, description))
+    exclusive = [
+        groups[ix].add_mutually_exclusive_group(required=required)
+        for ix, required in spec["exclusive"]
+    ]
+
+    for action in spec["actions"]:
+        kind, kwargs = action["kind"], action["kwargs"]
+        if kind == "parsers":
+            subparsers = parser.add_subparsers(**kwargs)
+            subparsers.cmd_prefix = action["cmd_prefix"]
+            for choice in action["choices"]:
+                sub_kwargs = dict(choice["parser"]["kwargs"], aliases=choice["aliases"])
+                if "help" in choice:
+                    sub_kwargs["help"] = choice["help"]
+                subparser = subparsers.add_parser(
+                    choice["name"],
+                    add_help=False,
+                    formatter_class=_HelpFormatter,
+                    **sub_kwargs
+                )
+                _add_arguments(subparser, choice["parser"])
+            continue
+
+        if action["exclusive"] is None:
+            container = groups[action["group"]]
+        else:
+            container = exclusive[action["exclusive"]]
+        container.add_argument(
+            *action["args"],
+            action=_DeferredAction if kind == "deferred" else kind,
+            **kwargs
+        )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        add_help=False, formatter_class=_HelpFormatter, **PARSER_SPEC["kwargs"]
+    )
+    _add_arguments(parser, PARSER_SPEC)
+    return parser
+
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else list(argv)
+    try:
+        cmd_path = getattr(build_parser().parse_args(args), SUBCOMMAND_PATH_ATTR, None)
+    except _HandOff:
+        cmd_path = None
+
+    from bourbaki.application.cli.codegen import run_generated
+
+    return run_generated(CLI_STATE, COMMANDS, args, cmd_path)
+
+
+if __name__ == "__main__":
+    main()
+"""
+
+
+def generate_module(cli, target: Opt[str] = None) -> str:
+    """The source of a standalone entry point module for the fully defined `CommandLineInterface` `cli`.
+
+    :param target: how `cli` is found, as passed to `python -m bourbaki.application.cli.codegen`; this is only
+        recorded in a comment in the generated module
+    """
+    from .main import SUBCOMMAND_PATH_ATTR
+
+    cli.finalize_definition()
+    cli.add_deferred_arguments(recursive=True)
+    cli_state, commands = pickle_cli(cli)
+    return _MODULE_TEMPLATE.format(
+        prog=cli.prog,
+        version=__version__,
+        target=target or "MODULE:CLI",
+        path_attr=SUBCOMMAND_PATH_ATTR,
+        spec=pformat(parser_spec(cli), width=100),
+        cli_state=pformat(cli_state, width=100),
+        commands=pformat(commands, width=100),
+    )
+
+
+def write_module(cli, file: Union[str, Path], target: Opt[str] = None):
+    """Write the entry point module generated for `cli` by `generate_module` to the path `file`; '-' is stdout"""
+    source = generate_module(cli, target=target)
+    if str(file) == "-":
+        sys.stdout.write(source)
+    else:
+        with open(str(file), "w") as f:
+            f.write(source)
+
+
+def _import_cli(target: str):
+    import importlib
+
+    module, _, attr = target.partition(":")
+    obj = importlib.import_module(module)
+    for name in (attr or "cli").split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python -m {}".format(__spec__.name),
+        description="Generate a standalone argparse entry point for a command line interface",
+    )
+    parser.add_argument(
+        "target",
+        help="MODULE:ATTR, where the command line interface is found; ATTR defaults to 'cli'",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="-",
+        help="path to write the module to; default stdout",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        cli = _import_cli(args.target)
+    except (ImportError, AttributeError) as e:
+        parser.error("couldn't import {}: {}".format(args.target, e))
+    write_module(cli, args.output, target=args.target)
+
+
+if __name__ == "__main__":
+    main()
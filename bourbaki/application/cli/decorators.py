@@ -4,6 +4,8 @@
 from typing import Collection
 from bourbaki.introspection.callables import funcname
 from .helpers import _maybe_bool, _validate_parse_order
+from .result_cache import ResultCache, DEFAULT_RESULT_CACHE_MAX_SIZE
+from .streaming import DEFAULT_QUEUE_SIZE
 
 NO_OUTPUT_HANDLER = object()
 
@@ -158,6 +160,18 @@ class cli_spec:
 
         return dec
 
+    @staticmethod
+    def arg_files(*names):
+        """mark collection, mapping or iterator argument names to accept '@path' values on the command line for the
+        decorated function, or all arguments if True is passed. Each '@path' is replaced by the lines of the file at
+        `path` (stdin for '@-'), blank lines skipped; '@@value' passes the literal value '@value'."""
+
+        def dec(f):
+            f.__arg_files__ = _maybe_bool(names)
+            return f
+
+        return dec
+
     @staticmethod
     def metavars(**renames):
         """mark argument names with metavar names as they will appear in the CLI help string, using
@@ -199,6 +213,44 @@ class cli_spec:
 
         return dec
 
+    @staticmethod
+    def cache_results(
+        directory=None, max_size=DEFAULT_RESULT_CACHE_MAX_SIZE, max_entries=None
+    ):
+        """cache the return values of the decorated function on disk, keyed on its fully decoded args and its source
+        code, so that it isn't re-run for inputs it has already seen. Output handlers still run on cached results.
+        If no directory is given, a per-CLI directory in the user's cache dir is used. Pass False to disable caching
+        for the decorated function when the wrapping CLI caches all results by default.
+        Can be used as a bare decorator."""
+        if callable(directory):
+            # bare decorator
+            return cli_spec.cache_results()(directory)
+
+        def dec(f):
+            if directory is False:
+                f.__cache_results__ = False
+            else:
+                f.__cache_results__ = ResultCache(directory, max_size, max_entries)
+            return f
+
+        return dec
+
+    @staticmethod
+    def background_output(queue_size=DEFAULT_QUEUE_SIZE):
+        """run the streaming output handler of the decorated function on a background thread when the function returns
+        an iterator, feeding it items through a queue of at most `queue_size` batches as they are produced. Pass False to
+        disable this for the decorated function when the wrapping CLI enables it by default.
+        Can be used as a bare decorator."""
+        if callable(queue_size):
+            # bare decorator
+            return cli_spec.background_output()(queue_size)
+
+        def dec(f):
+            f.__background_output__ = queue_size
+            return f
+
+        return dec
+
     @staticmethod
     def named_groups(**name_to_argnames: Collection[str]):
         def dec(f):
@@ -270,6 +322,10 @@ class cli_attrs:
     def typecheck(f, default=None):
         return getattr(f, "__typecheck__", default)
 
+    @staticmethod
+    def arg_files(f, default=None):
+        return getattr(f, "__arg_files__", default)
+
     @staticmethod
     def metavars(f, default=None):
         return getattr(f, "__metavars__", default)
@@ -282,6 +338,14 @@ class cli_attrs:
     def exit_codes(f):
         return getattr(f, "__exit_codes__", None)
 
+    @staticmethod
+    def cache_results(f, default=None):
+        return getattr(f, "__cache_results__", default)
+
+    @staticmethod
+    def background_output(f, default=None):
+        return getattr(f, "__background_output__", default)
+
     @staticmethod
     def named_groups(f, default=None):
         return getattr(f, "__named_groups__", default)
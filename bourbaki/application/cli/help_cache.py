@@ -0,0 +1,139 @@
+# coding:utf-8
+# on-disk caching of rendered help text, so that -h/--help can be answered before the command line interface is defined
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional as Opt,
+    Sequence,
+    Tuple,
+)
+import json
+import os
+import shutil
+import sys
+import tempfile
+from hashlib import sha1
+
+from .. import __version__
+from .cache import (
+    DEFINITION_CACHE_DIR_ENV_VAR,
+    DEFAULT_DEFINITION_CACHE_DIR,
+    StaleDefinitionCache,
+)
+
+HELP_CACHE_SUBDIR = "help"
+HELP_CACHE_EXT = ".json"
+HELP_FLAGS = ("-h", "--help")
+CMD_PATH_SEP = " "
+
+
+def default_help_cache_path(cmd_name: str, source_path: Opt[str]) -> str:
+    cache_dir = os.environ.get(
+        DEFINITION_CACHE_DIR_ENV_VAR, DEFAULT_DEFINITION_CACHE_DIR
+    )
+    # disambiguate CLIs with the same name defined in different places
+    key = sha1(str(source_path).encode()).hexdigest()[:12]
+    filename = "{}-{}{}".format(cmd_name, key, HELP_CACHE_EXT)
+    return os.path.join(os.path.expanduser(cache_dir), HELP_CACHE_SUBDIR, filename)
+
+
+def help_cache_meta(
+    prog: str, source_files: Iterable[str], last_edit_time: float
+) -> Dict[str, Any]:
+    # lists rather than tuples, to compare equal after a round trip through JSON
+    return dict(
+        version=__version__,
+        python=list(sys.version_info[:2]),
+        prog=prog,
+        source_files=list(source_files),
+        last_edit_time=last_edit_time,
+    )
+
+
+def terminal_width() -> int:
+    # argparse's help formatters wrap to this width
+    return shutil.get_terminal_size().columns
+
+
+def help_request(args: Sequence[str]) -> Opt[Tuple[str, ...]]:
+    """The command path for which help is requested if `args` is a bare help request, i.e. a (possibly empty) sequence
+    of subcommand names followed by a help flag, else None"""
+    if not args or args[-1] not in HELP_FLAGS:
+        return None
+    cmd_path = tuple(args[:-1])
+    if any(arg.startswith("-") for arg in cmd_path):
+        return None
+    return cmd_path
+
+
+def load_help_cache(
+    path: str, meta: Mapping[str, Any]
+) -> Tuple[Dict[str, Dict[str, str]], Dict[str, List]]:
+    """Load the help texts cached at `path` as a dict of terminal width -> command path -> help text, raising
+    `FileNotFoundError` if no cache exists there and `StaleDefinitionCache` if the cache metadata disagrees with
+    `meta`. Also returned is a dict of command path -> [source file, modification time] for the plugin commands whose
+    help is cached; those aren't covered by `meta`, so the help of any whose source file has changed since is left out.
+    """
+    with open(path) as f:
+        try:
+            cached = json.load(f)
+        except ValueError as e:
+            raise StaleDefinitionCache(path, "invalid JSON: {}".format(e))
+
+    cached_meta = cached.get("meta", {})
+    for key, value in meta.items():
+        cached_value = cached_meta.get(key)
+        if cached_value != value:
+            raise StaleDefinitionCache(
+                path,
+                "{} is {}; expected {}".format(key, repr(cached_value), repr(value)),
+            )
+
+    help_texts = cached.get("help", {})
+    plugin_files = cached.get("plugin_files", {})
+    stale = [
+        cmd_path
+        for cmd_path, stamp in plugin_files.items()
+        if stamp != plugin_file_stamp(stamp[0])
+    ]
+    for cmd_path in stale:
+        del plugin_files[cmd_path]
+        for texts in help_texts.values():
+            texts.pop(cmd_path, None)
+    return help_texts, plugin_files
+
+
+def plugin_file_stamp(path: str) -> Opt[List]:
+    """[path, modification time] for the source file of a plugin command, or None if it doesn't exist"""
+    try:
+        return [path, os.stat(path).st_mtime]
+    except OSError:
+        return None
+
+
+def dump_help_cache(
+    path: str,
+    meta: Mapping[str, Any],
+    help_texts: Mapping[str, Mapping[str, str]],
+    plugin_files: Opt[Mapping[str, List]] = None,
+):
+    """Atomically write `help_texts`, a dict of terminal width -> command path -> help text, to `path`, along with
+    `meta` for validation on load, and `plugin_files`, the stamps of the source files of any plugin commands whose help
+    is included, as returned by `plugin_file_stamp`"""
+    dirname = os.path.dirname(path)
+    os.makedirs(dirname, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dirname, suffix=HELP_CACHE_EXT)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(
+                dict(meta=dict(meta), help=help_texts, plugin_files=plugin_files or {}),
+                f,
+            )
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
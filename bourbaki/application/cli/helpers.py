@@ -4,10 +4,23 @@ from collections import ChainMap, Counter
 from functools import lru_cache, reduce
 from inspect import Parameter, Signature
 from itertools import chain
+import json
 import operator
 from pathlib import Path
+import shlex
 from string import punctuation
-from typing import Dict, List, Set, Tuple, Union, Optional, Mapping, Generic
+import sys
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    Set,
+    Tuple,
+    Union,
+    Optional,
+    Mapping,
+    Generic,
+)
 
 from bourbaki.introspection.docstrings import CallableDocs
 from ..logging import ProgressLogger, TimedTaskContext
@@ -78,6 +91,43 @@ def strip_command_prefix(prefix: Union[str, Tuple[str, ...]], funcname: str) ->
     return funcname
 
 
+def parse_batch_line(line: str) -> Optional[List[str]]:
+    """Parse one line of a batch file into a command line; either a JSON array of strings or a shell-style command
+    line. Blank lines and #-comments yield None."""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith("["):
+        args = json.loads(line)
+        if not isinstance(args, list) or not all(isinstance(a, str) for a in args):
+            raise ValueError(
+                "JSON lines in batch files must be arrays of strings; got {}".format(
+                    line
+                )
+            )
+        return args
+    return shlex.split(line)
+
+
+def iter_batch_file(path: Union[str, Path]) -> Iterator[List[str]]:
+    """Lazily read the command lines from a batch file, or from stdin if `path` is '-'"""
+    if str(path) == "-":
+        lines = sys.stdin
+        close = False
+    else:
+        lines = open(path, "r")
+        close = True
+
+    try:
+        for line in lines:
+            args = parse_batch_line(line)
+            if args is not None:
+                yield args
+    finally:
+        if close:
+            lines.close()
+
+
 def sibling_files(path):
     # for specifying the helper_files arg to the CLI: helper_files=sibling_files(__file__)
     return list(Path(path).parent.glob("*.py"))
@@ -8,6 +8,12 @@ from typing import (
     Set,
     Callable,
     Type,
+    Dict,
+    Any,
+    Iterable,
+    NamedTuple,
+    Sequence,
+    IO,
     Optional as Opt,
 )
 import copy
@@ -16,19 +22,33 @@ import sys
 import shlex
 import shutil
 import operator
+import pickle
 from pathlib import Path
 from itertools import chain, repeat
+from time import perf_counter
 from warnings import warn, filterwarnings
 from collections import OrderedDict, ChainMap
-from logging import Logger, DEBUG, _levelToName, getLogger
-from functools import lru_cache
-from inspect import Signature, Parameter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock, RLock
+from logging import Filter, Logger, DEBUG, NOTSET, _levelToName, getLogger
+from functools import lru_cache, partial
+from inspect import (
+    Signature,
+    Parameter,
+    isasyncgen,
+    isasyncgenfunction,
+    isawaitable,
+    iscoroutinefunction,
+)
 from argparse import (
     ArgumentParser,
     Namespace,
     RawDescriptionHelpFormatter,
     ONE_OR_MORE,
     ZERO_OR_MORE,
+    PARSER,
+    REMAINDER,
     SUPPRESS,
     _SubParsersAction,
 )
@@ -46,7 +66,10 @@ from bourbaki.introspection.types import (
 )
 from bourbaki.introspection.generic_dispatch import GenericTypeLevelSingleDispatch
 from bourbaki.introspection.typechecking import isinstance_generic
-from bourbaki.introspection.docstrings import parse_docstring, CallableDocs
+from bourbaki.introspection.docstrings import (
+    parse_docstring as _parse_docstring,
+    CallableDocs,
+)
 
 # callables.signature is an lru_cache'ed inspect.signature
 from bourbaki.introspection.callables import (
@@ -55,6 +78,7 @@ from bourbaki.introspection.callables import (
     is_method,
 )
 from ..completion.completers import CompleteFiles, install_shell_completion
+from ..multiprocessing import get_nproc, get_pool
 from ..logging import configure_default_logging, Logged, ProgressLogger
 from ..logging.helpers import validate_log_level_int
 from ..logging.defaults import PROGRESS, ERROR, INFO, DEFAULT_LOG_MSG_FMT
@@ -67,10 +91,12 @@ from ..typed_io.utils import (
     text_path_repr,
 )
 from ..typed_io import TypedIO, ArgSource
+from ..typed_io.parsers import ArgFileError, check_arg_files, expand_arg_files
 from .actions import (
     InfoAction,
     PackageVersionAction,
     InstallShellCompletionAction,
+    DumpManifestAction,
     SetExecuteFlagAction,
 )
 from .helpers import (
@@ -80,19 +106,74 @@ from .helpers import (
     _validate_lookup_order,
     identity,
     get_task,
-    NamedChainMap,
+    iter_batch_file,
     strip_command_prefix,
     get_in,
     update_in,
     VARIADIC_NARGS,
 )
 from .decorators import cli_attrs, NO_OUTPUT_HANDLER
-from .signatures import CLISignatureSpec, FinalCLISignatureSpec
+from .signatures import CLISignatureSpec, FinalCLISignatureSpec, _ParameterKind
+from .profiling import (
+    PROFILE_STARTUP_ENV_VAR,
+    finish_profile,
+    get_profile,
+    mark as profiling_mark,
+    profile_phase,
+    start_profile,
+    METRICS_FILE_ENV_VAR,
+    RunMetrics,
+    current_metrics,
+    finish_metrics,
+    start_metrics,
+)
+from .streaming import (
+    DEFAULT_QUEUE_SIZE,
+    astream_output,
+    is_streaming_output_handler,
+    stream_output,
+    write_in_background,
+)
+from .result_cache import (
+    ResultCache,
+    UncacheableArgs,
+    arg_leaves,
+    code_fingerprint,
+    default_result_cache_dir,
+    file_stamp,
+    result_key,
+    uncacheable_reason,
+)
+from .cache import (
+    DeferredSourceRef,
+    StaleDefinitionCache,
+    default_definition_cache_path,
+    definition_cache_meta,
+    dump_definition_cache,
+    load_definition_cache,
+)
+from .manifest import cli_manifest, dump_manifest
+from .plugins import PluginCommand, entry_point_targets, plugin_command_path
+from .help_cache import (
+    CMD_PATH_SEP,
+    default_help_cache_path,
+    dump_help_cache,
+    help_cache_meta,
+    help_request,
+    load_help_cache,
+    plugin_file_stamp,
+    terminal_width,
+)
 
 __all__ = ["CommandLineInterface", "ArgSource", "DEFAULT_LOOKUP_ORDER"]
 
+
 # only need to parse docs once for any function
-parse_docstring = lru_cache(None)(parse_docstring)
+@lru_cache(None)
+def parse_docstring(obj) -> CallableDocs:
+    with profile_phase("docstring parsing"):
+        return _parse_docstring(obj)
+
 
 LOG_LEVEL_NAMES = ["CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG", "NOTSET"]
 SUBCOMMAND_ATTR = "subcommand"
@@ -101,11 +182,28 @@ CONFIG_FILE_ATTR = "config_file"
 LOGFILE_ATTR = "logfile"
 VERBOSITY_ATTR = "verbosity"
 QUIET_ATTR = "quiet"
+BATCH_FILE_ATTR = "batch_file"
+BATCH_NPROC_ATTR = "batch_nproc"
+SERVE_SOCKET_ATTR = "serve_socket"
+SERVE_FORK_ATTR = "serve_fork"
+PROFILE_STARTUP_ATTR = "profile_startup"
+PROFILE_STARTUP_JSON_ATTR = "profile_startup_json"
+NO_CACHE_ATTR = "no_cache"
+# private, so that it can't collide with the dest of a subcommand parameter in the shared namespace
+EXECUTE_ATTR = "_bourbaki_execute"
 RESERVED_NAMESPACE_ATTRS = (
     CONFIG_FILE_ATTR,
     LOGFILE_ATTR,
     VERBOSITY_ATTR,
     QUIET_ATTR,
+    BATCH_FILE_ATTR,
+    BATCH_NPROC_ATTR,
+    SERVE_SOCKET_ATTR,
+    SERVE_FORK_ATTR,
+    PROFILE_STARTUP_ATTR,
+    PROFILE_STARTUP_JSON_ATTR,
+    NO_CACHE_ATTR,
+    EXECUTE_ATTR,
     SUBCOMMAND_ATTR,
     SUBCOMMAND_PATH_ATTR,
 )
@@ -118,9 +216,23 @@ INSTALL_SHELL_COMPLETION_FLAG = "--install-bash-completion"
 CONFIG_OPTION = "--config"
 VERSION_FLAG = "--version"
 INFO_FLAG = "--info"
+BATCH_FLAG = "--batch"
+BATCH_NPROC_FLAG = "--batch-nproc"
+SERVE_FLAG = "--serve"
+SERVE_FORK_FLAG = "--serve-fork"
+PROFILE_STARTUP_FLAG = "--profile-startup"
+PROFILE_STARTUP_JSON_SUFFIX = "-json"
+NO_CACHE_FLAG = "--no-cache"
+MANIFEST_FLAG = "--manifest"
 VERBOSE_FLAGS = ("-v", "--verbose")
 QUIET_FLAGS = ("--quiet", "-q")
-EXECUTE = False
+# value of `EXECUTE` outside of any invocation; True once any CLI without an execution flag is defined
+_default_execute = False
+# (key, root handlers) of the logging configuration most recently applied by any CLI, since logging config is global
+_logging_configuration = None
+_logging_lock = Lock()
+# guards one-time setup that happens lazily at parse time, so that the first concurrent runs don't race
+_definition_lock = RLock()
 DEFAULT_LOOKUP_ORDER = (
     ArgSource.CLI,
     ArgSource.ENV,
@@ -163,6 +275,124 @@ def setup_warn(msg):
     warn(msg, category=CLIDefinitionWarning)
 
 
+class BatchItemResult(NamedTuple):
+    """Outcome of running one command line from a batch with `CommandLineInterface.run_many`"""
+
+    index: int
+    args: List[str]
+    success: bool
+    exit_code: int
+    result: Any
+    error: Opt[BaseException]
+    time: float
+    # per-phase timings, when metrics collection is enabled
+    metrics: Opt[Dict[str, Any]] = None
+
+
+class InvocationContext(NamedTuple):
+    """State of one invocation of a command line interface. This is local to the thread or asyncio task running the
+    command, so that concurrent invocations of the same interface don't interfere with each other."""
+
+    cli: "CommandLineInterface"
+    command: Union[str, Tuple[str, ...]]
+    namespace: Namespace
+    execute: bool
+    verbosity: int
+    quiet: bool
+    # level of the records logged by the invocation, unless it shares the logging configuration of a batch
+    log_level: Opt[int] = None
+
+
+_invocation_context = ContextVar("bourbaki_cli_invocation", default=None)
+
+
+def current_invocation() -> Opt[InvocationContext]:
+    """The context of the command running in the current thread or asyncio task, if any"""
+    return _invocation_context.get()
+
+
+_last_run_metrics = ContextVar("bourbaki_cli_last_run_metrics", default=None)
+
+
+def last_run_metrics() -> Opt[Dict[str, Any]]:
+    """The metrics of the most recent run finished in the current thread or asyncio task, when metrics collection is
+    enabled for its interface; unlike `CommandLineInterface.last_metrics`, concurrent runs don't overwrite it"""
+    return _last_run_metrics.get()
+
+
+def execute_flag() -> bool:
+    """Whether the command running in the current context may carry out file-system-altering actions, i.e. whether
+    its interface has no execution flag or the flag was passed"""
+    context = _invocation_context.get()
+    return _default_execute if context is None else context.execute
+
+
+def _verbosity_log_level(verbosity: int) -> str:
+    return LOG_LEVEL_NAMES[min(verbosity, len(LOG_LEVEL_NAMES) - 1)]
+
+
+class _InvocationLevelFilter(Filter):
+    """Filter for the root handlers configured by a CLI, dropping records below the log level of the invocation that
+    emits them. Loggers and handlers are shared by concurrent runs, so their levels are only ever lowered between full
+    configurations, and each run's own level is applied here"""
+
+    def __init__(self, level: int = NOTSET):
+        super().__init__()
+        # applies outside of any invocation, and to the invocations of a batch sharing its logging configuration
+        self.level = level
+
+    def filter(self, record):
+        context = _invocation_context.get()
+        if context is None or context.log_level is None:
+            return record.levelno >= self.level
+        return record.levelno >= context.log_level
+
+
+# installed on the root handlers configured by any CLI
+_invocation_level_filter = _InvocationLevelFilter()
+
+
+def _disable_existing_loggers(keep: Sequence[str] = ()):
+    """Disable all loggers except those named in `keep` and their descendants, as `logging.config.dictConfig` does
+    with `disable_existing_loggers=True` when only the root logger is configured"""
+    prefixes = tuple(name + "." for name in keep)
+    for name, logger in list(getLogger().manager.loggerDict.items()):
+        if isinstance(logger, Logger):
+            logger.disabled = not (name in keep or name.startswith(prefixes))
+
+
+@contextmanager
+def _invocation(context: InvocationContext):
+    token = _invocation_context.set(context)
+    try:
+        yield context
+    finally:
+        _invocation_context.reset(token)
+
+
+# set while a generated entry point loads an application's source modules, so that CLI decorators there return the
+# undecorated functions and classes rather than defining the interface again; see `bourbaki.application.cli.codegen`
+_definition_passthrough = ContextVar(
+    "bourbaki_cli_definition_passthrough", default=False
+)
+
+
+@contextmanager
+def _passthrough_definitions():
+    token = _definition_passthrough.set(True)
+    try:
+        yield
+    finally:
+        _definition_passthrough.reset(token)
+
+
+def __getattr__(name):
+    # `EXECUTE` was once a module global; it is now looked up in the current invocation's context
+    if name == "EXECUTE":
+        return execute_flag()
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
 # custom formatters
 
 
@@ -202,7 +432,7 @@ class CLIErrorHandlingContext:
             traceback = exc_tb if self.verbose else None
             if exc_type is SystemExit and SystemExit not in self.exit_codes:
                 # exit with the same code when a SystemExit was raised elsewhere
-                sys.exit(exc_type.code)
+                sys.exit(exc_val.code)
             else:
                 handlers = self.exit_code.all_resolved_funcs(exc_type)
                 if not handlers:
@@ -239,6 +469,10 @@ class _SubparserPathAction(_SubParsersAction):
 
 class PicklableArgumentParser(ArgumentParser):
     cmd_prefix = ()
+    _deferred_arguments_from = None
+    _adding_deferred_arguments = False
+    # set when the deferred arguments couldn't be added; reported as a usage error when this parser is used to parse
+    _deferred_error = None
 
     # this shim makes argument parsers picklable (argparse argument parsers are not)
     def __init__(self, *args, **kwargs):
@@ -296,6 +530,72 @@ class PicklableArgumentParser(ArgumentParser):
             *cmd_path[1:], prefix=prefix + cmd_path[:1], subcommand_help=subcommand_help
         )
 
+    ######################
+    # deferred arguments #
+    ######################
+
+    def defer_arguments_from(self, subcmd_func: "SubCommandFunc"):
+        """Register `subcmd_func` to add its arguments to this parser only when the parser is first used to parse,
+        format help, or otherwise inspect its arguments"""
+        self._deferred_arguments_from = subcmd_func
+
+    def add_deferred_arguments(self, recursive: bool = False):
+        if self._deferred_arguments_from is not None:
+            with _definition_lock:
+                subcmd_func = self._deferred_arguments_from
+                # argparse internals may call back into the methods below while arguments are added; other threads
+                # wait on the lock until all are added
+                if subcmd_func is not None and not self._adding_deferred_arguments:
+                    self._adding_deferred_arguments = True
+                    try:
+                        subcmd_func.add_arguments_to(self)
+                    finally:
+                        self._adding_deferred_arguments = False
+                    self._deferred_arguments_from = None
+
+        if recursive and self.has_subparsers:
+            for subparser in self._subparsers_action.choices.values():
+                if isinstance(subparser, PicklableArgumentParser):
+                    subparser.add_deferred_arguments(recursive=True)
+
+        return self
+
+    def parse_known_args(self, args=None, namespace=None):
+        self.add_deferred_arguments()
+        if self._deferred_error is not None:
+            self.error(self._deferred_error)
+        return super().parse_known_args(args, namespace)
+
+    def format_usage(self):
+        self.add_deferred_arguments()
+        return super().format_usage()
+
+    def format_help(self):
+        self.add_deferred_arguments()
+        return super().format_help()
+
+    def _get_values(self, action, arg_strings):
+        # Args are decoded from strings by the commands themselves, so the type registered for argparse is the
+        # identity. argparse still calls it per arg, and a subparsers action receives all of the remaining args, so this
+        # fast path slices variable-length arg lists in bulk instead; it matters for tens of thousands of values.
+        # Where a '--' is removed differs between python versions, so args including one are left to argparse.
+        nargs = action.nargs
+        if (
+            (
+                nargs in (ZERO_OR_MORE, ONE_OR_MORE, PARSER, REMAINDER)
+                and action.choices is None
+                or nargs == PARSER
+            )
+            and self._registry_get("type", action.type, action.type) is identity
+            and "--" not in arg_strings
+        ):
+            if arg_strings:
+                values = list(arg_strings)
+                if nargs == PARSER:
+                    self._check_value(action, values[0])
+                return values
+        return super()._get_values(action, arg_strings)
+
 
 class CommandLineInterface(PicklableArgumentParser, Logged):
     """
@@ -320,9 +620,15 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
             "_pickle_dump_path",
             "_last_edit_time",
             "_source_files",
+            "_definition_cache_current",
+            "_definition_cache_module",
+            "_deferred_source_refs",
+            "_help_cache_path",
         )
     )
     reserved_command_names = None
+    _plugin_commands = None
+    _plugin_source_files = None
     _subparsers_action = None
     _main = None
     parsed = None
@@ -330,6 +636,16 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
     _last_edit_time = Missing
     _pickle_load_path = None
     _pickle_dump_path = None
+    _definition_cache_current = None
+    _definition_cache_module = None
+    _deferred_source_refs = None
+    _help_cache_path = None
+    _serving = False
+    result_cache = None
+    background_output = None
+    collect_metrics = False
+    metrics_file = None
+    last_metrics = None
 
     def __init__(
         self,
@@ -340,6 +656,7 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
         implicit_flags: bool = False,
         default_metavars: Opt[Mapping[str, str]] = None,
         long_desc_as_epilog: bool = True,
+        lazy_subparsers: bool = False,
         # config settings
         use_config_file: Union[bool, str] = False,
         require_config: bool = False,
@@ -356,6 +673,7 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
         arg_lookup_order: Tuple[ArgSource, ...] = DEFAULT_LOOKUP_ORDER,
         ignore_function_defaults: bool = False,
         typecheck: bool = False,
+        arg_files: bool = False,
         output_handler: Opt[Callable] = None,
         # error handling
         exit_codes: Opt[Mapping[Type[Exception], int]] = None,
@@ -367,14 +685,23 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
         use_quiet_flag: bool = False,
         use_execution_flag: Union[bool, str, Tuple[str, ...]] = False,
         add_init_config_command: Union[bool, str, Tuple[str, ...]] = False,
+        use_batch_flag: Union[bool, str] = False,
+        use_serve_flag: Union[bool, str] = False,
+        use_profile_startup_flag: Union[bool, str] = False,
+        cache_results: Union[bool, str, ResultCache] = False,
+        background_output: Union[bool, int] = False,
+        collect_metrics: Union[bool, str] = False,
         suppress_setup_warnings: bool = False,
         # completion
         install_bash_completion: bool = False,
         extra_bash_completion_script: Opt[str] = None,
         add_install_bash_completion_flag: Union[bool, str] = True,
+        add_manifest_flag: Union[bool, str] = False,
         # source files
         source_file: Opt[str] = None,
         helper_files: Opt[List[str]] = None,
+        cache_definition: Union[bool, str] = False,
+        cache_help: Union[bool, str] = False,
         # info actions
         version: Opt[Union[str, bool]] = None,
         package: Opt[str] = None,
@@ -416,6 +743,11 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
             docstring after the first double line break and before any :param ...: sections. When False, the `epilog`
             arg is always excluded, and the `description` is defined from a concatenation of the long and short
             descriptions.
+        :param lazy_subparsers: bool. When True, the arguments of each subcommand's parser are only added when that
+            parser is actually used, i.e. when its command is named on the command line or its help is requested. This
+            makes CLI startup time scale with the size of the invoked command rather than the size of the whole
+            interface. The tradeoff is that errors in argument definitions for a subcommand (e.g. ambiguous positional
+            args) surface only when that subcommand is invoked, rather than at definition time.
 
         :param use_config_file: bool or str. If True, this indicates that a config file can be specified at the command
             line. If a str, this is treated as the default configuration file.
@@ -463,9 +795,19 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
             with them? Default is False. Specific args can be typchecked selectively by using the
             `application.cli.typecheck` decorator on registered functions, or passing a list to the `typecheck` arg of
             `CommandLineInterface.main` or `CommandLineInterface.subcommand`.
+        :param arg_files: bool. Should collection, mapping and iterator args accept '@path' values on the command line,
+            each of which is replaced by the lines of the file at `path` (stdin for '@-', which one command line can
+            use only once)? Default is False, since values starting with '@' are then no longer passed literally
+            ('@@value' passes '@value'). Specific args can
+            accept them selectively by using the `application.cli.cli_spec.arg_files` decorator on registered
+            functions, or passing a list to the `arg_files` arg of `CommandLineInterface.main` or
+            `CommandLineInterface.subcommand`.
         :param output_handler: optional callable. Should take the return value of the invoked command/function and
             perform (usually) some IO action on it, such as saving it to disk. The return value is passed as the first
             argument and any further args will be supplied as keyword args parsed from the CLI or config.
+            Alternately, a class with `open`, `write_item` and `close` methods (e.g. a subclass of
+            `application.cli.StreamingOutputHandler`) may be passed, in which case it is constructed from args parsed
+            from the CLI or config, and the items of the return value are streamed through it in bounded batches.
         :param exit_codes: optional mapping from exception classes to exit codes. If your application raises an
             exception, the exit code will be equal to the highest code among those corresponding to the exception
             classes matching the raised exception (where 'match' here means that the raised exception is an instance of
@@ -483,24 +825,83 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
             `application.cli.VERBOSE_FLAGS` which may be repeated to increase verbosity. This affects verbosity by
              decreasing the logging level by 10 for every repetition. At the DEBUG level (usually 3 repetitions),
              the log format also changes to reflect more information, such as source files and line numbers.
+             The level applies to the records logged by each invocation, so concurrent runs don't override each
+             other's verbosity; the log format and destinations are process-global.
         :param use_quiet_flag: bool. If passed, a flag is added to the command line interface using the option strings
             `application.cli.QUIET_FLAGS` with the effect that when the flag is passed, console logging is suppressed.
         :param use_execution_flag: bool or str. When True or a str, a flag is added to the command line interface which
             is interpreted as specifying that file-system-altering actions may be carried out, with the default behavior
             being to skip these actions, possibly with verbose reporting as in a "dry-run" scenario. Your application
             code may look up the status of this flag via `from bourbaki.application import cli; if cli.EXECUTE: ...`
-            to determine what action to take. The only effect on the behavior of this class is that file logging is
+            to determine what action to take; the flag is local to each invocation, so concurrent runs in different
+            threads or asyncio tasks see their own values. `application.cli.current_invocation` gives access to the
+            rest of the invocation's state. The only effect on the behavior of this class is that file logging is
             suppressed when the flag is not passed (when this arg is specified).
         :param add_init_config_command: bool or str. When True or a str, a command is added to the command line
             interface which wraps `application.CommandLineInterface.init_config`. This command writes an empty
             configuration file (or dir) for your command line interface that can then be manually edited and passed
             to the --config option when that option is available. See `application.CommandLineInterface.init_config` for
             more details.
+        :param use_batch_flag: bool or str. When True or a str, a flag is added to the command line interface which takes
+            a path to a batch file (or '-' for stdin) containing one command line per line, either shell-style or as a
+            JSON array of strings. The command lines are run in sequence in the current process via
+            `CommandLineInterface.run_many`, reusing the already-defined parser, logging configured from the top-level
+            options, and any parsed config files. If a str, the flag is equal to this arg, else it is
+            `application.cli.BATCH_FLAG`. The process exits with the highest exit code of any failed command line.
+            An additional option `application.cli.BATCH_NPROC_FLAG` allows fanning the batch out over a pool of worker
+            processes.
+        :param use_serve_flag: bool or str. When True or a str, a flag is added to the command line interface which
+            starts a long-lived server keeping this fully defined interface in memory, and running command lines sent
+            to it over a Unix domain socket via `CommandLineInterface.run`; see `CommandLineInterface.serve`. The flag
+            optionally takes the socket path; by default it is `application.server.default_socket_path(prog)`. If a
+            str, the flag is equal to this arg, else it is `application.cli.SERVE_FLAG`. Command lines are sent to the
+            server with `application.server.forward_to_server`, which can be called at the top of the CLI script
+            before any expensive imports or definitions. An additional flag `application.cli.SERVE_FORK_FLAG` runs
+            the server in fork mode, where each command line runs in a child process forked from the warm server.
+        :param use_profile_startup_flag: bool or str. When True or a str, a flag is added to the command line interface
+            which reports a breakdown of wall time spent in each phase of startup and execution - imports, definition,
+            subcommand construction, docstring parsing, type dispatch, argument parsing, config parsing, logging
+            configuration, argument decoding and command execution - once the command completes. The report is
+            printed to stderr. If a str, the flag is equal to this arg, else it is
+            `application.cli.PROFILE_STARTUP_FLAG`. A second option, the flag suffixed with '-json', takes a path
+            that the report is written to as JSON instead. Profiling can also be enabled for any interface, with or
+            without the flag, by setting the environment variable `application.cli.profiling.PROFILE_STARTUP_ENV_VAR`
+            to 1 or to a .json path.
+        :param cache_results: bool, str, or `application.cli.result_cache.ResultCache`. When truthy, the return values
+            of all subcommands are cached on disk, keyed on a canonical encoding of their fully decoded args (via their
+            config encoders), the modification times of any input files, and the source code of the function (and of
+            the class, for methods), so that commands re-invoked with identical inputs return the stored result
+            rather than running again; output handlers still run on cached results. If a str, it is the cache dir,
+            else a dir for this CLI in the user's cache dir is used (override the base dir with the
+            BOURBAKI_CLI_CACHE_DIR environment variable). Pass a `ResultCache` to bound the cache's size and number of
+            entries; least recently used results are evicted first. Caching can be controlled per-function with the
+            `application.cli.cli_spec.cache_results` decorator. Whenever any command caches results, a flag
+            `application.cli.NO_CACHE_FLAG` is added which bypasses the cache for one invocation.
+        :param background_output: bool or int. When truthy, streaming output handlers (see
+            `application.cli.StreamingOutputHandler`) for commands that return iterators (e.g. generators) run on a
+            background thread, fed the items through a bounded queue as they are produced, so that serialization and
+            writing overlap with computing the next items. Other output handlers are passed the return value as usual. If an int, it is the maximum number of
+            batches of items queued, else `application.cli.streaming.DEFAULT_QUEUE_SIZE`. Errors raised in the output
+            handler are re-raised in the main thread and handled with the usual exit codes, and all produced items are
+            written before the command returns. This can be controlled per-function with the
+            `application.cli.cli_spec.background_output` decorator.
+        :param collect_metrics: bool or str. When truthy, the wall time of each phase of every invocation (argv
+            parsing, logging configuration, config parsing, app object construction, decoding of each arg, command
+            execution and output handling) is recorded, and the most recent record is available as a dict from
+            `application.cli.last_run_metrics()` in the thread or asyncio task that called `run`, after it returns or
+            exits; `run_many` attaches each command line's record to its `BatchItemResult`. The record is also set as
+            `CommandLineInterface.last_metrics`, which concurrent runs share, as a convenience for single-threaded use. If a str, it is the path of a file to which each record is appended as
+            one JSON line. Setting the BOURBAKI_CLI_METRICS_FILE environment variable to a path enables this too.
         :param add_install_bash_completion_flag: bool or str. If True or a str, a flag is added to the command line
             interface which triggers installation of bash completions when it is passed. If a str, that flag is equal to
             this arg, else the default flag is `application.cli.INSTALL_SHELL_COMPLETION_FLAG`. Note that the
             'bash-completion' package may need to be installed for your OS for some completions to work; see the
             documentation for `application.completion` for more details.
+        :param add_manifest_flag: bool or str. If True or a str, a flag is added to the command line interface which
+            writes a JSON manifest of the whole interface to the path passed with it ('-' for stdout) and exits; see
+            `application.cli.manifest`. The manifest can be consumed by completion, config and documentation tooling
+            without importing the application. If a str, that flag is equal to this arg, else the default flag is
+            `application.cli.MANIFEST_FLAG`.
         :param install_bash_completion: bool. If True, shell completions are installed automatically at the end of
             interface inference in a `CommandLineInterface.definition` decorator call, if the source file(s) have
             changed more recently than the completion definition files or the completion definition files don't yet
@@ -523,6 +924,20 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
         :param helper_files: list of str. Any source files which the CLI definition source file imports from, and whose
             edit should trigger repetition of edit-sensitive operations. I.e. this arg serves the same purpose as
             source_file but allows tracking edits in other dependencies.
+        :param cache_definition: bool or str. If True, the fully defined CLI (parser tree, subcommands, and all type
+            and docstring introspection results) is pickled to a file in the user's cache dir (`$XDG_CACHE_HOME` or
+            ~/.cache by default; override with the BOURBAKI_CLI_CACHE_DIR environment variable) after the first
+            definition, and loaded from there on subsequent runs as long as `source_file` and all `helper_files` are
+            unchanged. If a str, it is the path of the cache file. The cache is loaded on the first call to
+            `CommandLineInterface.definition` or the first function decorated with `CommandLineInterface.main` or
+            `CommandLineInterface.subcommand`, so any other customization of the parser should happen before that.
+        :param cache_help: bool or str. If True, the help text of every command is rendered and written to a file in the
+            user's cache dir (as for `cache_definition`) the first time help is requested, keyed on the terminal width.
+            Thereafter, a bare help request (subcommand names followed by -h or --help) is answered from there at parse
+            time, as long as `source_file` and all `helper_files` are unchanged. When the CLI is constructed in the
+            __main__ module (i.e. the script defining it was run directly), a bare help request in sys.argv is answered
+            as soon as the CLI is constructed, before any commands are defined. If a str, it is the path of the cache
+            file.
 
         :param version: optional str or bool. If str, a --version flag is added that triggers the argparse print version
             action. If bool and `package` is passed, a --version flag is added that prints the version as inferred from
@@ -552,6 +967,8 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
         :param add_help: see argparse.ArgumentParser; default True.
         :param allow_abbrev: see argparse.ArgumentParser; default True.
         """
+        init_started = perf_counter()
+        profiling_mark("cli_init")
 
         super().__init__(
             prog=prog,
@@ -680,10 +1097,16 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
                 # assume tuple of str
                 execution_flag = tuple(use_execution_flag)
 
-            self._add_argument(*execution_flag, action=SetExecuteFlagAction)
+            self._add_argument(
+                *execution_flag,
+                action=SetExecuteFlagAction,
+                dest=EXECUTE_ATTR,
+                default=False,
+            )
         else:
-            global EXECUTE
-            EXECUTE = True
+            global _default_execute
+            _default_execute = True
+            self.reserved_attrs.remove(EXECUTE_ATTR)
 
         if package is not None:
             if version is not None and not isinstance(version, bool):
@@ -726,6 +1149,126 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
             )
             self._add_argument(flag, action=InstallShellCompletionAction)
 
+        if add_manifest_flag:
+            self._add_argument(
+                add_manifest_flag
+                if isinstance(add_manifest_flag, str)
+                else MANIFEST_FLAG,
+                action=DumpManifestAction,
+            )
+
+        if use_batch_flag:
+            self._add_argument(
+                use_batch_flag if isinstance(use_batch_flag, str) else BATCH_FLAG,
+                type=str,
+                default=None,
+                dest=BATCH_FILE_ATTR,
+                metavar=text_path_repr,
+                help="path to a file of command lines to run in sequence, one per line, either shell-style or as "
+                "JSON arrays of strings; '-' reads from stdin",
+                completer=CompleteFiles("txt", "jsonl"),
+            )
+            self._add_argument(
+                BATCH_NPROC_FLAG,
+                type=int,
+                default=None,
+                dest=BATCH_NPROC_ATTR,
+                metavar="<int>",
+                help="number of worker processes to run the {} command lines with; negative values count back "
+                "from the number of cores, e.g. -1 for all cores. By default, command lines are run sequentially "
+                "in the current process".format(BATCH_FLAG),
+            )
+        else:
+            self.reserved_attrs.remove(BATCH_FILE_ATTR)
+            self.reserved_attrs.remove(BATCH_NPROC_ATTR)
+
+        if use_serve_flag:
+            self._add_argument(
+                use_serve_flag if isinstance(use_serve_flag, str) else SERVE_FLAG,
+                nargs="?",
+                const=True,
+                default=None,
+                dest=SERVE_SOCKET_ATTR,
+                metavar="<socket-path>",
+                help="start a server which runs command lines sent to it over a Unix domain socket, "
+                "optionally at the specified path",
+                completer=CompleteFiles("sock"),
+            )
+            self._add_argument(
+                SERVE_FORK_FLAG,
+                action="store_true",
+                dest=SERVE_FORK_ATTR,
+                help="when passed with {}, run each command line in a child process forked from the server, "
+                "isolating commands from each other and allowing them to run concurrently".format(
+                    SERVE_FLAG
+                ),
+            )
+        else:
+            self.reserved_attrs.remove(SERVE_SOCKET_ATTR)
+            self.reserved_attrs.remove(SERVE_FORK_ATTR)
+
+        if use_profile_startup_flag:
+            profile_flag = (
+                use_profile_startup_flag
+                if isinstance(use_profile_startup_flag, str)
+                else PROFILE_STARTUP_FLAG
+            )
+            profile_json_flag = profile_flag + PROFILE_STARTUP_JSON_SUFFIX
+            self._add_argument(
+                profile_flag,
+                action="store_true",
+                dest=PROFILE_STARTUP_ATTR,
+                help="report a breakdown of wall time spent in each phase of startup and execution to stderr; "
+                "equivalent to setting the environment variable {}=1".format(
+                    PROFILE_STARTUP_ENV_VAR
+                ),
+            )
+            self._add_argument(
+                profile_json_flag,
+                default=None,
+                dest=PROFILE_STARTUP_JSON_ATTR,
+                metavar="<json-path>",
+                help="like {}, but write the report to a JSON file at the specified path".format(
+                    profile_flag
+                ),
+                completer=CompleteFiles("json"),
+            )
+            # the command line isn't parsed until after definition, so look ahead to profile the definition as well.
+            # Only the options before the first positional (the subcommand) are checked, since anything after that may
+            # be a value of some other option; if the flags are missed here, profiling starts once args are parsed.
+            args = iter(sys.argv[1:])
+            for arg in args:
+                if arg == profile_flag:
+                    start_profile()
+                elif arg == profile_json_flag:
+                    start_profile(next(args, None))
+                elif arg.startswith(profile_json_flag + "="):
+                    start_profile(arg[len(profile_json_flag) + 1 :])
+                elif arg == "--" or not arg.startswith("-"):
+                    break
+        else:
+            self.reserved_attrs.remove(PROFILE_STARTUP_ATTR)
+            self.reserved_attrs.remove(PROFILE_STARTUP_JSON_ATTR)
+
+        self.reserved_attrs.remove(NO_CACHE_ATTR)
+        if cache_results:
+            if isinstance(cache_results, ResultCache):
+                result_cache = cache_results
+            elif isinstance(cache_results, (str, Path)):
+                result_cache = ResultCache(cache_results)
+            else:
+                result_cache = ResultCache()
+            self.result_cache = self._resolve_result_cache(result_cache)
+            self._add_no_cache_flag()
+        else:
+            self.result_cache = None
+
+        self.background_output = _queue_size(background_output)
+        self.collect_metrics = bool(collect_metrics)
+        self.metrics_file = (
+            str(collect_metrics) if isinstance(collect_metrics, (str, Path)) else None
+        )
+
         if subcommand_help is not None:
             if not isinstance(subcommand_help, Mapping):
                 raise TypeError(
@@ -762,18 +1305,22 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
 
         self.parse_config_as_cli = parse_config_as_cli
         self.typecheck = typecheck
+        self.arg_files = arg_files
         self.output_handler = output_handler
         self.exit_codes = exit_codes or {Exception: 1}
         self.require_options = bool(require_options)
 
         self.use_multiprocessing = bool(use_multiprocessing)
         self.use_execution_flag = bool(use_execution_flag)
+        self.use_batch_flag = bool(use_batch_flag)
+        self.use_serve_flag = bool(use_serve_flag)
         self.require_subcommand = bool(require_subcommand)
         self.implicit_flags = bool(implicit_flags)
         self.default_metavars = (
             None if default_metavars is None else dict(default_metavars)
         )
         self.long_desc_as_epilog = bool(long_desc_as_epilog)
+        self.lazy_subparsers = bool(lazy_subparsers)
 
         self.source_file = source_file
         if source_file is not None:
@@ -781,10 +1328,31 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
         else:
             self.source_dir = None
         self.helper_files = helper_files
+        if cache_definition:
+            if isinstance(cache_definition, (str, Path)):
+                cache_path = os.path.abspath(os.path.expanduser(cache_definition))
+            else:
+                cache_path = default_definition_cache_path(
+                    self.cmd_name, self.get_sourcepath()
+                )
+            self._pickle_load_path = self._pickle_dump_path = cache_path
+        if cache_help:
+            if isinstance(cache_help, (str, Path)):
+                self._help_cache_path = os.path.abspath(os.path.expanduser(cache_help))
+            else:
+                self._help_cache_path = default_help_cache_path(
+                    self.cmd_name, self.get_sourcepath()
+                )
+            if _constructed_in_main():
+                # the script was run directly, so the process's args are the ones it will parse
+                self._print_cached_help(sys.argv[1:])
         self.extra_bash_completion_script = extra_bash_completion_script
         self._bash_completion = bool(install_bash_completion)
         self.use_init_config_command = bool(add_init_config_command)
         self.subcommands = {}
+        self._plugin_commands = {}
+        # cmd path -> source file of each plugin command loaded so far
+        self._plugin_source_files = {}
         self.reserved_command_names = set()
         self._builtin_commands_added = False
         self.suppress_setup_warnings = bool(suppress_setup_warnings)
@@ -794,6 +1362,7 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
             ignore_on_cmd_line=False if ArgSource.CLI in self.lookup_order else True,
             ignore_in_config=False if ArgSource.CONFIG in self.lookup_order else True,
             typecheck=self.typecheck,
+            arg_files=self.arg_files,
             metavars=self.default_metavars,
             require_options=self.require_options,
         )
@@ -828,6 +1397,10 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
 
             self.reserved_command_names.add(self.init_config_command)
 
+        profile = get_profile()
+        if profile is not None:
+            profile.add("CommandLineInterface()", perf_counter() - init_started)
+
     def add_builtin_commands(self):
         if self._builtin_commands_added:
             return
@@ -846,18 +1419,28 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
             )(self.init_config)
 
             path, subcommand = self.get_subcommand_func(self.init_config_command)
+            subcommand.parser.add_deferred_arguments()
 
             commands_args = [
                 a
                 for a in subcommand.parser._actions
                 if a.dest in ("only_commands", "omit_commands")
             ]
-            all_command_choices = filter(
-                bool,
-                self.all_subcommand_names(
-                    include_prefixes=True,
-                    filter_=lambda cmd: bool(cmd.config_subsections),
-                ),
+            all_command_choices = set(
+                filter(
+                    bool,
+                    self.all_subcommand_names(
+                        include_prefixes=True,
+                        filter_=lambda cmd: bool(cmd.config_subsections),
+                        load_plugins=False,
+                    ),
+                )
+            )
+            # plugin commands are offered by path, since importing them all here would slow down every invocation
+            all_command_choices.update(
+                cmd_path[:i]
+                for cmd_path in self._plugin_commands
+                for i in range(1, len(cmd_path) + 1)
             )
             all_command_choices_str = list(map(" ".join, all_command_choices))
             for arg in commands_args:
@@ -881,6 +1464,22 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
         self._builtin_commands_added = True
         return self
 
+    def _resolve_result_cache(self, result_cache: ResultCache) -> ResultCache:
+        if result_cache.directory is None:
+            return result_cache.with_directory(default_result_cache_dir(self.cmd_name))
+        return result_cache
+
+    def _add_no_cache_flag(self):
+        if NO_CACHE_ATTR in self.reserved_attrs:
+            return
+        self._add_argument(
+            NO_CACHE_FLAG,
+            action="store_true",
+            dest=NO_CACHE_ATTR,
+            help="run the command even if a result for the same inputs is cached, and don't cache its result",
+        )
+        self.reserved_attrs.add(NO_CACHE_ATTR)
+
     def add_argument(self, *args, completer=None, **kwargs):
         dest = kwargs.get("dest", get_dest_name(args, self.prefix_chars))
 
@@ -939,11 +1538,72 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
             *cmd_path, prefix=prefix, subcommand_help=subcommand_help
         )
 
+    def add_plugin_command(
+        self,
+        cmd_path: Union[str, Sequence[str]],
+        target: str,
+        help: Opt[str] = None,
+        **subcommand_kwargs,
+    ) -> PluginCommand:
+        """Register a subcommand by its path and import target, without importing it. Only a placeholder parser with
+        the given help line is created here; the target is imported and registered with the `subcommand` decorator
+        when the command is invoked or its help is requested, so that startup cost doesn't grow with the number of
+        such commands.
+
+        :param cmd_path: the full command path, as a sequence of names or a whitespace-separated string
+        :param target: where the function implementing the command is found; 'module:qualname' as for entry points,
+            or a '.'-separated path
+        :param help: the help line to show for the command in its parent command's help
+        :param subcommand_kwargs: keyword args to pass to `subcommand` when the command is registered
+        """
+        cmd_path = plugin_command_path(cmd_path)
+        if not cmd_path:
+            raise ValueError("plugin commands must have a non-empty command path")
+        existing = self.subcommands
+        for name in cmd_path[:-1]:
+            _, existing = existing.get(name, (None, {}))
+        if cmd_path in self._plugin_commands or existing.get(cmd_path[-1], (None,))[0]:
+            raise NameError("command {} is already registered".format(cmd_path))
+
+        plugin = PluginCommand(self, cmd_path, target, help, subcommand_kwargs)
+        self._plugin_commands[cmd_path] = plugin
+        return plugin
+
+    def add_entry_point_commands(
+        self, group: str, help: Opt[Mapping[str, str]] = None, **subcommand_kwargs
+    ) -> List[PluginCommand]:
+        """Register a plugin command (see `add_plugin_command`) for each entry point in the entry point group `group`
+        of the installed distributions. Entry point names are whitespace-separated command paths, and their values
+        are import targets. None of them are imported here.
+
+        :param help: optional mapping of entry point name -> help line; entry points have no help of their own
+        :param subcommand_kwargs: keyword args to pass to `subcommand` when each command is registered
+        """
+        help = help or {}
+        return [
+            self.add_plugin_command(
+                name, target, help=help.get(name), **subcommand_kwargs
+            )
+            for name, target in entry_point_targets(group)
+        ]
+
+    def load_plugin_commands(self):
+        """Import and register all plugin commands which haven't been yet. Those which fail to import are reported in
+        a warning and skipped; invoking one of them is a usage error."""
+        if self._plugin_commands:
+            for plugin in list(self._plugin_commands.values()):
+                if plugin.parser._deferred_arguments_from is None:
+                    continue
+                plugin.parser.add_deferred_arguments()
+                if plugin.error is not None:
+                    self.logger.warning("%s", plugin.error)
+
     def all_subcommands(
         self,
         *prefix: str,
         include_prefixes: bool = False,
         filter_: Opt[Callable[["SubCommandFunc"], bool]] = None,
+        load_plugins: bool = True,
     ) -> Iterator[Tuple[Tuple[str, ...], "SubCommandFunc"]]:
         def inner(
             prefix: Tuple[str, ...],
@@ -960,6 +1620,9 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
                     yield pre, cmd
                 yield from inner(pre, subcmds, include_prefixes)
 
+        if load_plugins:
+            # every command is wanted here, so any not yet imported have to be
+            self.load_plugin_commands()
         rootcmd = self._main
         subcommands = self.subcommands
         for pre in prefix:
@@ -977,11 +1640,15 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
         *prefix: str,
         include_prefixes: bool = False,
         filter_: Opt[Callable[["SubCommandFunc"], bool]] = None,
+        load_plugins: bool = True,
     ) -> Iterator[Tuple[str, ...]]:
         return map(
             operator.itemgetter(0),
             self.all_subcommands(
-                *prefix, include_prefixes=include_prefixes, filter_=filter_
+                *prefix,
+                include_prefixes=include_prefixes,
+                filter_=filter_,
+                load_plugins=load_plugins,
             ),
         )
 
@@ -997,8 +1664,486 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
         time_units="s",
         log_level=PROGRESS,
         error_level=ERROR,
+    ):
+        metrics = self._start_metrics(args)
+        exit_code = 1
+        try:
+            result = self._run(
+                args,
+                namespace,
+                report_progress=report_progress,
+                time_units=time_units,
+                log_level=log_level,
+                error_level=error_level,
+            )
+            exit_code = 0
+            return result
+        except SystemExit as e:
+            exit_code, _ = _exit_code_and_error(e)
+            raise
+        finally:
+            # no-ops unless profiling/metrics were enabled
+            finish_profile(self.prog)
+            self._finish_metrics(metrics, exit_code)
+
+    def _start_metrics(self, args) -> Opt[Tuple[Any, Opt[str]]]:
+        metrics_file = os.environ.get(METRICS_FILE_ENV_VAR) or self.metrics_file
+        if not (self.collect_metrics or metrics_file):
+            return None
+        metrics = RunMetrics(self.prog, sys.argv[1:] if args is None else args)
+        return start_metrics(metrics), metrics_file
+
+    def _finish_metrics(
+        self, metrics: Opt[Tuple[Any, Opt[str]]], exit_code: int
+    ) -> Opt[Dict[str, Any]]:
+        if metrics is None:
+            return None
+        token, metrics_file = metrics
+        try:
+            run_metrics = finish_metrics(token, exit_code, metrics_file)
+        except OSError as e:
+            self.logger.error("couldn't write metrics to %s: %s", metrics_file, e)
+            return None
+        record = run_metrics.to_dict()
+        _last_run_metrics.set(record)
+        self.last_metrics = record
+        return record
+
+    @staticmethod
+    def _start_profile(ns):
+        json_path = getattr(ns, PROFILE_STARTUP_JSON_ATTR, None)
+        if json_path is not None:
+            start_profile(json_path)
+        elif getattr(ns, PROFILE_STARTUP_ATTR, False):
+            start_profile()
+
+    def _run(
+        self,
+        args=None,
+        namespace=None,
+        report_progress=False,
+        time_units="s",
+        log_level=PROGRESS,
+        error_level=ERROR,
     ):
         ns = self.parse_args(args, namespace)
+
+        self._start_profile(ns)
+
+        serve_socket = getattr(ns, SERVE_SOCKET_ATTR, None)
+        if serve_socket is not None:
+            if self._serving:
+                self.error("a server can't be started from within a server")
+            self.get_app_logger(ns)
+            return self.serve(
+                None if serve_socket is True else serve_socket,
+                fork=getattr(ns, SERVE_FORK_ATTR, False),
+            )
+        elif getattr(ns, SERVE_FORK_ATTR, False):
+            self.error(
+                "{} can only be passed with {}".format(SERVE_FORK_FLAG, SERVE_FLAG)
+            )
+
+        batch_file = getattr(ns, BATCH_FILE_ATTR, None)
+        if batch_file is not None:
+            nproc = get_nproc(getattr(ns, BATCH_NPROC_ATTR, None))
+            app_logger = self.get_app_logger(
+                ns, use_multiprocessing=self.use_multiprocessing or bool(nproc)
+            )
+            return self.run_batch_file(
+                batch_file,
+                app_logger,
+                nproc=nproc,
+                report_progress=report_progress,
+                time_units=time_units,
+                log_level=log_level,
+                error_level=error_level,
+            )
+
+        return self._run_namespace(
+            ns,
+            report_progress=report_progress,
+            time_units=time_units,
+            log_level=log_level,
+            error_level=error_level,
+        )
+
+    def run_many(
+        self,
+        argv_iterable: Iterable[Union[str, Sequence[str]]],
+        nproc: Opt[int] = None,
+        chunksize: int = 1,
+        report_progress=False,
+        time_units="s",
+        log_level=PROGRESS,
+        error_level=ERROR,
+    ) -> List[BatchItemResult]:
+        """Run many command lines, without aborting on failures.
+
+        Parsers are built only once, logging is configured only once (from the options of the first command line), and
+        any config file is parsed only once, regardless of how many command lines reference it.
+
+        :param argv_iterable: iterable of command lines; each may be a list of str args or a single shell-style str
+        :param nproc: optional int. If passed, the command lines are distributed over a pool of this many worker
+            processes, as created by `application.multiprocessing.get_pool`; negative values count back from the number
+            of cores as in `application.multiprocessing.get_nproc`. Each worker uses this (already defined) interface
+            and logs through the process-safe handlers configured in this process. If not passed, the command lines are
+            run sequentially in the current process.
+        :param chunksize: number of command lines to send to a worker process at once when `nproc` is passed
+        :return: a list of `BatchItemResult`, one for each command line in the order given, reporting success, exit
+            code, return value or error, and elapsed time
+        """
+        results = list(
+            self._iter_run_many(
+                argv_iterable,
+                nproc=nproc,
+                chunksize=chunksize,
+                report_progress=report_progress,
+                time_units=time_units,
+                log_level=log_level,
+                error_level=error_level,
+            )
+        )
+        if nproc:
+            # results from worker processes arrive in order of completion
+            results.sort(key=operator.attrgetter("index"))
+        return results
+
+    async def arun(
+        self,
+        args=None,
+        namespace=None,
+        report_progress=False,
+        time_units="s",
+        log_level=PROGRESS,
+        error_level=ERROR,
+    ):
+        """Like `CommandLineInterface.run`, but awaitable, so that it can be called from a running event loop.
+        Coroutine functions and async output handlers are awaited in that loop rather than in a new one, and any number
+        of commands can run concurrently, e.g. with `asyncio.gather` or `CommandLineInterface.arun_many`.
+        Regular functions are simply called, blocking the loop while they run."""
+        metrics = self._start_metrics(args)
+        exit_code = 1
+        try:
+            ns = self.parse_args(args, namespace)
+
+            self._start_profile(ns)
+
+            for attr, flag in (
+                (SERVE_SOCKET_ATTR, SERVE_FLAG),
+                (BATCH_FILE_ATTR, BATCH_FLAG),
+            ):
+                if getattr(ns, attr, None) is not None:
+                    self.error("{} can't be used with arun()".format(flag))
+
+            result = await self._run_namespace(
+                ns,
+                report_progress=report_progress,
+                time_units=time_units,
+                log_level=log_level,
+                error_level=error_level,
+                awaitable=True,
+            )
+            exit_code = 0
+            return result
+        except SystemExit as e:
+            exit_code, _ = _exit_code_and_error(e)
+            raise
+        finally:
+            finish_profile(self.prog)
+            self._finish_metrics(metrics, exit_code)
+
+    async def arun_many(
+        self,
+        argv_iterable: Iterable[Union[str, Sequence[str]]],
+        max_concurrency: Opt[int] = None,
+        report_progress=False,
+        time_units="s",
+        log_level=PROGRESS,
+        error_level=ERROR,
+    ) -> List[BatchItemResult]:
+        """Run many command lines concurrently in the running event loop, without aborting on failures. As with
+        `CommandLineInterface.run_many`, logging is configured only once (from the options of the first command line)
+        and any config file is parsed only once; the waits of coroutine commands overlap.
+
+        :param argv_iterable: iterable of command lines; each may be a list of str args or a single shell-style str
+        :param max_concurrency: optional int. If passed, at most this many commands run at once.
+        :return: a list of `BatchItemResult`, one for each command line in the order given, reporting success, exit
+            code, return value or error, and elapsed time
+        """
+        import asyncio
+
+        run_kw = dict(
+            report_progress=report_progress,
+            time_units=time_units,
+            log_level=log_level,
+            error_level=error_level,
+        )
+        semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        configs = {}
+        app_logger = None
+
+        async def run_one(index, args):
+            nonlocal app_logger
+            args = shlex.split(args) if isinstance(args, str) else list(args)
+            result = error = None
+            exit_code = 0
+            tic = perf_counter()
+            metrics = self._start_metrics(args)
+            try:
+                ns = self.parse_args(args)
+                if getattr(ns, BATCH_FILE_ATTR, None) is not None:
+                    raise ValueError("batch command lines can't themselves be batches")
+                if app_logger is None:
+                    app_logger = self.get_app_logger(ns)
+                if semaphore is None:
+                    result = await self._run_namespace(
+                        ns,
+                        app_logger=app_logger,
+                        configs=configs,
+                        awaitable=True,
+                        **run_kw,
+                    )
+                else:
+                    async with semaphore:
+                        result = await self._run_namespace(
+                            ns,
+                            app_logger=app_logger,
+                            configs=configs,
+                            awaitable=True,
+                            **run_kw,
+                        )
+            except (SystemExit, Exception) as e:
+                exit_code, error = _exit_code_and_error(e)
+            toc = perf_counter()
+
+            return BatchItemResult(
+                index=index,
+                args=args,
+                success=exit_code == 0,
+                exit_code=exit_code,
+                result=result,
+                error=error,
+                time=toc - tic,
+                metrics=self._finish_metrics(metrics, exit_code),
+            )
+
+        results = await asyncio.gather(
+            *(run_one(index, args) for index, args in enumerate(argv_iterable))
+        )
+        for item in results:
+            self._log_batch_item(item, app_logger)
+        return list(results)
+
+    def run_batch_file(
+        self,
+        path: Union[str, Path],
+        app_logger: Opt[Logger] = None,
+        nproc: Opt[int] = None,
+        chunksize: int = 1,
+        report_progress=False,
+        time_units="s",
+        log_level=PROGRESS,
+        error_level=ERROR,
+    ) -> List[BatchItemResult]:
+        """Run all command lines in the batch file at `path` via `CommandLineInterface.run_many`, logging a summary
+        and exiting with the highest exit code of any failed command line"""
+        tic = perf_counter()
+        results = list(
+            self._iter_run_many(
+                iter_batch_file(path),
+                app_logger=app_logger,
+                nproc=nproc,
+                chunksize=chunksize,
+                report_progress=report_progress,
+                time_units=time_units,
+                log_level=log_level,
+                error_level=error_level,
+            )
+        )
+        toc = perf_counter()
+        failed = [r for r in results if not r.success]
+        logger = self.logger if app_logger is None else app_logger
+        logger.info(
+            "ran %d command lines from %s in %.3fs: %d succeeded, %d failed",
+            len(results),
+            path,
+            toc - tic,
+            len(results) - len(failed),
+            len(failed),
+        )
+        if failed:
+            sys.exit(max(r.exit_code for r in failed))
+        return results
+
+    def _iter_run_many(
+        self,
+        argv_iterable: Iterable[Union[str, Sequence[str]]],
+        app_logger: Opt[Logger] = None,
+        nproc: Opt[int] = None,
+        chunksize: int = 1,
+        **run_kw,
+    ) -> Iterator[BatchItemResult]:
+        nproc = get_nproc(nproc)
+        if nproc:
+            items = self._iter_run_many_parallel(
+                argv_iterable, app_logger, nproc, chunksize, **run_kw
+            )
+        else:
+            items = self._iter_run_many_sequential(
+                enumerate(argv_iterable), app_logger, **run_kw
+            )
+
+        for item in items:
+            self._log_batch_item(item, app_logger)
+            yield item
+
+    def _iter_run_many_parallel(
+        self,
+        argv_iterable: Iterable[Union[str, Sequence[str]]],
+        app_logger: Opt[Logger],
+        nproc: int,
+        chunksize: int,
+        **run_kw,
+    ) -> Iterator[BatchItemResult]:
+        if app_logger is None:
+            # process-safe handlers, configured once here and inherited by the workers
+            app_logger = self.get_app_logger(None, use_multiprocessing=True)
+
+        # finish any one-time setup before the workers are started, so that it isn't repeated in each
+        self.finalize_definition()
+        init = partial(_init_batch_worker, self, app_logger, run_kw)
+        # the log handlers configured above are only inherited by forked workers, so fork wherever the platform can,
+        # regardless of the default start method (spawn on macOS, and forkserver on Linux from python 3.14)
+        start_method = "fork" if hasattr(os, "fork") else None
+        pool = get_pool(nproc, app_logger, init=init, start_method=start_method)
+        try:
+            items = pool.imap_unordered(
+                _run_batch_item, enumerate(argv_iterable), chunksize=chunksize
+            )
+            # streamed back in order of completion
+            for item in items:
+                yield pickle.loads(item)
+        except BaseException:
+            # including GeneratorExit when the consumer stops early
+            pool.terminate()
+            raise
+        else:
+            # let the workers exit normally so that log records they queued are all handled
+            pool.close()
+        finally:
+            pool.join()
+
+    def _iter_run_many_sequential(
+        self,
+        indexed_argv_iterable: Iterable[Tuple[int, Union[str, Sequence[str]]]],
+        app_logger: Opt[Logger] = None,
+        **run_kw,
+    ) -> Iterator[BatchItemResult]:
+        # parsed config files are shared by all command lines in the batch
+        configs = {}
+        for index, args in indexed_argv_iterable:
+            args = shlex.split(args) if isinstance(args, str) else list(args)
+            result = error = None
+            exit_code = 0
+            tic = perf_counter()
+            metrics = self._start_metrics(args)
+            try:
+                ns = self.parse_args(args)
+                if getattr(ns, BATCH_FILE_ATTR, None) is not None:
+                    raise ValueError("batch command lines can't themselves be batches")
+                if app_logger is None:
+                    app_logger = self.get_app_logger(ns)
+                result = self._run_namespace(
+                    ns, app_logger=app_logger, configs=configs, **run_kw
+                )
+            except (SystemExit, Exception) as e:
+                exit_code, error = _exit_code_and_error(e)
+            toc = perf_counter()
+
+            yield BatchItemResult(
+                index=index,
+                args=args,
+                success=exit_code == 0,
+                exit_code=exit_code,
+                result=result,
+                error=error,
+                time=toc - tic,
+                metrics=self._finish_metrics(metrics, exit_code),
+            )
+
+    def _log_batch_item(self, item: BatchItemResult, app_logger: Opt[Logger] = None):
+        logger = self.logger if app_logger is None else app_logger
+        if item.success:
+            logger.info(
+                "batch item %d succeeded in %.3fs: %s", item.index, item.time, item.args
+            )
+        else:
+            logger.error(
+                "batch item %d failed with exit code %d in %.3fs: %s; %s",
+                item.index,
+                item.exit_code,
+                item.time,
+                item.args,
+                "{}: {}".format(type(item.error).__name__, item.error)
+                if item.error is not None
+                else "no error information",
+            )
+
+    def serve(self, path: Opt[str] = None, fork: bool = False):
+        """Run a server keeping this fully defined interface in memory, and running command lines sent to it over a
+        Unix domain socket at `path` until interrupted. Requests are handled with their environment and working dir
+        set as sent by the client, and stdout/stderr streamed back to it. stdin is not forwarded.
+        Clients can connect using `application.server.run_client` or `application.server.forward_to_server`.
+
+        :param path: path to the socket to listen on. The default is `application.server.default_socket_path(prog)`.
+        :param fork: if True, run each request in a child process forked from the server (a "zygote"), which is warmed
+            up before serving via `CommandLineInterface.warm`. Children exit with the same exit code the command would
+            have in a fresh process, and that code is sent to the client. Otherwise, requests are handled one at a time
+            in the server process.
+        """
+        from ..server import CLIServer, default_socket_path
+
+        if path is None:
+            path = default_socket_path(self.prog)
+
+        if fork:
+            self.warm()
+        else:
+            self.finalize_definition()
+        server = CLIServer(self._serve_one, path, fork=fork).bind()
+        self.logger.info(
+            "serving %s on socket %s%s",
+            self.prog,
+            server.path,
+            " in fork mode" if fork else "",
+        )
+        self._serving = True
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.logger.info("shutting down server on socket %s", server.path)
+        finally:
+            self._serving = False
+
+    def _serve_one(self, args: Sequence[str]):
+        # each request starts from the same state as a fresh process, since all per-invocation state is in the
+        # namespace parsed from its args
+        return self.run(args)
+
+    def _run_namespace(
+        self,
+        ns,
+        report_progress=False,
+        time_units="s",
+        log_level=PROGRESS,
+        error_level=ERROR,
+        app_logger=None,
+        configs=None,
+        awaitable=False,
+    ):
+        """Run the command specified by the parsed namespace `ns`. When `awaitable` is True, argument decoding and
+        execution are deferred to a returned awaitable, which can run concurrently with others in an event loop"""
         cmdname, cmdfunc = self.get_subcommand_func(ns)
 
         if cmdname is None and not self.require_subcommand:
@@ -1015,18 +2160,54 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
         else:
             main = False
 
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.command = cmdname if isinstance(cmdname, str) else " ".join(cmdname)
+
+        use_result_cache = cmdfunc.result_cache is not None and not getattr(
+            ns, NO_CACHE_ATTR, False
+        )
+        cache_context = None
         verbosity = getattr(ns, VERBOSITY_ATTR, MIN_VERBOSITY)
         if cmdfunc.exit_codes is None:
             exit_codes = self.exit_codes
         else:
             exit_codes = ChainMap(cmdfunc.exit_codes, self.exit_codes)
 
-        with CLIErrorHandlingContext(
+        error_handling = CLIErrorHandlingContext(
             exit_codes, verbose=verbosity >= TRACEBACK_VERBOSITY
-        ):
-            app_logger = self.get_app_logger(ns)
+        )
+        context = InvocationContext(
+            cli=self,
+            command=cmdname,
+            namespace=ns,
+            execute=self.execute_flag(ns),
+            verbosity=verbosity,
+            quiet=getattr(ns, QUIET_ATTR, False),
+            log_level=None
+            if app_logger is not None
+            else validate_log_level_int(_verbosity_log_level(verbosity)),
+        )
+        with _invocation(context), error_handling:
+            if app_logger is None:
+                with profile_phase("logging configuration"):
+                    app_logger = self.get_app_logger(ns)
             app_logger.debug("command is %r", cmdname)
-            config = self.parse_config(ns, app_logger) if self.use_config else None
+
+            if not self.use_config:
+                config = None
+            elif configs is None:
+                with profile_phase("parse_config"):
+                    config = self.parse_config(ns, app_logger)
+            else:
+                config_file = getattr(ns, CONFIG_FILE_ATTR, None)
+                if config_file in configs:
+                    config = configs[config_file]
+                else:
+                    with profile_phase("parse_config"):
+                        config = configs[config_file] = self.parse_config(
+                            ns, app_logger
+                        )
 
             # if self is defined from a class and the command is not a reserved/builtin command,
             if (
@@ -1035,26 +2216,66 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
                 and (cmdname not in self.reserved_command_names)
             ):
                 # perform any initialization logic; if main == True, this will be done below at func.execute()
-                app_obj = self._main.execute(ns, config, handle_output=False)
+                with profile_phase("app construction"):
+                    if use_result_cache and cmdfunc.from_method:
+                        # the result of a method depends on its instance
+                        app_obj, cache_context = self._main.execute_keyed(ns, config)
+                        use_result_cache = cache_context is not None
+                    else:
+                        app_obj = self._main.execute(ns, config, handle_output=False)
             else:
                 app_obj = None
 
-            if not report_progress:
-                result = cmdfunc.execute(ns, config, app_obj)
-            else:
-                with get_task(
+            execute = partial(
+                cmdfunc.aexecute if awaitable else cmdfunc.execute,
+                ns,
+                config,
+                app_obj,
+                use_result_cache=use_result_cache,
+                result_cache_context=cache_context,
+            )
+            if report_progress:
+                task = partial(
+                    get_task,
                     app_logger,
                     cmdname,
                     log_level=log_level,
                     error_level=error_level,
                     time_units=time_units,
-                ):
-                    result = cmdfunc.execute(ns, config, app_obj)
+                )
+            else:
+                task = None
+
+            if awaitable:
+                return self._await_command(execute(), error_handling, task, context)
+            elif task is None:
+                result = execute()
+            else:
+                with task():
+                    result = execute()
 
         return result
 
+    @staticmethod
+    async def _await_command(
+        coro,
+        error_handling: CLIErrorHandlingContext,
+        task: Opt[Callable] = None,
+        context: Opt[InvocationContext] = None,
+    ):
+        # the context is set again here since the coroutine runs after _run_namespace has returned
+        with _invocation(context), error_handling:
+            if task is None:
+                return await coro
+            with task():
+                return await coro
+
     def parse_args(self, args=None, namespace=None):
-        if self.require_subcommand and not self.subcommands:
+        if (
+            self.require_subcommand
+            and not self.subcommands
+            and not self._plugin_commands
+        ):
             self.error(
                 "This parser requires a subcommand but none have been defined; use the {}.subcommand() "
                 "decorator on a function in your script to define one, or define your CLI via a class".format(
@@ -1062,9 +2283,48 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
                 )
             )
 
-        self.add_builtin_commands()
-        ns = super().parse_args(args, namespace=namespace)
-        return self.validate_namespace(ns)
+        if args is None:
+            args = sys.argv[1:]
+        cache_help = (
+            self._help_cache_path is not None and help_request(args) is not None
+        )
+        if cache_help:
+            self._print_cached_help(args)
+
+        self.finalize_definition()
+        if cache_help:
+            plugin = self._plugin_commands.get(help_request(args))
+            if plugin is not None:
+                # its help is about to be rendered anyway; load it now so that it can be cached too
+                plugin.parser.add_deferred_arguments()
+            # help is about to be rendered from the full definition; save it for next time
+            self.dump_help_cache()
+        with profile_phase("parse_args"):
+            ns = super().parse_args(args, namespace=namespace)
+            return self.validate_namespace(ns)
+
+    def warm(self):
+        """Do as much parse-time setup as possible up front: finalize the definition, construct all deferred
+        subparsers, and resolve the parsers for all args of all commands. Processes forked from this one afterward then
+        share this state rather than each computing it on first use."""
+        self.finalize_definition()
+        self.add_deferred_arguments(recursive=True)
+        for _, cmd in self.all_subcommands():
+            cmd.warm()
+
+    def finalize_definition(self):
+        """Perform any setup that can only happen once all commands are defined; this is called automatically at
+        parse time"""
+        with _definition_lock:
+            self.add_builtin_commands()
+            if self._deferred_source_refs:
+                self._resolve_deferred_source_refs()
+            elif (
+                self._pickle_dump_path is not None
+                and self._definition_cache_current is False
+            ):
+                # function-style definitions are only known to be complete at this point
+                self.dump_definition_cache(self._definition_cache_module)
 
     def expand_default_path(self, path):
         path = os.path.expanduser(path)
@@ -1076,6 +2336,18 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
             return os.path.abspath(path)
 
     def validate_namespace(self, ns):
+        if getattr(ns, SERVE_SOCKET_ATTR, None) is not None:
+            if self.get_subcommand(ns) is not None:
+                self.error(
+                    "A subcommand can't be passed along with {}".format(SERVE_FLAG)
+                )
+            return ns
+        if getattr(ns, BATCH_FILE_ATTR, None) is not None:
+            if self.get_subcommand(ns) is not None:
+                self.error(
+                    "A subcommand can't be passed along with a batch file; put it in the batch file"
+                )
+            return ns
         if self.require_subcommand and self.get_subcommand(ns) is None:
             self.error(
                 "A subcommand is required: one of {}".format(
@@ -1105,14 +2377,19 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
 
         return cmd_path, cmd
 
-    def get_app_logger(self, ns):
+    def execute_flag(self, ns) -> bool:
+        """Whether file-system-altering actions may be carried out for the command parsed into `ns`"""
+        return not self.use_execution_flag or getattr(ns, EXECUTE_ATTR, False)
+
+    def get_app_logger(self, ns, use_multiprocessing: Opt[bool] = None):
+        if use_multiprocessing is None:
+            use_multiprocessing = self.use_multiprocessing
         verbosity = getattr(ns, VERBOSITY_ATTR, MIN_VERBOSITY)
         quiet = getattr(ns, QUIET_ATTR, False)
-        log_level_ix = min(verbosity, len(LOG_LEVEL_NAMES) - 1)
-        log_level = LOG_LEVEL_NAMES[log_level_ix]
+        log_level = _verbosity_log_level(verbosity)
 
         logpath = None
-        if self.use_logfile and EXECUTE:
+        if self.use_logfile and self.execute_flag(ns):
             logpath = getattr(ns, LOGFILE_ATTR, None)
             if logpath is not None:
                 logpath = os.path.abspath(logpath)
@@ -1123,7 +2400,7 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
             log_level=log_level,
             logfile=logpath,
             quiet=quiet,
-            use_multiprocessing=self.use_multiprocessing,
+            use_multiprocessing=use_multiprocessing,
         )
 
         rootlogger = getLogger()
@@ -1149,20 +2426,45 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
         quiet: bool = False,
         use_multiprocessing: bool = False,
     ):
+        global _logging_configuration
         log_level_int = validate_log_level_int(log_level)
+        verbose_format = log_level_int < INFO
+        key = (logfile, quiet, use_multiprocessing, self.dated_logfiles, verbose_format)
+        root = getLogger()
+
+        # logging config is global; concurrent runs apply it one at a time
+        with _logging_lock:
+            if _logging_configuration == (key, root.handlers):
+                # only the level can have changed; rather than tearing down and recreating the handlers (and the
+                # threads and queues of multiprocessing handlers) on every run, lower the shared levels as needed and
+                # leave the rest to the invocation level filter, since concurrent runs may be at other levels
+                for handler in root.handlers:
+                    handler.setLevel(min(handler.level, log_level_int))
+                root.setLevel(min(root.level, log_level_int))
+                self.logger.setLevel(
+                    min(self.logger.getEffectiveLevel(), log_level_int)
+                )
+            else:
+                configure_default_logging(
+                    console=not quiet,
+                    filename=logfile,
+                    file_level=log_level,
+                    console_level=log_level,
+                    verbose_format=verbose_format,
+                    dated_logfiles=self.dated_logfiles,
+                    multiprocessing=use_multiprocessing,
+                    disable_existing_loggers=True,
+                )
+                for handler in root.handlers:
+                    handler.addFilter(_invocation_level_filter)
+                _logging_configuration = (key, list(root.handlers))
+                self.logger.setLevel(log_level_int)
 
-        configure_default_logging(
-            console=not quiet,
-            filename=logfile,
-            file_level=log_level,
-            console_level=log_level,
-            verbose_format=(log_level_int < INFO),
-            dated_logfiles=self.dated_logfiles,
-            multiprocessing=use_multiprocessing,
-            disable_existing_loggers=True,
-        )
+            _invocation_level_filter.level = log_level_int
 
-        self.logger.setLevel(log_level_int)
+            # loggers created since the last full configuration are disabled as dictConfig would have done, but not
+            # this CLI's own loggers, which would otherwise go silent on every run after the first
+            _disable_existing_loggers(keep=(self.logger.name, self.cmd_name))
 
     def parse_config(self, ns, logger=None):
         if logger is None:
@@ -1224,6 +2526,9 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
         from_method=False,
         metavars=None,
         tvar_map=None,
+        cache_results=None,
+        background_output=None,
+        arg_files=None,
         _main=False,
         _builtin=False,
     ):
@@ -1241,7 +2546,17 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
             exit_codes=exit_codes,
             config_subsections=config_subsections,
             tvar_map=tvar_map,
+            cache_results=cache_results,
+            background_output=background_output,
         ):
+            if _definition_passthrough.get():
+                return f
+
+            if not _builtin:
+                cached = self._cached_subcommand(f)
+                if cached is not None:
+                    return cached
+
             # args provided here override those specified with decorators on the function, which override this
             # command line interface's global defaults
             if output_handler is None:
@@ -1281,11 +2596,32 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
             if command_prefix is None:
                 command_prefix = cli_attrs.command_prefix(f)
 
+            if cache_results is None:
+                cache_results = cli_attrs.cache_results(f, None)
+            if _builtin or cache_results is False:
+                result_cache = None
+            elif isinstance(cache_results, ResultCache):
+                result_cache = self._resolve_result_cache(cache_results)
+            elif cache_results:
+                result_cache = self._resolve_result_cache(
+                    ResultCache(None if cache_results is True else cache_results)
+                )
+            else:
+                result_cache = self.result_cache
+
+            if background_output is None:
+                background_output = cli_attrs.background_output(f, None)
+            if background_output is None:
+                background_output = self.background_output
+            else:
+                background_output = _queue_size(background_output)
+
             sig_spec = CLISignatureSpec(
                 ignore_on_cmd_line=ignore_on_cmd_line,
                 ignore_in_config=ignore_in_config,
                 parse_config_as_cli=parse_config_as_cli,
                 typecheck=typecheck,
+                arg_files=arg_files,
                 metavars=metavars,
                 named_groups=named_groups,
                 parse_env=parse_env,
@@ -1293,23 +2629,29 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
                 require_options=require_options,
             ).overriding(CLISignatureSpec.from_callable(f), self.default_signature_spec)
 
-            subcmd = SubCommandFunc(
-                f,
-                name=name,
-                signature_spec=sig_spec,
-                output_signature_spec=output_sig_spec,
-                command_prefix=command_prefix,
-                config_subsections=config_subsections,
-                output_handler=output_handler,
-                exit_codes=exit_codes,
-                implicit_flags=implicit_flags,
-                lookup_order=self.lookup_order,
-                argparser_cmd_name=self.cmd_name,
-                from_method=from_method,
-                tvar_map=tvar_map,
-                suppress_setup_warnings=self.suppress_setup_warnings,
-                _main=_main,
-            )
+            with profile_phase("SubCommandFunc construction"):
+                subcmd = SubCommandFunc(
+                    f,
+                    name=name,
+                    signature_spec=sig_spec,
+                    output_signature_spec=output_sig_spec,
+                    command_prefix=command_prefix,
+                    config_subsections=config_subsections,
+                    output_handler=output_handler,
+                    exit_codes=exit_codes,
+                    implicit_flags=implicit_flags,
+                    lookup_order=self.lookup_order,
+                    argparser_cmd_name=self.cmd_name,
+                    from_method=from_method,
+                    tvar_map=tvar_map,
+                    suppress_setup_warnings=self.suppress_setup_warnings,
+                    result_cache=result_cache,
+                    background_output=background_output,
+                    _main=_main,
+                )
+
+            if result_cache is not None:
+                self._add_no_cache_flag()
 
             if (
                 self.reserved_command_names
@@ -1343,6 +2685,8 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
         from_method=False,
         metavars=None,
         tvar_map=None,
+        cache_results=None,
+        arg_files=None,
     ):
         return self.subcommand(
             config_subsections=config_subsections,
@@ -1352,6 +2696,7 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
             ignore_in_config=ignore_in_config,
             parse_config_as_cli=parse_config_as_cli,
             typecheck=typecheck,
+            arg_files=arg_files,
             output_handler=output_handler,
             exit_codes=exit_codes,
             named_groups=named_groups,
@@ -1360,12 +2705,19 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
             name=name,
             from_method=from_method,
             tvar_map=tvar_map,
+            cache_results=cache_results,
             _main=True,
         )
 
     def definition(self, app_cls: type):
         """class decorator for generating subcommands via a class.
         This should only be called once per instance."""
+        if _definition_passthrough.get():
+            return app_cls
+        with profile_phase("definition"):
+            return self._definition(app_cls)
+
+    def _definition(self, app_cls: type):
         if not isinstance(app_cls, _type):
             t = type(self)
             raise TypeError(
@@ -1375,6 +2727,18 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
             )
 
         app_cls_ = get_generic_origin(app_cls)
+
+        if (
+            self._pickle_load_path is not None
+            and self._definition_cache_current is None
+        ):
+            # the class isn't bound in its module yet since we're decorating it
+            known = {app_cls_.__qualname__: app_cls_}
+            if self.load_definition_cache(app_cls_.__module__, known=known):
+                if self._bash_completion:
+                    self.install_shell_completion()
+                return app_cls
+
         self.app_cls = app_cls_
 
         if getattr(app_cls_, "__doc__", None):
@@ -1420,6 +2784,9 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
 
         self.add_builtin_commands()
 
+        if self._pickle_dump_path is not None:
+            self.dump_definition_cache(app_cls_.__module__)
+
         if self._bash_completion:
             self.install_shell_completion()
 
@@ -1428,10 +2795,24 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
     def add_arguments_from(self, subcmd_func: "SubCommandFunc") -> ArgumentParser:
         cmd_path = (*subcmd_func.cmd_prefix, subcmd_func.cmd_name)
 
+        plugin = None
         if not subcmd_func._main:
             subparsers = self.get_nested_subparser(*subcmd_func.cmd_prefix).subparsers
             docs = subcmd_func.docs
-            if docs is None:
+            if self._plugin_commands:
+                plugin = self._plugin_commands.pop(cmd_path, None)
+            if plugin is not None:
+                # the parser created by add_plugin_command; it's in use now, so its arguments are added right away
+                parser = plugin.parser
+                parser._deferred_arguments_from = None
+                if docs is not None:
+                    help_kw = _help_kwargs_from_docs(
+                        docs, long_desc_as_epilog=self.long_desc_as_epilog
+                    )
+                    for name in ("description", "epilog"):
+                        if getattr(parser, name) is None:
+                            setattr(parser, name, help_kw.get(name))
+            elif docs is None:
                 parser = subparsers.add_parser(subcmd_func.cmd_name)
             else:
                 help_kw = _help_kwargs_from_docs(
@@ -1450,7 +2831,10 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
 
             self._main = subcmd_func
 
-        subcmd_func.add_arguments_to(parser)
+        if self.lazy_subparsers and parser is not self and plugin is None:
+            parser.defer_arguments_from(subcmd_func)
+        else:
+            subcmd_func.add_arguments_to(parser)
         return parser
 
     #######################
@@ -1503,6 +2887,179 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
         self._last_edit_time = time
         return time
 
+    ####################
+    # Definition cache #
+    ####################
+
+    def _definition_cache_meta(self, module: str):
+        last_edit_time = self.last_edit_time()
+        if last_edit_time is None:
+            return None
+        return definition_cache_meta(module, self.source_files(), last_edit_time)
+
+    def load_definition_cache(self, module: str, known: Opt[Mapping] = None) -> bool:
+        """Replace the state of this CLI with that pickled at the definition cache path, if the cache is current with
+        respect to the source files. Return True when the cache was loaded."""
+        self._definition_cache_current = False
+        self._definition_cache_module = module
+        path = self._pickle_load_path
+        meta = self._definition_cache_meta(module)
+        if meta is None:
+            setup_warn(
+                "no source files could be found for CLI {}; definition caching is disabled".format(
+                    self.cmd_name
+                )
+            )
+            self._pickle_dump_path = None
+            return False
+
+        try:
+            state = load_definition_cache(path, self, meta, known=known)
+        except (FileNotFoundError, StaleDefinitionCache) as e:
+            self.logger.debug("not loading CLI definition from cache: %s", e)
+            return False
+        except Exception as e:
+            setup_warn(
+                "failed to load CLI definition cache from {}; the CLI will be defined from source: {}: {}".format(
+                    path, type(e).__name__, e
+                )
+            )
+            return False
+
+        self.__setstate__(state)
+        self._definition_cache_current = True
+        self._deferred_source_refs = {}
+        for _, subcmd in self.all_subcommands():
+            for attr in ("func", "output_handler"):
+                ref = getattr(subcmd, attr)
+                if isinstance(ref, DeferredSourceRef):
+                    self._deferred_source_refs[subcmd, attr] = ref
+
+        self.logger.debug("loaded CLI definition from cache at %s", path)
+        return True
+
+    def dump_definition_cache(self, module: str):
+        path = self._pickle_dump_path
+        meta = self._definition_cache_meta(module)
+        if meta is None:
+            return
+
+        state = self.__getstate__()
+        for attr in self._unsafe_pickle_attrs:
+            state.pop(attr, None)
+
+        try:
+            dump_definition_cache(path, self, state, meta)
+        except Exception as e:
+            setup_warn(
+                "failed to write CLI definition cache to {}: {}: {}".format(
+                    path, type(e).__name__, e
+                )
+            )
+        else:
+            self.logger.debug("wrote CLI definition cache to %s", path)
+
+        self._definition_cache_current = True
+
+    def _cached_subcommand(self, f) -> Opt["SubCommandFunc"]:
+        if self._pickle_load_path is None:
+            return None
+        if self._definition_cache_current is None:
+            # first function-style definition; the whole interface is loaded here if the cache is current
+            self.load_definition_cache(getattr(f, "__module__", None))
+        if not self._deferred_source_refs:
+            return None
+
+        qualname = getattr(f, "__qualname__", None)
+        for (subcmd, attr), ref in self._deferred_source_refs.items():
+            if attr == "func" and ref.qualname == qualname:
+                subcmd.func = f
+                del self._deferred_source_refs[subcmd, attr]
+                return subcmd
+
+        return None
+
+    def _resolve_deferred_source_refs(self):
+        for (subcmd, attr), ref in self._deferred_source_refs.items():
+            setattr(subcmd, attr, ref.resolve())
+        self._deferred_source_refs = {}
+
+    ##############
+    # Help cache #
+    ##############
+
+    def _help_cache_meta(self):
+        last_edit_time = self.last_edit_time()
+        if last_edit_time is None:
+            return None
+        return help_cache_meta(self.prog, self.source_files(), last_edit_time)
+
+    def _print_cached_help(self, args: Sequence[str]):
+        """If `args` is a bare help request and its help text is cached and current, print it and exit"""
+        cmd_path = help_request(args)
+        if cmd_path is None:
+            return
+        meta = self._help_cache_meta()
+        if meta is None:
+            return
+        try:
+            help_texts, _ = load_help_cache(self._help_cache_path, meta)
+        except (FileNotFoundError, StaleDefinitionCache) as e:
+            self.logger.debug("not using cached help: %s", e)
+            return
+
+        text = help_texts.get(str(terminal_width()), {}).get(
+            CMD_PATH_SEP.join(cmd_path)
+        )
+        if text is not None:
+            self._print_message(text, sys.stdout)
+            self.exit()
+
+    def dump_help_cache(self):
+        """Render the help text of every command at the current terminal width and write it to the help cache. Plugin
+        commands which haven't been imported yet are left out, rather than importing them all here."""
+        path = self._help_cache_path
+        meta = self._help_cache_meta()
+        if meta is None:
+            return
+        try:
+            help_texts, plugin_files = load_help_cache(path, meta)
+        except (FileNotFoundError, StaleDefinitionCache):
+            help_texts, plugin_files = {}, {}
+
+        pending = {plugin.parser for plugin in self._plugin_commands.values()}
+        help_texts[str(terminal_width())] = {
+            CMD_PATH_SEP.join(cmd_path): parser.format_help()
+            for cmd_path, parser in _all_parsers(self)
+            if parser not in pending
+        }
+        for cmd_path, source_file in self._plugin_source_files.items():
+            stamp = plugin_file_stamp(source_file)
+            if stamp is not None:
+                plugin_files[CMD_PATH_SEP.join(cmd_path)] = stamp
+        try:
+            dump_help_cache(path, meta, help_texts, plugin_files)
+        except Exception as e:
+            setup_warn(
+                "failed to write help cache to {}: {}: {}".format(
+                    path, type(e).__name__, e
+                )
+            )
+        else:
+            self.logger.debug("wrote help cache to %s", path)
+
+    ############
+    # Manifest #
+    ############
+
+    def manifest(self) -> Dict[str, Any]:
+        """A JSON-serializable description of this whole interface; see `application.cli.manifest`"""
+        return cli_manifest(self)
+
+    def dump_manifest(self, file: Union[str, Path, IO[str]]):
+        """Write the manifest of this interface as JSON to `file`, a path or text file; '-' is stdout"""
+        dump_manifest(self.manifest(), file)
+
     ####################
     # Shell completion #
     ####################
@@ -1564,7 +3121,7 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
                 continue
             if omit_commands is not None and name in omit_commands:
                 continue
-            if not subcommand.config_subsections:
+            if subcommand is None or not subcommand.config_subsections:
                 continue
 
             subsection = subcommand.config_subsections[0]
@@ -1695,9 +3252,279 @@ class CommandLineInterface(PicklableArgumentParser, Logged):
             raise e
 
 
+# batch worker processes
+
+_batch_worker_cli = None
+_batch_worker_logger = None
+_batch_worker_run_kw = None
+
+
+def _all_parsers(
+    parser: ArgumentParser, prefix: Tuple[str, ...] = ()
+) -> Iterator[Tuple[Tuple[str, ...], ArgumentParser]]:
+    yield prefix, parser
+    if isinstance(parser, PicklableArgumentParser) and parser.has_subparsers:
+        for name, subparser in parser._subparsers_action.choices.items():
+            yield from _all_parsers(subparser, (*prefix, name))
+
+
+def _constructed_in_main() -> bool:
+    """Whether the code calling into this module, e.g. the CommandLineInterface constructor, is in the __main__ module"""
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals.get("__name__") == __name__:
+        frame = frame.f_back
+    return frame is not None and frame.f_globals.get("__name__") == "__main__"
+
+
+def _queue_size(background_output: Union[bool, int, None]) -> Opt[int]:
+    if background_output is True:
+        return DEFAULT_QUEUE_SIZE
+    return int(background_output) if background_output else None
+
+
+def _run_awaitable(awaitable):
+    """Run `awaitable` to completion on a new event loop, for use outside of any running loop"""
+    import asyncio
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        if hasattr(awaitable, "close"):
+            # a coroutine; don't warn that it was never awaited
+            awaitable.close()
+        raise RuntimeError(
+            "can't run an async command from inside a running event loop with CommandLineInterface.run(); "
+            "await CommandLineInterface.arun() instead"
+        )
+
+    async def await_():
+        return await awaitable
+
+    return asyncio.run(await_())
+
+
+def _exit_code_and_error(e: BaseException) -> Tuple[int, Opt[BaseException]]:
+    """Exit code and underlying error for an exception raised while running one command line of a batch"""
+    if isinstance(e, SystemExit):
+        # errors in the command itself are handled by CLIErrorHandlingContext, which exits with a code
+        # determined by the exception, after printing it
+        if e.code is None or isinstance(e.code, int):
+            exit_code = e.code or 0
+        else:
+            exit_code = 1
+        return exit_code, (e.__context__ if exit_code else None)
+    return 1, e
+
+
+def _init_batch_worker(
+    cli: CommandLineInterface, app_logger: Logger, run_kw: Mapping[str, Any]
+):
+    # the CLI is fully defined once per worker here and then used for many command lines
+    global _batch_worker_cli, _batch_worker_logger, _batch_worker_run_kw
+    cli.finalize_definition()
+    _batch_worker_cli = cli
+    _batch_worker_logger = app_logger
+    _batch_worker_run_kw = run_kw
+
+
+def _run_batch_item(indexed_args: Tuple[int, Union[str, Sequence[str]]]) -> bytes:
+    (item,) = _batch_worker_cli._iter_run_many_sequential(
+        [indexed_args], _batch_worker_logger, **_batch_worker_run_kw
+    )
+    # pickle here rather than in the pool so that one unpicklable result can't break the stream of results
+    try:
+        return pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        msg = "couldn't send the outcome of command line {} back from its worker process: {}; original error: {}"
+        item = item._replace(
+            result=None,
+            error=RuntimeError(msg.format(item.args, repr(e), repr(item.error))),
+        )
+        return pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class _ArgBinding(NamedTuple):
+    name: str
+    kind: _ParameterKind
+    typed_io: TypedIO
+    parse_config_as_cli: bool
+    typecheck: bool
+    arg_files: bool
+    # source -> parser, filled in on first use of each source; not all parsers are defined for all types
+    parsers: Dict[ArgSource, Callable]
+
+    def parser(self, source: ArgSource) -> Callable:
+        parsers = self.parsers
+        parser = parsers.get(source)
+        if parser is None:
+            with profile_phase("TypedIO dispatch resolution"):
+                if source == ArgSource.CONFIG and self.parse_config_as_cli:
+                    parser = self.typed_io.parser_for_source(ArgSource.CLI)
+                else:
+                    parser = self.typed_io.parser_for_source(source)
+            parsers[source] = parser
+        return parser
+
+    def reads_arg_files(self, source: ArgSource, value) -> bool:
+        """Whether '@path' references in `value` are expanded to the values in the files"""
+        return (
+            self.arg_files
+            and source == ArgSource.CLI
+            and isinstance(value, (list, tuple))
+        )
+
+
+class _ArgBindingPlan(NamedTuple):
+    """Everything needed to look up, parse, and bind the args of a signature, computed once per signature so that
+    repeated executions of a command reduce to a tight loop"""
+
+    bindings: Tuple[_ArgBinding, ...]
+    names: Tuple[str, ...]
+    positional_names: Tuple[str, ...]
+    positional_defaults: Tuple[Any, ...]
+    kwargs_name: Opt[str]
+    signature: Signature
+
+    @classmethod
+    def compile(
+        cls,
+        sig: Signature,
+        spec: FinalCLISignatureSpec,
+        typed_io: Mapping[str, TypedIO],
+    ) -> "_ArgBindingPlan":
+        params = sig.parameters
+        parsed = spec.parsed
+        bindings = tuple(
+            _ArgBinding(
+                name=name,
+                kind=params[name].kind,
+                typed_io=typed_io[name],
+                parse_config_as_cli=name in spec.parse_config_as_cli,
+                typecheck=name in spec.typecheck
+                and params[name].annotation is not Parameter.empty,
+                arg_files=name in spec.arg_files,
+                parsers={},
+            )
+            for name in spec.parse_order
+            if name in parsed
+        )
+        kwargs_name = next(
+            (b.name for b in bindings if b.kind == Parameter.VAR_KEYWORD), None
+        )
+        positional_names = tuple(spec.positional_names)
+        return cls(
+            bindings=bindings,
+            names=tuple(b.name for b in bindings),
+            positional_names=positional_names,
+            positional_defaults=tuple(params[n].default for n in positional_names),
+            kwargs_name=kwargs_name,
+            signature=sig,
+        )
+
+    def lookup(
+        self, sources: List[Tuple[ArgSource, Mapping]]
+    ) -> Tuple[List[Tuple[_ArgBinding, ArgSource, object]], List[str]]:
+        values, missing_ = [], []
+        for binding in self.bindings:
+            name = binding.name
+            for source, ns in sources:
+                if name in ns:
+                    values.append((binding, source, ns[name]))
+                    break
+            else:
+                missing_.append(name)
+
+        return values, missing_
+
+    def warm(self, sources: Iterable[ArgSource]):
+        for binding in self.bindings:
+            for source in sources:
+                try:
+                    binding.parser(source)
+                except Exception:
+                    # not all parsers are defined for all types; these fail again at execution time if needed
+                    pass
+
+    def bind(self, values: List[Tuple[_ArgBinding, ArgSource, object]], logger):
+        # per-arg decoding times, recorded under the enclosing phase
+        metrics = current_metrics()
+        final_args = ()
+        final_kw = {}
+        final_kwargs = None
+
+        for binding, source, value in values:
+            name = binding.name
+            logger.debug(
+                "parsing arg %r from %s with value %r", name, source.value, value
+            )
+            if binding.reads_arg_files(source, value):
+                value = expand_arg_files(value)
+            if metrics is None:
+                parsed = binding.parser(source)(value)
+            else:
+                tic = perf_counter()
+                parsed = binding.parser(source)(value)
+                metrics.add(name, perf_counter() - tic)
+            logger.debug(
+                "parsed value %r for arg %r from %s", parsed, name, source.value
+            )
+
+            if binding.typecheck and not isinstance_generic(
+                parsed, binding.typed_io.type_
+            ):
+                try:
+                    raise TypeError(
+                        "parsed value {} for arg {} is not an instance of {}".format(
+                            repr(parsed),
+                            repr(name),
+                            self.signature.parameters[name].annotation,
+                        )
+                    )
+                except Exception as e:
+                    logger.error(str(e))
+                    raise e
+
+            kind = binding.kind
+            if kind == Parameter.VAR_POSITIONAL:
+                # only use *args for the args to start, then extend named positionals with these below
+                final_args = parsed
+            elif kind == Parameter.VAR_KEYWORD:
+                final_kwargs = parsed
+            else:
+                final_kw[name] = parsed
+
+        if final_kwargs:
+            overlap = tuple(k for k in final_kwargs if k in final_kw)
+            if overlap:
+                raise RepeatedCLIKeywordArgs(overlap, self.kwargs_name)
+
+        if self.positional_names:
+            final_args = (
+                *(
+                    final_kw.pop(n, default)
+                    for n, default in zip(
+                        self.positional_names, self.positional_defaults
+                    )
+                ),
+                *final_args,
+            )
+
+        if final_kwargs:
+            final_kw.update(final_kwargs)
+
+        logger.debug("Parsed all values successfully for signature %s", self.signature)
+        return final_args, final_kw
+
+
 class SubCommandFunc(Logged):
     __log_level__ = DEBUG
     parser = None
+    result_cache = None
+    is_async = False
+    streaming_output = False
+    background_output = None
 
     def __init__(
         self,
@@ -1716,6 +3543,8 @@ class SubCommandFunc(Logged):
         suppress_setup_warnings=False,
         tvar_map=None,
         from_method=False,
+        result_cache: Opt[ResultCache] = None,
+        background_output: Opt[int] = None,
         _main=False,
     ):
         if name is None:
@@ -1761,10 +3590,12 @@ class SubCommandFunc(Logged):
         warn_missing = None if suppress_setup_warnings else setup_warn
         final_spec = signature_spec.configure(main_sig, warn_missing=warn_missing)
 
+        streaming_output = is_streaming_output_handler(output_handler)
         if output_handler is not None:
-            # from_method = True because we skip the first arg
+            # from_method = True because we skip the first arg, except for streaming handlers, which are constructed
+            # from the parsed args and then passed the items of the return value
             output_sig = fully_concrete_signature(
-                output_handler, from_method=True, tvar_map=tvar_map
+                output_handler, from_method=not streaming_output, tvar_map=tvar_map
             )
             if output_signature_spec is None:
 
@@ -1796,7 +3627,11 @@ class SubCommandFunc(Logged):
                 )
 
             try:
-                output_docs = parse_docstring(output_handler)
+                output_docs = parse_docstring(
+                    most_specific_constructor(output_handler)
+                    if streaming_output
+                    else output_handler
+                )
             except AttributeError:
                 output_docs = None
             else:
@@ -1859,6 +3694,16 @@ class SubCommandFunc(Logged):
         self.output_handler = output_handler
         self.exit_codes = exit_codes
         self.from_method = bool(from_method)
+        self.result_cache = result_cache
+        self.streaming_output = streaming_output
+        # max number of batches of output items queued for a background writer thread, or None to write in this
+        # thread; other output handlers may not consume the items one at a time, so they get the return value as it is
+        self.background_output = background_output if streaming_output else None
+        self.is_async = (
+            iscoroutinefunction(func)
+            or isasyncgenfunction(func)
+            or (output_handler is not None and iscoroutinefunction(output_handler))
+        )
 
         # options
         self.implicit_flags = bool(implicit_flags)
@@ -1902,6 +3747,7 @@ class SubCommandFunc(Logged):
                 for name, param in all_parsed_params()
             ]
         )
+        self._compile_binding_plans()
 
         if config_subsections in (False, None):
             self.config_subsections = None
@@ -1968,6 +3814,10 @@ class SubCommandFunc(Logged):
         )
 
     def add_arguments_to(self, parser: ArgumentParser):
+        with profile_phase("argparse argument construction"):
+            self._add_arguments_to(parser)
+
+    def _add_arguments_to(self, parser: ArgumentParser):
         named_groups = {
             name: parser.add_argument_group(name) for name in self.named_groups
         }
@@ -2059,22 +3909,225 @@ class SubCommandFunc(Logged):
             if env_name in os.environ
         }
 
-    def execute(self, namespace, config, instance=None, handle_output=True):
-        args, kwargs, output_args, output_kwargs = self.prepare_args_kwargs(
-            namespace, config, handle_output=handle_output
+    def execute(
+        self,
+        namespace,
+        config,
+        instance=None,
+        handle_output=True,
+        use_result_cache=True,
+        result_cache_context: Opt[str] = None,
+    ):
+        """Decode args for the function from the parsed command line, config, and environment, call it, and pass the
+        result to the output handler if `handle_output` is True. Coroutine functions and async output handlers are run
+        to completion on a new event loop; use `aexecute` to run them in an already running loop.
+
+        :param use_result_cache: when False, ignore `result_cache` for this execution
+        :param result_cache_context: key of the instance a method is called on; see `execute_keyed`. Results of
+            methods are only cached when this is passed.
+        """
+        if self.is_async:
+            return _run_awaitable(
+                self.aexecute(
+                    namespace,
+                    config,
+                    instance,
+                    handle_output=handle_output,
+                    use_result_cache=use_result_cache,
+                    result_cache_context=result_cache_context,
+                )
+            )
+
+        args, kwargs, output_args, output_kwargs, key = self._prepare_execution(
+            namespace, config, handle_output, use_result_cache, result_cache_context
+        )
+        with profile_phase("command execution"):
+            hit, value = self._cached_result(key)
+            if not hit:
+                value = self._call(instance, args, kwargs)
+                if isawaitable(value):
+                    # e.g. a plain function wrapping a coroutine function
+                    value = _run_awaitable(value)
+                self._cache_result(key, value)
+
+        if handle_output and self.output_handler is not None:
+            with profile_phase("output handling"):
+                if self.background_output and isinstance(value, Iterator):
+                    write_in_background(
+                        value,
+                        self.output_handler,
+                        output_args,
+                        output_kwargs,
+                        queue_size=self.background_output,
+                    )
+                elif self.streaming_output:
+                    handler = self.output_handler(*output_args, **output_kwargs)
+                    stream_output(value, handler)
+                else:
+                    output = self.output_handler(value, *output_args, **output_kwargs)
+                    if isawaitable(output):
+                        _run_awaitable(output)
+
+        return value
+
+    async def aexecute(
+        self,
+        namespace,
+        config,
+        instance=None,
+        handle_output=True,
+        use_result_cache=True,
+        result_cache_context: Opt[str] = None,
+    ):
+        """Like `execute`, but awaitable; the function's result and the output handler's result are awaited in the
+        running event loop when they are awaitable. An async generator returned when there is no output handler to
+        consume it is collected into a list."""
+        args, kwargs, output_args, output_kwargs, key = self._prepare_execution(
+            namespace, config, handle_output, use_result_cache, result_cache_context
         )
+        with profile_phase("command execution"):
+            hit, value = self._cached_result(key)
+            if not hit:
+                value = self._call(instance, args, kwargs)
+                if isawaitable(value):
+                    value = await value
+                elif isasyncgen(value) and not (
+                    handle_output and self.output_handler is not None
+                ):
+                    # nothing else would iterate it, so its body would never run
+                    value = [item async for item in value]
+                self._cache_result(key, value)
+
+        if handle_output and self.output_handler is not None:
+            with profile_phase("output handling"):
+                if self.background_output and isinstance(value, Iterator):
+                    import asyncio
+                    import contextvars
+
+                    # producing and writing the items both block, so they happen off the event loop, as with
+                    # asyncio.to_thread, with the current context kept for metrics and the invocation context
+                    write = partial(
+                        write_in_background,
+                        value,
+                        self.output_handler,
+                        output_args,
+                        output_kwargs,
+                        queue_size=self.background_output,
+                    )
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, contextvars.copy_context().run, write
+                    )
+                elif self.streaming_output:
+                    handler = self.output_handler(*output_args, **output_kwargs)
+                    await astream_output(value, handler)
+                else:
+                    output = self.output_handler(value, *output_args, **output_kwargs)
+                    if isawaitable(output):
+                        await output
 
+        return value
+
+    def _prepare_execution(
+        self,
+        namespace,
+        config,
+        handle_output: bool,
+        use_result_cache: bool,
+        result_cache_context: Opt[str],
+    ):
+        with profile_phase("argument decoding"):
+            args, kwargs, output_args, output_kwargs = self.prepare_args_kwargs(
+                namespace, config, handle_output=handle_output
+            )
+
+        key = None
+        if use_result_cache and self.result_cache is not None:
+            if not self.from_method or result_cache_context is not None:
+                key = self._result_cache_key(args, kwargs, result_cache_context)
+
+        return args, kwargs, output_args, output_kwargs, key
+
+    def _call(self, instance, args, kwargs):
         if self.from_method:
             # method
-            value = self.func(instance, *args, **kwargs)
-        else:
-            # bare function
+            return self.func(instance, *args, **kwargs)
+        # bare function
+        return self.func(*args, **kwargs)
+
+    def _cached_result(self, key: Opt[str]) -> Tuple[bool, Any]:
+        if key is None:
+            return False, None
+        hit, value = self.result_cache.get(key)
+        if hit:
+            self.logger.info(
+                "using cached result for command %r from %s",
+                self.func_name,
+                self.result_cache.path(key),
+            )
+        return hit, value
+
+    def _cache_result(self, key: Opt[str], value):
+        if key is not None and not self.result_cache.put(key, value):
+            self.logger.warning(
+                "result of command %r of type %s can't be pickled and was not cached",
+                self.func_name,
+                type(value),
+            )
+
+    def execute_keyed(self, namespace, config) -> Tuple[Any, Opt[str]]:
+        """Like `execute` with no output handling, but also return a result cache key for the decoded args and the
+        source of the function, or None if the args have no canonical encoding. This is used to construct the instance
+        for methods of an interface defined from a class, since their results depend on it."""
+        with profile_phase("argument decoding"):
+            args, kwargs, _, _ = self.prepare_args_kwargs(
+                namespace, config, handle_output=False
+            )
+        key = self._result_cache_key(args, kwargs)
+        with profile_phase("command execution"):
             value = self.func(*args, **kwargs)
+        return value, key
 
-        if handle_output and self.output_handler is not None:
-            _ = self.output_handler(value, *output_args, **output_kwargs)
+    def _result_cache_key(self, args, kwargs, context: Opt[str] = None) -> Opt[str]:
+        typed_io = self.typed_io
+        try:
+            arguments = self.main_signature.bind(*args, **kwargs).arguments
+            encoded = {}
+            files = []
+            for name, value in arguments.items():
+                reason = uncacheable_reason(value)
+                if reason is not None:
+                    raise UncacheableArgs(name, value, reason)
+                try:
+                    encoded[name] = typed_io[name].config_encoder(value)
+                except Exception as e:
+                    raise UncacheableArgs(name, value, e)
+                files.extend(filter(None, map(file_stamp, arg_leaves(value))))
+            return result_key(
+                code_fingerprint(self.func), encoded, files, context=context
+            )
+        except (UncacheableArgs, TypeError) as e:
+            self.logger.warning(
+                "not caching the result of command %r: %s", self.func_name, e
+            )
+            return None
 
-        return value
+    def warm(self):
+        """Resolve the parsers for all args from all sources in the lookup order, so that they're ready before the
+        first execution"""
+        for plan in (self.main_binding_plan, self.output_binding_plan):
+            if plan is not None:
+                plan.warm(self.lookup_order)
+
+    def _compile_binding_plans(self):
+        self.main_binding_plan = _ArgBindingPlan.compile(
+            self.main_signature, self.main_signature_spec, self.typed_io
+        )
+        if self.output_signature is None:
+            self.output_binding_plan = None
+        else:
+            self.output_binding_plan = _ArgBindingPlan.compile(
+                self.output_signature, self.output_signature_spec, self.typed_io
+            )
 
     def prepare_args_kwargs(self, argparse_namespace, config=None, handle_output=True):
         conf = self.get_conf(config)
@@ -2098,26 +4151,25 @@ class SubCommandFunc(Logged):
             if ns:
                 sources.append((source, ns))
 
-        namespace = NamedChainMap(*sources)
+        handle_output = handle_output and self.output_handler is not None
+        output_plan = self.output_binding_plan if handle_output else None
+        main_plan = self.main_binding_plan
+
         self.logger.debug(
             "parsing args for command %r from sources %r in order %r",
             self.func_name,
-            namespace.names,
-            self.parse_order,
+            tuple(source for source, _ in sources),
+            main_plan.names
+            if output_plan is None
+            else output_plan.names + main_plan.names,
         )
 
-        handle_output = handle_output and self.output_handler is not None
-
-        # prepare the raw values to be parsed
-        if handle_output:
-            output_values, output_missing = self._prepare_raw_values(
-                namespace, self.output_signature_spec
-            )
+        # look up the raw values to be parsed
+        if output_plan is not None:
+            output_values, output_missing = output_plan.lookup(sources)
         else:
             output_values, output_missing = [], []
-        main_values, main_missing = self._prepare_raw_values(
-            namespace, self.main_signature_spec
-        )
+        main_values, main_missing = main_plan.lookup(sources)
 
         if output_missing or main_missing:
             missing_ = output_missing + main_missing
@@ -2131,102 +4183,23 @@ class SubCommandFunc(Logged):
 
         # We make the assumption that output handling args will generally be lighter to process than input args;
         # e.g. mainly file handles, credentials, flags. Thus we parse them first.
-        if handle_output:
-            output_args, output_kwargs = self._parse_raw_values(
-                output_values, self.output_signature_spec, self.output_signature
-            )
-        else:
-            output_args, output_kwargs = None, None
-        main_args, main_kwargs = self._parse_raw_values(
-            main_values, self.main_signature_spec, self.main_signature
-        )
-
-        return main_args, main_kwargs, output_args, output_kwargs
-
-    def _parse_raw_values(
-        self,
-        values: List[Tuple[str, ArgSource, object]],
-        spec: FinalCLISignatureSpec,
-        sig: Signature,
-    ):
-        final_args = ()
-        final_kw = {}
-        kwargs_name = None
-        final_kwargs = None
-        typed_io = self.typed_io
-        parse_config_as_cli = spec.parse_config_as_cli
-        typecheck = spec.typecheck
-        params = sig.parameters
-
-        for name, source, value in values:
-            self.logger.debug(
-                "parsing arg %r from %s with value %r", name, source.value, value
-            )
-            tio = typed_io[name]
-            param = params[name]
-
-            if source == ArgSource.CONFIG and name in parse_config_as_cli:
-                parser = tio.parser_for_source(ArgSource.CLI)
-            else:
-                parser = tio.parser_for_source(source)
-
-            parsed = parser(value)
-            self.logger.debug(
-                "parsed value %r for arg %r from %s", parsed, name, source.value
-            )
-
-            if name in typecheck and param.annotation is not Parameter.empty:
-                if not isinstance_generic(parsed, tio.type_):
-                    try:
-                        raise TypeError(
-                            "parsed value {} for arg {} is not an instance of {}".format(
-                                repr(parsed), repr(name), param.annotation
-                            )
-                        )
-                    except Exception as e:
-                        self.logger.error(str(e))
-                        raise e
-
-            kind = param.kind
-            if kind == Parameter.VAR_POSITIONAL:
-                # only use *args for the args to start, then extend named positionals with these below
-                final_args = parsed
-            elif kind == Parameter.VAR_KEYWORD:
-                final_kwargs = parsed
-            else:
-                final_kw[name] = parsed
-
-        if final_kwargs:
-            overlap = tuple(k for k in final_kwargs if k in final_kw)
-            if overlap:
-                raise RepeatedCLIKeywordArgs(overlap, kwargs_name)
-
-        if spec.positional_names:
-            final_args = (
-                *(final_kw.pop(n, params[n].default) for n in spec.positional_names),
-                *final_args,
-            )
-
-        if final_kwargs:
-            final_kw.update(final_kwargs)
-
-        self.logger.debug("Parsed all values successfully for signature %s", sig)
-        return final_args, final_kw
-
-    @staticmethod
-    def _prepare_raw_values(
-        namespace: NamedChainMap, spec: FinalCLISignatureSpec
-    ) -> Tuple[List[Tuple[str, ArgSource, object]], List[str]]:
-        sentinel = object()
-        values, missing_ = [], []
-        for name in filter(spec.parsed.__contains__, spec.parse_order):
-            source, value = namespace.get_with_name(name, sentinel)
-            if value is sentinel:
-                missing_.append(name)
+        try:
+            # '@path' references are checked before any values are consumed; stdin can back only one of them
+            stdin_read = False
+            for binding, source, value in chain(output_values, main_values):
+                if binding.reads_arg_files(source, value):
+                    stdin_read = check_arg_files(value, stdin_read) or stdin_read
+            if output_plan is not None:
+                output_args, output_kwargs = output_plan.bind(
+                    output_values, self.logger
+                )
             else:
-                values.append((name, source, value))
+                output_args, output_kwargs = None, None
+            main_args, main_kwargs = main_plan.bind(main_values, self.logger)
+        except ArgFileError as e:
+            self.parser.error(str(e))
 
-        return values, missing_
+        return main_args, main_kwargs, output_args, output_kwargs
 
     def empty_config(self, only_required_args=False, literal_defaults=False):
         conf = {}
@@ -2300,23 +4273,32 @@ class SubCommandFunc(Logged):
 
     def __getstate__(self):
         state = super().__getstate__()
+        # parsers memoized on the binding plans needn't be picklable; the plans are recompiled on load
+        state.pop("main_binding_plan", None)
+        state.pop("output_binding_plan", None)
         for key in ("cli_signature", "main_signature", "output_signature"):
             sig = state.pop(key)
-            state[key] = Signature(
-                [
+            if sig is not None:
+                # a bare tuple of params; Signature.__reduce__ would re-validate parameter order on load, which fails
+                # for combined CLI signatures
+                sig = tuple(
                     p.replace(annotation=deconstruct_generic(p.annotation))
                     for p in sig.parameters.values()
-                ]
-            )
+                )
+            state[key] = sig
         return state
 
     def __setstate__(self, state):
         for key in ("cli_signature", "main_signature", "output_signature"):
-            sig = state.pop(key)
-            state[key] = Signature(
-                [
-                    p.replace(annotation=reconstruct_generic(p.annotation))
-                    for p in sig.parameters.values()
-                ]
-            )
+            params = state.pop(key)
+            if params is not None:
+                params = Signature(
+                    [
+                        p.replace(annotation=reconstruct_generic(p.annotation))
+                        for p in params
+                    ],
+                    __validate_parameters__=False,
+                )
+            state[key] = params
         self.__dict__.update(state)
+        self._compile_binding_plans()
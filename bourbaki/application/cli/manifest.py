@@ -0,0 +1,289 @@
+# coding:utf-8
+"""Static JSON manifests of command line interfaces, for tooling which needs the structure of a CLI without importing
+the application that defines it (and all of that application's dependencies).
+
+A manifest records the full command tree: for every command its rendered help and usage, the option strings, nargs,
+metavars and shell completions of its arguments, and for every parameter its type, `cli_repr`, `config_repr`, env var
+and config subsection, along with the empty configuration used by `CommandLineInterface.init_config`.
+It is written from a fully defined CLI with `CommandLineInterface.dump_manifest`, or with the flag added by
+`CommandLineInterface(add_manifest_flag=True)`:
+
+    python my_app.py --manifest my_app.json
+
+and can then be consumed with the functions here, or from the command line:
+
+    python -m bourbaki.application.cli.manifest my_app.json help [COMMAND ...]
+    python -m bourbaki.application.cli.manifest my_app.json init-config [PATH] [--format yml]
+    python -m bourbaki.application.cli.manifest my_app.json install-completion [COMMAND_NAME ...]
+"""
+from typing import Any, Dict, IO, Iterator, Mapping, Optional as Opt, Set, Tuple, Union
+from argparse import SUPPRESS
+from pathlib import Path
+import json
+import sys
+
+from .. import __version__
+
+MANIFEST_VERSION = 1
+
+ManifestNode = Dict[str, Any]
+
+
+class ManifestVersionError(ValueError):
+    def __init__(self, path, version):
+        super().__init__(path, version)
+
+    def __str__(self):
+        return "manifest {} has version {}; only versions up to {} are supported".format(
+            *self.args, MANIFEST_VERSION
+        )
+
+
+############
+# creation #
+############
+
+
+def cli_manifest(cli) -> Dict[str, Any]:
+    """A JSON-serializable manifest of the fully defined `CommandLineInterface` `cli`"""
+    cli.finalize_definition()
+    commands = dict(cli.all_subcommands())
+    commands[()] = cli._main
+    return dict(
+        manifest_version=MANIFEST_VERSION,
+        bourbaki_application_version=__version__,
+        prog=cli.prog,
+        source_files=list(cli.source_files()),
+        root=_parser_node(cli, (), commands),
+    )
+
+
+def _parser_node(parser, cmd_path: Tuple[str, ...], commands: Mapping) -> ManifestNode:
+    from ..completion.completers import gather_args_options_subparsers
+
+    args, options, subparsers = gather_args_options_subparsers(parser)
+    cmd = commands.get(cmd_path)
+    return dict(
+        name=cmd_path[-1] if cmd_path else None,
+        path=list(cmd_path),
+        description=parser.description,
+        usage=parser.format_usage(),
+        help=parser.format_help(),
+        args=[_action(a, positional=True) for a in args],
+        options=[_action(a, positional=False) for a in options],
+        command=None if cmd is None else _command(cmd),
+        commands=[
+            _parser_node(subparser, (*cmd_path, name), commands)
+            for name, subparser in subparsers
+        ],
+    )
+
+
+def _action(action, positional: bool) -> Dict[str, Any]:
+    from ..completion.completers import completion_spec
+
+    return dict(
+        dest=action.dest,
+        option_strings=list(action.option_strings),
+        nargs=action.nargs,
+        required=action.required,
+        metavar=_jsonable(action.metavar),
+        help=None if action.help == SUPPRESS else action.help,
+        choices=None if action.choices is None else list(map(str, action.choices)),
+        completion=completion_spec(action, positional=positional),
+    )
+
+
+def _command(cmd) -> Dict[str, Any]:
+    from bourbaki.introspection.classes import parameterized_classpath
+
+    parse_cmd_line = cmd.parse_cmd_line
+    parse_config = cmd.parse_config
+    parse_env = cmd.parse_env or {}
+    params = []
+    for name, tio in cmd.typed_io.items():
+        cli, config = name in parse_cmd_line, name in parse_config
+        params.append(
+            dict(
+                name=name,
+                type=parameterized_classpath(tio.type_),
+                required=name not in cmd.defaults,
+                cli=cli,
+                config=config,
+                env=parse_env.get(name),
+                cli_nargs=_jsonable(tio.cli_nargs) if cli else None,
+                cli_repr=_jsonable(tio.cli_repr) if cli else None,
+                config_repr=_jsonable(tio.config_repr) if config else None,
+            )
+        )
+
+    if cmd.config_subsections:
+        subsections = [list(s) for s in cmd.config_subsections]
+        empty_config = _jsonable(cmd.empty_config(literal_defaults=True))
+        empty_config_required = _jsonable(
+            cmd.empty_config(only_required_args=True, literal_defaults=True)
+        )
+    else:
+        subsections = empty_config = empty_config_required = None
+
+    return dict(
+        func=cmd.func_name,
+        params=params,
+        config_subsections=subsections,
+        empty_config=empty_config,
+        empty_config_required=empty_config_required,
+    )
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, Mapping):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return list(map(_jsonable, value))
+    return str(value)
+
+
+def dump_manifest(manifest: Mapping[str, Any], file: Union[str, Path, IO[str]]):
+    """Write `manifest` as JSON to `file`, a path or text file; '-' is stdout"""
+    if isinstance(file, (str, Path)):
+        if str(file) == "-":
+            return dump_manifest(manifest, sys.stdout)
+        with open(str(file), "w") as f:
+            return dump_manifest(manifest, f)
+    json.dump(manifest, file, indent=2)
+    file.write("\n")
+
+
+###############
+# consumption #
+###############
+
+
+def load_manifest(file: Union[str, Path, IO[str]]) -> Dict[str, Any]:
+    """Load a manifest written by `dump_manifest`, raising `ManifestVersionError` if it's from a newer version"""
+    if isinstance(file, (str, Path)):
+        with open(str(file)) as f:
+            return load_manifest(f)
+    manifest = json.load(file)
+    version = manifest.get("manifest_version")
+    if not isinstance(version, int) or version > MANIFEST_VERSION:
+        raise ManifestVersionError(getattr(file, "name", file), version)
+    return manifest
+
+
+def manifest_nodes(node: ManifestNode) -> Iterator[ManifestNode]:
+    """`node` and all the nodes of its subcommands, depth-first"""
+    yield node
+    for child in node["commands"]:
+        yield from manifest_nodes(child)
+
+
+def manifest_node(manifest: Mapping[str, Any], *cmd_path: str) -> ManifestNode:
+    """The node for the command (or command prefix) at `cmd_path`, raising `KeyError` if there is none"""
+    node = manifest["root"]
+    for i, name in enumerate(cmd_path):
+        for child in node["commands"]:
+            if child["name"] == name:
+                node = child
+                break
+        else:
+            raise KeyError(" ".join(cmd_path[: i + 1]))
+    return node
+
+
+def manifest_help(manifest: Mapping[str, Any], *cmd_path: str) -> str:
+    """The help text for the command (or command prefix) at `cmd_path`, as printed by -h/--help"""
+    return manifest_node(manifest, *cmd_path)["help"]
+
+
+def manifest_empty_config(
+    manifest: Mapping[str, Any],
+    only_required_args: bool = False,
+    only_commands: Opt[Set[Tuple[str, ...]]] = None,
+    omit_commands: Opt[Set[Tuple[str, ...]]] = None,
+) -> Dict[str, Any]:
+    """The configuration written by `CommandLineInterface.init_config`, with literal defaults.
+
+    :param only_commands: only include configuration for commands with these paths or path prefixes (and the main
+        args)
+    :param omit_commands: omit configuration for commands with these paths or path prefixes
+    """
+    from .helpers import update_in
+
+    def matches(path, prefixes):
+        return any(path[: len(prefix)] == tuple(prefix) for prefix in prefixes)
+
+    config = {}
+    for node in manifest_nodes(manifest["root"]):
+        cmd = node["command"]
+        if cmd is None or not cmd["config_subsections"]:
+            continue
+        path = tuple(node["path"])
+        if path and only_commands is not None and not matches(path, only_commands):
+            continue
+        if omit_commands is not None and matches(path, omit_commands):
+            continue
+        key = "empty_config_required" if only_required_args else "empty_config"
+        update_in(config, tuple(cmd["config_subsections"][0]), cmd[key])
+    return config
+
+
+def install_manifest_completion(manifest: Mapping[str, Any], *commands: str):
+    """Install bash completions for the CLI described by `manifest` for the command names `commands` (by default the
+    manifest's prog), as `CommandLineInterface.install_shell_completion` does for a defined CLI"""
+    from ..completion.completers import install_shell_completion
+
+    install_shell_completion(manifest["root"], *(commands or (manifest["prog"],)))
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python -m {}".format(__spec__.name),
+        description="Consume a command line interface manifest without importing the application",
+    )
+    parser.add_argument("manifest", help="path to a JSON manifest")
+    subparsers = parser.add_subparsers(dest="action")
+    subparsers.required = True
+    help_parser = subparsers.add_parser("help", help="print the help for a command")
+    help_parser.add_argument("command", nargs="*")
+    config_parser = subparsers.add_parser(
+        "init-config", help="write an empty configuration"
+    )
+    config_parser.add_argument("path", nargs="?", default="-")
+    config_parser.add_argument(
+        "--format", help="config format, e.g. yml; inferred from the path if not given"
+    )
+    config_parser.add_argument("--only-required-args", action="store_true")
+    completion_parser = subparsers.add_parser(
+        "install-completion", help="install bash completions"
+    )
+    completion_parser.add_argument("commands", nargs="*", metavar="command_name")
+    args = parser.parse_args(argv)
+
+    manifest = load_manifest(args.manifest)
+    if args.action == "help":
+        try:
+            text = manifest_help(manifest, *args.command)
+        except KeyError as e:
+            parser.error("no command {} in manifest".format(e))
+        sys.stdout.write(text)
+    elif args.action == "init-config":
+        from ..config import dump_config
+
+        config = manifest_empty_config(
+            manifest, only_required_args=args.only_required_args
+        )
+        path = sys.stdout if args.path == "-" else args.path
+        if path is sys.stdout and args.format is None:
+            parser.error("--format is required when writing to stdout")
+        dump_config(config, path, ext=args.format)
+    else:
+        install_manifest_completion(manifest, *args.commands)
+
+
+if __name__ == "__main__":
+    main()
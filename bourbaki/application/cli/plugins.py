@@ -0,0 +1,104 @@
+# coding:utf-8
+# subcommands registered by path, help line and import target, whose defining modules are only imported when they're
+# invoked or their help is requested
+from typing import Any, Dict, Iterator, Optional as Opt, Sequence, Tuple, Union
+import os
+import sys
+
+from bourbaki.introspection.imports import import_object
+from ..typed_io.utils import to_cmd_line_name
+
+
+def plugin_command_path(cmd_path: Union[str, Sequence[str]]) -> Tuple[str, ...]:
+    if isinstance(cmd_path, str):
+        cmd_path = cmd_path.strip().split()
+    return tuple(map(to_cmd_line_name, cmd_path))
+
+
+def import_target(target: str):
+    """Import the object referenced by `target`, a 'module:qualname' reference as used for entry points, or a
+    '.'-separated path"""
+    module, sep, qualname = target.partition(":")
+    if not sep:
+        return import_object(target)
+    obj = import_object(module.strip())
+    for name in qualname.strip().split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+def entry_point_targets(group: str) -> Iterator[Tuple[str, str]]:
+    """(name, target) for each entry point in `group`, without importing any of them"""
+    from importlib.metadata import entry_points
+
+    eps = entry_points()
+    for ep in eps.select(group=group) if hasattr(eps, "select") else eps.get(group, ()):
+        yield ep.name, ep.value
+
+
+class PluginImportError(ImportError):
+    """Raised when the import target of a plugin command can't be imported"""
+
+
+class PluginCommand:
+    """Placeholder for a subcommand which is known only by its path, help line and import target until it is used;
+    it is then imported and registered with the `subcommand` decorator of its command line interface, reusing the
+    parser created for it here. If the target fails to import, `error` is set and using the parser to parse is a
+    usage error naming the command"""
+
+    error = None
+
+    def __init__(
+        self,
+        cli,
+        cmd_path: Tuple[str, ...],
+        target: str,
+        help: Opt[str] = None,
+        subcommand_kwargs: Opt[Dict[str, Any]] = None,
+    ):
+        self.cli = cli
+        self.cmd_path = cmd_path
+        self.target = target
+        self.help = help
+        self.subcommand_kwargs = subcommand_kwargs or {}
+        help_kw = {} if help is None else dict(help=help)
+        subparsers = cli.get_nested_subparser(*cmd_path[:-1]).subparsers
+        self.parser = subparsers.add_parser(cmd_path[-1], **help_kw)
+        self.parser.defer_arguments_from(self)
+
+    def __repr__(self):
+        return "{}({}, {})".format(
+            type(self).__name__, repr(" ".join(self.cmd_path)), repr(self.target)
+        )
+
+    def load(self):
+        """Import the target and register it as a subcommand, returning the resulting `SubCommandFunc`"""
+        self.cli.logger.debug(
+            "loading plugin command '%s' from %s", " ".join(self.cmd_path), self.target
+        )
+        try:
+            func = import_target(self.target)
+        except Exception as e:
+            raise PluginImportError(
+                "could not import command '{}' from {}: {}: {}".format(
+                    " ".join(self.cmd_path), self.target, type(e).__name__, e
+                )
+            ) from e
+        module = sys.modules.get(getattr(func, "__module__", None))
+        source_file = getattr(module, "__file__", None)
+        if source_file is not None:
+            # the help of a plugin command depends on its own source, not just on that of its command line interface
+            self.cli._plugin_source_files[self.cmd_path] = os.path.abspath(source_file)
+        return self.cli.subcommand(
+            command_prefix=self.cmd_path[:-1],
+            name=self.cmd_path[-1],
+            **self.subcommand_kwargs
+        )(func)
+
+    def add_arguments_to(self, parser):
+        # called when the placeholder parser is first used; registration adds the arguments to it
+        try:
+            self.load()
+        except PluginImportError as e:
+            self.error = e
+            parser._deferred_error = str(e)
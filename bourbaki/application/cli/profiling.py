@@ -0,0 +1,302 @@
+# coding:utf-8
+# wall-time breakdown of command line interface startup: imports, definition, parsing, logging setup, execution;
+# and per-invocation metrics of the phases of `CommandLineInterface.run`
+from typing import Dict, List, NamedTuple, Optional as Opt, Sequence
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from time import perf_counter, time
+import json
+import os
+import sys
+
+PROFILE_STARTUP_ENV_VAR = "BOURBAKI_PROFILE_STARTUP"
+METRICS_FILE_ENV_VAR = "BOURBAKI_CLI_METRICS_FILE"
+METRICS_PHASE_SEP = "/"
+PROFILE_JSON_EXT = ".json"
+# values of PROFILE_STARTUP_ENV_VAR that leave profiling disabled
+_DISABLED_ENV_VALUES = ("", "0", "false", "no", "off")
+
+IMPORT_PHASE = "import bourbaki.application.cli"
+PRE_DEFINITION_PHASE = "imports and setup before CommandLineInterface()"
+
+# timestamps of a few events which happen before profiling can be enabled by a command line flag; these are recorded
+# regardless so that a profile started later can still account for them
+_marks = {"import_started": perf_counter()}
+# (start event, end event, phase name)
+_MARKED_PHASES = (
+    ("import_started", "imported", IMPORT_PHASE),
+    ("imported", "cli_init", PRE_DEFINITION_PHASE),
+)
+
+
+def mark(event: str):
+    """Record the first time that `event` happened"""
+    if event in _marks:
+        return
+    _marks[event] = perf_counter()
+    if _profile is not None:
+        for start, end, phase in _MARKED_PHASES:
+            if end == event and start in _marks:
+                _profile.add(phase, _marks[end] - _marks[start])
+
+
+class PhaseTiming(NamedTuple):
+    phase: str
+    total: float
+    count: int
+
+    def to_dict(self):
+        return dict(phase=self.phase, total_ms=self.total * 1000.0, count=self.count)
+
+
+class _Phase:
+    __slots__ = ("profile", "name", "start")
+
+    def __init__(self, profile: "StartupProfile", name: str):
+        self.profile = profile
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.profile.add(self.name, perf_counter() - self.start)
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class StartupProfile:
+    """Accumulates total wall time and call count per named phase. Phases may be nested, e.g. construction of each
+    subcommand happens during `CommandLineInterface.definition`, so totals don't sum to the overall wall time."""
+
+    def __init__(self, output: Opt[str] = None, started: Opt[float] = None):
+        """
+        :param output: path to write a JSON report to; if None, a table is printed to stderr
+        :param started: perf_counter() time from which to measure overall wall time
+        """
+        self.output = output
+        self.started = perf_counter() if started is None else started
+        self.totals = OrderedDict()
+        self.counts = Counter()
+
+    def phase(self, name: str) -> _Phase:
+        return _Phase(self, name)
+
+    def add(self, name: str, elapsed: float, count: int = 1):
+        self.totals[name] = self.totals.get(name, 0.0) + elapsed
+        self.counts[name] += count
+
+    @property
+    def wall_time(self) -> float:
+        return perf_counter() - self.started
+
+    def breakdown(self) -> List[PhaseTiming]:
+        timings = (
+            PhaseTiming(name, total, self.counts[name])
+            for name, total in self.totals.items()
+        )
+        return sorted(timings, key=lambda t: t.total, reverse=True)
+
+    def to_dict(self):
+        return dict(
+            wall_time_ms=self.wall_time * 1000.0,
+            phases=[t.to_dict() for t in self.breakdown()],
+        )
+
+    def format(self, prog: Opt[str] = None) -> str:
+        wall_time = self.wall_time
+        lines = [
+            "startup profile{} ({:.1f} ms wall time; phases may be nested):".format(
+                "" if prog is None else " for " + prog, wall_time * 1000.0
+            ),
+            "{:>12}  {:>6}  {:>6}  {}".format("total (ms)", "%", "count", "phase"),
+        ]
+        for t in self.breakdown():
+            lines.append(
+                "{:>12.3f}  {:>6.1f}  {:>6d}  {}".format(
+                    t.total * 1000.0,
+                    100.0 * t.total / wall_time if wall_time else 0.0,
+                    t.count,
+                    t.phase,
+                )
+            )
+        return "\n".join(lines)
+
+    def report(self, prog: Opt[str] = None):
+        if self.output is None:
+            print(self.format(prog), file=sys.stderr)
+        else:
+            with open(self.output, "w") as f:
+                json.dump(self.to_dict(), f, indent=2)
+
+
+_profile = None
+
+
+def start_profile(output: Opt[str] = None) -> StartupProfile:
+    """Start profiling, if not already started. If `output` is a path, the report is written there as JSON, otherwise
+    it is printed to stderr. Events that have already been marked are included as phases."""
+    global _profile
+    if output is not None:
+        output = os.path.abspath(output)
+    if _profile is not None:
+        if output is not None:
+            _profile.output = output
+        return _profile
+
+    profile = StartupProfile(output=output, started=_marks["import_started"])
+    for start, end, phase in _MARKED_PHASES:
+        if start in _marks and end in _marks:
+            profile.add(phase, _marks[end] - _marks[start])
+
+    _profile = profile
+    return profile
+
+
+def get_profile() -> Opt[StartupProfile]:
+    return _profile
+
+
+def profile_phase(name: str):
+    """Context manager timing a phase of startup and of the current run's metrics; does nothing when profiling and
+    metrics are both disabled"""
+    profile = _profile
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        return _MetricsPhase(metrics, name, profile)
+    if profile is None:
+        return _NULL_PHASE
+    return profile.phase(name)
+
+
+def finish_profile(prog: Opt[str] = None):
+    """Report the current profile, if any, and stop profiling"""
+    global _profile
+    profile = _profile
+    if profile is not None:
+        _profile = None
+        profile.report(prog)
+
+
+def _start_profile_from_env():
+    # 1 (or any other value not in _DISABLED_ENV_VALUES) prints the report; a path ending in .json writes it there
+    setting = os.environ.get(PROFILE_STARTUP_ENV_VAR, "").strip()
+    if setting.lower() in _DISABLED_ENV_VALUES:
+        return
+    start_profile(setting if setting.endswith(PROFILE_JSON_EXT) else None)
+
+
+_start_profile_from_env()
+
+
+###############
+# run metrics #
+###############
+
+
+class RunMetrics:
+    """Wall time of each phase of one invocation of a command line interface. Phases nested in others are keyed by
+    their path, e.g. 'app construction/argument decoding', and the time spent decoding each arg is recorded under its
+    name nested in the enclosing phase, e.g. 'argument decoding/n'. Each key accumulates, so phases which are entered
+    more than once are summed."""
+
+    def __init__(self, prog: Opt[str] = None, args: Opt[Sequence[str]] = None):
+        self.prog = prog
+        self.args = None if args is None else list(args)
+        self.command = None
+        self.exit_code = None
+        self.started = time()
+        self._started = perf_counter()
+        self.total = None
+        self.phases = OrderedDict()
+        self._stack = []
+
+    def path(self, name: str) -> str:
+        return METRICS_PHASE_SEP.join((*self._stack, name))
+
+    def add(self, name: str, elapsed: float):
+        key = self.path(name)
+        self.phases[key] = self.phases.get(key, 0.0) + elapsed
+
+    def finish(self, exit_code: int = 0):
+        self.exit_code = exit_code
+        self.total = perf_counter() - self._started
+
+    def to_dict(self) -> Dict:
+        return dict(
+            prog=self.prog,
+            args=self.args,
+            command=self.command,
+            exit_code=self.exit_code,
+            started=self.started,
+            total_ms=None if self.total is None else self.total * 1000.0,
+            phases_ms=OrderedDict(
+                (name, elapsed * 1000.0) for name, elapsed in self.phases.items()
+            ),
+        )
+
+    def dump(self, path: str):
+        """Append these metrics to `path` as one JSON line"""
+        line = json.dumps(self.to_dict()) + "\n"
+        # one write of the whole line, so that lines from concurrent processes don't interleave
+        with open(os.path.expanduser(path), "a") as f:
+            f.write(line)
+
+
+class _MetricsPhase:
+    __slots__ = ("metrics", "name", "profile", "start")
+
+    def __init__(self, metrics: RunMetrics, name: str, profile: Opt[StartupProfile]):
+        self.metrics = metrics
+        self.name = name
+        self.profile = profile
+        self.start = None
+
+    def __enter__(self):
+        self.metrics._stack.append(self.name)
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        elapsed = perf_counter() - self.start
+        metrics = self.metrics
+        metrics._stack.pop()
+        metrics.add(self.name, elapsed)
+        if self.profile is not None:
+            self.profile.add(self.name, elapsed)
+
+
+# per-context, so that concurrently running commands (threads or asyncio tasks) record their own metrics
+_current_metrics = ContextVar("bourbaki_cli_run_metrics", default=None)
+
+
+def current_metrics() -> Opt[RunMetrics]:
+    return _current_metrics.get()
+
+
+def start_metrics(metrics: RunMetrics):
+    """Record phases in `metrics` in the current context until `finish_metrics` is called with the returned token"""
+    return _current_metrics.set(metrics)
+
+
+def finish_metrics(token, exit_code: int = 0, path: Opt[str] = None):
+    metrics = _current_metrics.get()
+    _current_metrics.reset(token)
+    if metrics is not None:
+        metrics.finish(exit_code)
+        if path:
+            metrics.dump(path)
+    return metrics
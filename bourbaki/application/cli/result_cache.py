@@ -0,0 +1,292 @@
+# coding:utf-8
+# on-disk caching of subcommand results, keyed on a canonical encoding of their decoded args and their source code
+from typing import Any, Iterable, Iterator, Mapping, Optional as Opt, Tuple
+import inspect
+import io
+import json
+import mmap
+import os
+import pickle
+import tempfile
+import time
+from hashlib import sha256
+
+from ..typed_io.utils import LazyFileHandle, is_write_mode
+from .cache import DEFINITION_CACHE_DIR_ENV_VAR, DEFAULT_DEFINITION_CACHE_DIR
+
+RESULT_CACHE_SUBDIR = "results"
+RESULT_CACHE_EXT = ".pkl"
+DEFAULT_RESULT_CACHE_MAX_SIZE = 2 ** 30
+
+
+class UncacheableArgs(TypeError):
+    def __init__(self, name, value, reason):
+        super().__init__(name, value, reason)
+
+    def __str__(self):
+        return "can't compute a cache key for arg {} with value {!r}: {}".format(
+            *self.args
+        )
+
+
+def default_result_cache_dir(cmd_name: str) -> str:
+    cache_dir = os.environ.get(
+        DEFINITION_CACHE_DIR_ENV_VAR, DEFAULT_DEFINITION_CACHE_DIR
+    )
+    return os.path.join(os.path.expanduser(cache_dir), RESULT_CACHE_SUBDIR, cmd_name)
+
+
+def code_fingerprint(func) -> str:
+    """Hash of the source code of `func` (a function or class), falling back to its bytecode and constants when source
+    is unavailable"""
+    func = inspect.unwrap(func)
+    name = "{}.{}".format(
+        getattr(func, "__module__", None), getattr(func, "__qualname__", None)
+    )
+    try:
+        code = inspect.getsource(func)
+    except (OSError, TypeError):
+        code_obj = getattr(func, "__code__", None)
+        if code_obj is None:
+            # no source and no bytecode; the name alone is the best we can do
+            code = ""
+        else:
+            code = repr((code_obj.co_code, code_obj.co_consts, code_obj.co_names))
+    return sha256("\n".join((name, code)).encode()).hexdigest()
+
+
+def file_stamp(value) -> Opt[Tuple[str, int, int]]:
+    """(path, size, modification time) for a file opened (or to be lazily opened) for reading from a regular file's
+    path, else None. Readable file args are consumed by the command, so their contents must figure in the cache key and
+    not only their paths."""
+    if isinstance(value, LazyFileHandle):
+        if is_write_mode(value.mode):
+            return None
+    elif not isinstance(value, io.IOBase) or not _readable(value):
+        return None
+    path = getattr(value, "name", None)
+    if not isinstance(path, str) or not os.path.isfile(path):
+        return None
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+def arg_leaves(value) -> Iterator:
+    """The values nested in the collections and mappings of a decoded arg, or the arg itself if it is neither"""
+    if isinstance(value, Mapping):
+        values = value.values()
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        values = value
+    else:
+        yield value
+        return
+    for v in values:
+        yield from arg_leaves(v)
+
+
+def uncacheable_reason(value) -> Opt[str]:
+    """Why a decoded arg rules out caching a command's result, or None if it doesn't. Output files (lazy ones included)
+    and memory maps are written to by the command as a side effect, which a cache hit would skip, leaving e.g. a file
+    truncated at parse time empty; and a memory map has no path whose modification time can go in the key. Streams
+    read from other than regular files (stdin, pipes) have no stamp for the key at all, and iterators are consumed by
+    the command, so they can't be encoded for the key without losing their values."""
+    for v in arg_leaves(value):
+        reason = _uncacheable_reason(v)
+        if reason is not None:
+            return reason
+    return None
+
+
+def _uncacheable_reason(value) -> Opt[str]:
+    if isinstance(value, LazyFileHandle):
+        if is_write_mode(value.mode):
+            return "it is a file opened for writing"
+        if file_stamp(value) is None:
+            return "it is a stream that isn't a regular file"
+    elif isinstance(value, io.IOBase):
+        try:
+            writable = value.writable()
+        except ValueError:
+            # closed
+            writable = False
+        if writable:
+            return "it is a file opened for writing"
+        if _readable(value) and file_stamp(value) is None:
+            return "it is a stream that isn't a regular file"
+    elif isinstance(value, mmap.mmap):
+        return "it is a memory-mapped file"
+    elif isinstance(value, Iterator):
+        return "it is an iterator, consumed by the command"
+    return None
+
+
+def _readable(f: io.IOBase) -> bool:
+    try:
+        return f.readable()
+    except ValueError:
+        # closed
+        return False
+
+
+def result_key(
+    fingerprint: str,
+    encoded_args: Mapping[str, Any],
+    files: Iterable[Tuple[str, int, int]] = (),
+    context: Opt[str] = None,
+) -> str:
+    """Cache key for a call of a function with source fingerprint `fingerprint`, with args already canonicalized
+    with their config encoders.
+
+    :param files: stamps of input files read by the function, as returned by `file_stamp`
+    :param context: key of any further state the result depends on, e.g. the instance for a method
+    """
+    try:
+        canonical = json.dumps(
+            [fingerprint, encoded_args, sorted(files), context],
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+    except (TypeError, ValueError) as e:
+        raise UncacheableArgs(", ".join(encoded_args), encoded_args, e)
+    return sha256(canonical.encode()).hexdigest()
+
+
+class ResultCache:
+    """A directory of pickled command results, keyed on `result_key`, with least-recently-used entries evicted to
+    keep the total size under `max_size` bytes and the number of entries under `max_entries`.
+
+    Entries are written atomically, so that concurrent processes sharing a cache dir never see partial results.
+    The modification time of an entry records its last use.
+    """
+
+    def __init__(
+        self,
+        directory: Opt[str] = None,
+        max_size: Opt[int] = DEFAULT_RESULT_CACHE_MAX_SIZE,
+        max_entries: Opt[int] = None,
+    ):
+        """
+        :param directory: the cache dir; if None, the command line interface using the cache fills in a default in
+            the user's cache dir
+        :param max_size: maximum total size of the cache in bytes, or None for no limit
+        :param max_entries: maximum number of cached results, or None for no limit
+        """
+        self.directory = (
+            None
+            if directory is None
+            else os.path.abspath(os.path.expanduser(str(directory)))
+        )
+        self.max_size = max_size
+        self.max_entries = max_entries
+
+    def __repr__(self):
+        return "{}({}, max_size={}, max_entries={})".format(
+            type(self).__name__,
+            repr(self.directory),
+            repr(self.max_size),
+            repr(self.max_entries),
+        )
+
+    def with_directory(self, directory: str) -> "ResultCache":
+        return type(self)(directory, self.max_size, self.max_entries)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + RESULT_CACHE_EXT)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (True, result) if a result is cached for `key`, else (False, None)"""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return False, None
+        except Exception:
+            # corrupt, or pickled with code that no longer exists
+            self._remove(path)
+            return False, None
+
+        self._touch(path)
+        return True, value
+
+    def put(self, key: str, value) -> bool:
+        """Atomically store `value` for `key` and evict old entries as needed. Returns False if `value` can't be
+        pickled, in which case nothing is stored."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.directory, prefix=".", suffix=RESULT_CACHE_EXT
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path(key))
+            self._touch(self.path(key))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            self._remove(tmp_path)
+            return False
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+        self.evict()
+        return True
+
+    def entries(self):
+        """(path, size, last use time) for all entries, least recently used first"""
+        entries = []
+        try:
+            it = os.scandir(self.directory)
+        except FileNotFoundError:
+            return entries
+
+        with it:
+            for entry in it:
+                name = entry.name
+                if name.startswith(".") or not name.endswith(RESULT_CACHE_EXT):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    # evicted concurrently
+                    continue
+                entries.append((entry.path, stat.st_size, stat.st_mtime_ns))
+
+        entries.sort(key=lambda e: e[2])
+        return entries
+
+    def evict(self):
+        """Remove least recently used entries until the cache is within its size and entry limits"""
+        if self.max_size is None and self.max_entries is None:
+            return
+        entries = self.entries()
+        n_entries = len(entries)
+        total_size = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if (self.max_size is None or total_size <= self.max_size) and (
+                self.max_entries is None or n_entries <= self.max_entries
+            ):
+                break
+            self._remove(path)
+            total_size -= size
+            n_entries -= 1
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            self._remove(path)
+
+    @staticmethod
+    def _touch(path: str):
+        # mark as recently used; explicit ns resolution since file system timestamps may be coarser than the interval
+        # between uses
+        now = time.time_ns()
+        try:
+            os.utime(path, ns=(now, now))
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
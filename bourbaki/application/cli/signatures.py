@@ -59,6 +59,7 @@ class CLISignatureSpec(NamedTuple):
     ignore_in_config: Optional[AnyArgNameSpec] = None
     parse_config_as_cli: Optional[AnyArgNameSpec] = None
     typecheck: Optional[AnyArgNameSpec] = None
+    arg_files: Optional[AnyArgNameSpec] = None
     parse_env: Optional[Dict[str, str]] = None
     metavars: Optional[Dict[str, str]] = None
     named_groups: Optional[Dict[str, Collection[str]]] = None
@@ -77,6 +78,7 @@ class CLISignatureSpec(NamedTuple):
             ignore_in_config=cli_attrs.ignore_in_config(func),
             parse_config_as_cli=cli_attrs.parse_config_as_cli(func),
             typecheck=cli_attrs.typecheck(func),
+            arg_files=cli_attrs.arg_files(func),
             parse_env=cli_attrs.parse_env(func),
             metavars=cli_attrs.metavars(func),
             named_groups=cli_attrs.named_groups(func),
@@ -84,11 +86,15 @@ class CLISignatureSpec(NamedTuple):
             require_options=cli_attrs.require_options(func),
         )
 
-        return (
-            spec
-            if constructor is None
-            else spec.overriding(CLISignatureSpec.from_callable(constructor))
-        )
+        if constructor is None:
+            return spec
+
+        constructor_spec = CLISignatureSpec.from_callable(constructor)
+        combined = spec.overriding(constructor_spec)
+        if spec.require_options is None and constructor_spec.require_options is None:
+            # leave this unspecified so that it can still be overridden by defaults, e.g. for output handler classes
+            combined = combined._replace(require_options=None)
+        return combined
 
     @property
     def nonnull_attrs(self):
@@ -184,6 +190,7 @@ class CLISignatureSpec(NamedTuple):
             parse_config=param_names("ignore_in_config", invert=True),
             parse_config_as_cli=param_names("parse_config_as_cli", invert=False),
             typecheck=param_names("typecheck", invert=False),
+            arg_files=param_names("arg_files", invert=False),
             parse_env=parse_env,
             parse_order=parse_order,
             metavars=metavars,
@@ -201,6 +208,7 @@ class FinalCLISignatureSpec(NamedTuple):
     parse_env: Mapping[str, str]
     parse_order: List[str]
     typecheck: Set[str]
+    arg_files: Set[str]
     metavars: Mapping[str, str]
     named_groups: Mapping[str, Set[str]]
     all_names: Set[str]
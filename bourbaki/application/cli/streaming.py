@@ -0,0 +1,256 @@
+# coding:utf-8
+# incremental output handling for commands that return iterators, so that results are written as they are produced
+from typing import (
+    AsyncIterable,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional as Opt,
+)
+from abc import ABC, abstractmethod
+from functools import partial
+from itertools import islice
+import sys
+from ..typed_io.utils import File
+
+STREAMING_METHODS = ("open", "write_item", "close")
+DEFAULT_BUFFER_SIZE = 100
+
+
+class StreamingOutputHandler(ABC):
+    """Base class for incremental output handlers. When a class with `open`, `write_item` and `close` methods is
+    passed as an output handler (subclassing this class is optional), the args of its constructor are parsed from the
+    command line/config like those of any other output handler, and the command's return value is streamed through an
+    instance of it:
+
+        handler = HandlerClass(**parsed_args)
+        handler.open()
+        for item in command(...):
+            handler.write_item(item)  # really handler.write_items(batch), for batches of up to buffer_size items
+        handler.close()
+
+    Items are pulled from the command's iterator into a buffer of at most `buffer_size` items before being passed to
+    `write_items`, so memory stays bounded no matter how many items are produced. `close` is called even if the command
+    or the handler raises. Return values that aren't iterators or collections (and strings, bytes and mappings) are
+    written as a single item. Commands may also return async iterators, e.g. from `async def` generators.
+    """
+
+    buffer_size = DEFAULT_BUFFER_SIZE
+
+    def open(self):
+        pass
+
+    @abstractmethod
+    def write_item(self, item):
+        pass
+
+    def write_items(self, items: List):
+        for item in items:
+            self.write_item(item)
+
+    def close(self):
+        pass
+
+
+class LinesOutput(StreamingOutputHandler):
+    """Write each item produced by the command on its own line"""
+
+    def __init__(self, outfile: Opt[File["w"]] = None, literal: bool = False):
+        """
+        :param outfile: the file to write to; stdout if not specified
+        :param literal: write the python literal representation of each item rather than its str representation
+        """
+        self.outfile = outfile
+        self.literal = literal
+
+    def open(self):
+        if self.outfile is None:
+            self.outfile = sys.stdout
+
+    def write_items(self, items: List):
+        to_str = repr if self.literal else str
+        self.outfile.write("".join(to_str(item) + "\n" for item in items))
+        self.outfile.flush()
+
+    def write_item(self, item):
+        self.write_items([item])
+
+    def close(self):
+        outfile = self.outfile
+        if outfile is not None and outfile not in (sys.stdout, sys.__stdout__):
+            outfile.close()
+
+
+def is_streaming_output_handler(handler) -> bool:
+    return isinstance(handler, type) and all(
+        callable(getattr(handler, name, None)) for name in STREAMING_METHODS
+    )
+
+
+def _items(value) -> Iterable:
+    if isinstance(value, (str, bytes, Mapping)) or not isinstance(value, Iterable):
+        return (value,)
+    return value
+
+
+def _buffer_size(handler) -> int:
+    return max(1, getattr(handler, "buffer_size", DEFAULT_BUFFER_SIZE) or 1)
+
+
+def _write(handler, batch: List):
+    write_items = getattr(handler, "write_items", None)
+    if write_items is not None:
+        write_items(batch)
+    else:
+        for item in batch:
+            handler.write_item(item)
+
+
+def stream_output(value, handler):
+    """Pass the items of `value` to the `open`ed `handler` in bounded batches, then `close` it"""
+    buffer_size = _buffer_size(handler)
+    handler.open()
+    try:
+        items = iter(_items(value))
+        while True:
+            batch = list(islice(items, buffer_size))
+            if not batch:
+                break
+            _write(handler, batch)
+    finally:
+        handler.close()
+
+
+async def astream_output(value, handler):
+    """Like `stream_output`, but also accepting async iterables, which are consumed in the running event loop"""
+    if not isinstance(value, AsyncIterable):
+        return stream_output(value, handler)
+
+    buffer_size = _buffer_size(handler)
+    handler.open()
+    try:
+        batch = []
+        async for item in value:
+            batch.append(item)
+            if len(batch) >= buffer_size:
+                _write(handler, batch)
+                batch = []
+        if batch:
+            _write(handler, batch)
+    finally:
+        handler.close()
+
+
+######################
+# background writing #
+######################
+
+DEFAULT_QUEUE_SIZE = 8
+_DONE = object()
+
+
+class BackgroundWriter:
+    """Run `consume(items)` on a background thread, where `items` iterates over everything passed to `write_all` in the
+    calling thread. Items are transferred in batches of `batch_size` through a queue holding at most `queue_size`
+    batches, so that the producer blocks rather than buffering without bound when the consumer falls behind.
+    An error raised in the consumer is re-raised in the producer's thread on its next write or on `finish`; if the
+    producer fails first, its error is raised with the consumer's as its context."""
+
+    def __init__(
+        self,
+        consume: Callable[[Iterator], object],
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        batch_size: int = DEFAULT_BUFFER_SIZE,
+    ):
+        import queue
+        import threading
+
+        self.consume = consume
+        self.batch_size = max(1, batch_size)
+        self.queue = queue.Queue(max(1, queue_size))
+        self.error = None
+        self.thread = threading.Thread(
+            target=self._run, name="bourbaki-output-writer", daemon=True
+        )
+
+    def _items(self) -> Iterator:
+        get = self.queue.get
+        while True:
+            batch = get()
+            if batch is _DONE:
+                return
+            yield from batch
+
+    def _run(self):
+        try:
+            self.consume(self._items())
+        except BaseException as e:
+            self.error = e
+
+    def _put(self, batch):
+        import queue
+
+        while True:
+            self._raise_error()
+            if not self.thread.is_alive():
+                # the consumer returned without consuming everything
+                return
+            try:
+                self.queue.put(batch, timeout=0.1)
+            except queue.Full:
+                continue
+            return
+
+    def _raise_error(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def write_all(self, items: Iterable):
+        """Pass all of `items` to the consumer in the background and wait until it has finished with them"""
+        self.thread.start()
+        try:
+            it = iter(items)
+            batch_size = self.batch_size
+            while True:
+                batch = list(islice(it, batch_size))
+                if not batch:
+                    break
+                self._put(batch)
+        except BaseException as e:
+            # flush whatever was produced, even though producing the rest failed; the producer's error wins
+            try:
+                self.finish()
+            except BaseException as consumer_error:
+                if e.__context__ is None:
+                    e.__context__ = consumer_error
+            raise
+        self.finish()
+
+    def finish(self):
+        self._put(_DONE)
+        self.thread.join()
+        self._raise_error()
+
+
+def write_in_background(
+    value,
+    output_handler: Callable,
+    output_args=(),
+    output_kwargs: Opt[Mapping] = None,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+):
+    """Pass the items of the iterator `value` to the streaming handler class `output_handler` on a background thread, so
+    that producing them overlaps with writing them. The handler is constructed from the args and streamed to as in
+    `stream_output`. Other handlers can't be used here, since they may need the whole value at once."""
+    if not is_streaming_output_handler(output_handler):
+        raise TypeError(
+            "only streaming output handlers can write in the background; got {}".format(
+                output_handler
+            )
+        )
+    handler = output_handler(*output_args, **(output_kwargs or {}))
+    consume = partial(stream_output, handler=handler)
+    BackgroundWriter(consume, queue_size, _buffer_size(handler)).write_all(value)
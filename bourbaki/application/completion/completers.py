@@ -1,5 +1,5 @@
 # coding:utf-8
-from typing import IO, List, Tuple, Sequence, Union, Optional as Opt
+from typing import IO, List, Mapping, Tuple, Sequence, Union, Optional as Opt
 from abc import ABC
 import argparse
 from argparse import ArgumentParser, Action, FileType, _SubParsersAction
@@ -85,7 +85,7 @@ def shellquote(s: str):
 
 
 def install_shell_completion(
-    parser: ArgumentParser,
+    parser: Union[ArgumentParser, Mapping],
     *commands: str,
     extra_completion_script: Opt[str] = None,
     completion_options: Sequence[str] = DEFAULT_BASH_COMPLETE_OPTIONS,
@@ -334,7 +334,7 @@ class CompleteUnion(_MultiComplete):
 
 
 def write_bash_completion_for_parser(
-    parser: ArgumentParser,
+    parser: Union[ArgumentParser, Mapping],
     file: IO[str],
     commands: Sequence[str],
     completion_options: Opt[Union[str, Sequence[str]]] = None,
@@ -384,27 +384,31 @@ def write_bash_completion_for_parser(
 
 
 def print_cli_def_tree(
-    parser: Union[ArgumentParser, _SubParsersAction],
+    parser: Union[ArgumentParser, _SubParsersAction, Mapping],
     file: IO[str] = sys.stdout,
     indent: str = "",
 ):
-    args, options, commands = gather_args_options_subparsers(parser)
+    if isinstance(parser, Mapping):
+        # a node of a CLI manifest, with completion specs already computed; see `application.cli.manifest`
+        args = [a["completion"] for a in parser["args"]]
+        options = [(a["option_strings"], a["completion"]) for a in parser["options"]]
+        commands = [(c["name"], c) for c in parser["commands"]]
+    else:
+        args, options, commands = gather_args_options_subparsers(parser)
+        args = [completion_spec(a, positional=True) for a in args]
+        options = [
+            (a.option_strings, completion_spec(a, positional=False)) for a in options
+        ]
 
     def print_(*line):
         print(*line, file=file)
         print(*line, file=sys.stderr)
 
-    for a in args:
-        print_("{}- {}".format(indent, completion_spec(a, positional=True)))
+    for spec in args:
+        print_("{}- {}".format(indent, spec))
 
-    for a in options:
-        print_(
-            "{}{} {}".format(
-                indent,
-                OPTION_SEP.join(a.option_strings),
-                completion_spec(a, positional=False),
-            )
-        )
+    for option_strings, spec in options:
+        print_("{}{} {}".format(indent, OPTION_SEP.join(option_strings), spec))
 
     for name, c in commands:
         print_("{}{}".format(indent, name))
@@ -414,6 +418,11 @@ def print_cli_def_tree(
 def gather_args_options_subparsers(
     parser: ArgumentParser
 ) -> Tuple[List[Action], List[Action], List[Tuple[str, Action]]]:
+    add_deferred_arguments = getattr(parser, "add_deferred_arguments", None)
+    if add_deferred_arguments is not None:
+        # subcommand parsers of a CLI defined with lazy_subparsers=True
+        add_deferred_arguments()
+
     args = []
     options = []
     commands = []
@@ -5,11 +5,9 @@ import argparse
 from enum import Enum
 from pathlib import Path
 from functools import partial
+from importlib import import_module
 from logging import getLogger
 from collections import ChainMap
-import yaml
-import toml
-import ujson as json
 from bourbaki.introspection.prettyprint import has_identifier_keys
 from ..namespace import namespace_recursive
 from ..paths import get_file, ensure_dir, path_with_ext
@@ -30,21 +28,48 @@ YAML_DUMP_KWARGS = dict(
     default_flow_style=False, width=MAX_PY_WIDTH, sort_keys=False, indent=2
 )
 
+
+class _LazyConfigIO:
+    """Stand-in for a load/dump function from a config format library, which imports the library only when first
+    called; most CLI invocations never touch most formats, and yaml in particular is slow to import"""
+
+    def __init__(self, modname: str, funcname: str):
+        self.modname = modname
+        self.funcname = funcname
+        self.func = None
+
+    def __call__(self, *args, **kwargs):
+        func = self.func
+        if func is None:
+            func = self.func = getattr(import_module(self.modname), self.funcname)
+        return func(*args, **kwargs)
+
+    def __repr__(self):
+        return "{}({}, {})".format(
+            type(self).__name__, repr(self.modname), repr(self.funcname)
+        )
+
+
+yaml_safe_load = _LazyConfigIO("yaml", "safe_load")
+yaml_safe_dump = _LazyConfigIO("yaml", "safe_dump")
+yaml_load = _LazyConfigIO("yaml", "load")
+yaml_dump = _LazyConfigIO("yaml", "dump")
+
 loaders = {
-    ".yml": yaml.safe_load,
-    ".yaml": yaml.safe_load,
-    ".json": json.load,
-    ".toml": toml.load,
+    ".yml": yaml_safe_load,
+    ".yaml": yaml_safe_load,
+    ".json": _LazyConfigIO("ujson", "load"),
+    ".toml": _LazyConfigIO("toml", "load"),
     ".py": load_python,
     ".ini": load_ini,
 }
 loader_kw = {}
 
 dumpers = {
-    ".yml": yaml.safe_dump,
-    ".yaml": yaml.safe_dump,
-    ".json": json.dump,
-    ".toml": toml.dump,
+    ".yml": yaml_safe_dump,
+    ".yaml": yaml_safe_dump,
+    ".json": _LazyConfigIO("ujson", "dump"),
+    ".toml": _LazyConfigIO("toml", "dump"),
     ".py": dump_python,
     ".ini": dump_ini,
 }
@@ -136,17 +161,17 @@ def register_dump_config(*exts: str, **default_kw):
 def allow_unsafe_yaml():
     global loaders, dumpers
     for ext in (".yml", ".yaml"):
-        loaders[ext] = yaml.load
+        loaders[ext] = yaml_load
     for ext in (".yml", ".yaml"):
-        dumpers[ext] = yaml.dump
+        dumpers[ext] = yaml_dump
 
 
 def require_safe_yaml():
     global loaders, dumpers
     for ext in (".yml", ".yaml"):
-        loaders[ext] = yaml.safe_load
+        loaders[ext] = yaml_safe_load
     for ext in (".yml", ".yaml"):
-        dumpers[ext] = yaml.safe_dump
+        dumpers[ext] = yaml_safe_dump
 
 
 def _config_io(
@@ -1,7 +1,6 @@
 # coding:utf-8
 import os
 import ast
-import ujson as json
 from bourbaki.introspection.prettyprint import fmt_pyobj
 from .exceptions import ConfigNotSerializable
 
@@ -42,6 +41,8 @@ class PythonConfigNotSerializable(ConfigNotSerializable):
 
 
 def is_json_serializable(conf):
+    import ujson as json
+
     try:
         with open(os.devnull, "w") as f:
             json.dump(conf, f)
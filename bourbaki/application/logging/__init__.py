@@ -1,6 +1,7 @@
 # coding:utf-8
 # Import commonly used things into the top-level namespace for quick import
-from . import config, defaults, interface, timing, loggers, analysis
+from importlib import import_module
+from . import config, defaults, interface, timing, loggers
 from .interface import Logged, InstanceLoggerNamingConvention
 from .config import (
     configure_default_logging,
@@ -16,14 +17,33 @@ from .defaults import (
     DEFAULT_FILE_LOG_LEVEL,
 )
 from .timing import timed_context, TimedTaskContext
-from .analysis import log_file_to_df
 from .loggers import CountingLogger, ProgressLogger
-from .handlers import (
-    MemoryHandler,
-    SMTPHandler,
-    BufferingSMTPHandler,
-    MultiProcHandler,
-    MultiProcBufferingSMTPHandler,
-    MultiProcStreamHandler,
-    MultiProcRotatingFileHandler,
-)
+
+# these are imported on first access; the handlers pull in multiprocessing, and are usually only referenced by
+# dotted path in logging configs, which import them as needed
+_lazy_submodules = {"analysis", "handlers"}
+_lazy_attrs = {
+    "log_file_to_df": "analysis",
+    "MemoryHandler": "handlers",
+    "SMTPHandler": "handlers",
+    "BufferingSMTPHandler": "handlers",
+    "MultiProcHandler": "handlers",
+    "MultiProcBufferingSMTPHandler": "handlers",
+    "MultiProcStreamHandler": "handlers",
+    "MultiProcRotatingFileHandler": "handlers",
+}
+
+
+def __getattr__(name):
+    if name in _lazy_submodules:
+        return import_module("." + name, __name__)
+    submodule = _lazy_attrs.get(name)
+    if submodule is None:
+        raise AttributeError("module {} has no attribute {}".format(__name__, name))
+    value = getattr(import_module("." + submodule, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()).union(_lazy_submodules, _lazy_attrs))
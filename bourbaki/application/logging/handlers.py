@@ -5,10 +5,6 @@ import threading
 import logging
 import sys
 import traceback
-from getpass import getpass
-import smtplib
-import email.utils
-from email.message import EmailMessage
 from logging import StreamHandler, ERROR, LogRecord
 from logging.handlers import SMTPHandler, MemoryHandler, RotatingFileHandler
 from .config import validate_log_level_int
@@ -32,6 +28,8 @@ class BufferingSMTPHandler(MemoryHandler):
         flushLevel = validate_log_level_int(flushLevel)
 
         if isinstance(credentials, str):
+            from getpass import getpass
+
             credentials = (
                 credentials,
                 getpass("Please enter a password for {}: ".format(credentials)),
@@ -75,6 +73,11 @@ class BufferingSMTPHandler(MemoryHandler):
         )
 
     def send_mail(self, content, subject=None):
+        # only imported when mail is actually sent; these are slow to import and most processes never send mail
+        import smtplib
+        import email.utils
+        from email.message import EmailMessage
+
         msg = EmailMessage()
         msg["From"] = self.fromaddr
         msg["To"] = ",".join(self.toaddrs)
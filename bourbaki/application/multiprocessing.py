@@ -1,6 +1,5 @@
 # coding:utf-8
 import os
-import multiprocessing
 from itertools import zip_longest
 from logging import Logger
 
@@ -23,16 +22,19 @@ def get_nproc(n):
 
 
 def init_logger(logger_: Logger):
+    import multiprocessing
+
     proc = multiprocessing.current_process()
     global logger
     logger = logger_
     logger.info("process {} initialized successfully".format(proc))
 
 
-def get_pool(nproc, logger, init=None):
+def get_pool(nproc, logger, init=None, start_method=None):
     """Put a logger in the global namespaces of your processes at init.
     Make sure your logger's handler is process-safe, e.g. application.logging.MultiProcStreamHandler or
-    application.logging.MultiProcRotatingFileHandler"""
+    application.logging.MultiProcRotatingFileHandler. Those handlers are only inherited by workers started with the
+    'fork' start_method; by default the platform's default start method is used."""
     if not isinstance(logger, Logger):
         raise TypeError(
             "You must pass a logging.Logger instance for logger; got {}".format(
@@ -51,7 +53,11 @@ def get_pool(nproc, logger, init=None):
         init = apply_all(init_logger, init)
         initargs = [[logger]]
 
-    return multiprocessing.Pool(nproc, initializer=init, initargs=initargs)
+    # imported here since this is the only place it's needed, and it's slow to import
+    import multiprocessing
+
+    context = multiprocessing.get_context(start_method)
+    return context.Pool(nproc, initializer=init, initargs=initargs)
 
 
 class apply_all:
@@ -0,0 +1,539 @@
+# coding:utf-8
+"""A long-lived local server for command line interfaces, and a lightweight client for it.
+
+The server keeps an already-defined command line interface resident in memory and executes command lines sent to it
+over a Unix domain socket, streaming stdout/stderr and finally the exit code back to the client.
+This module imports only from the standard library, so that the client can be used from a script before any expensive
+imports happen:
+
+    #!/usr/bin/env python
+    from bourbaki.application.server import forward_to_server
+    forward_to_server("my-cli")  # exits with the server's exit code if a server is running for 'my-cli'
+    from my_package.cli import cli  # otherwise, define the CLI and run in-process as usual
+    cli.run()
+"""
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional as Opt,
+    Sequence,
+    Tuple,
+)
+import io
+import json
+import os
+import selectors
+import signal
+import socket
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import traceback
+
+SOCKET_DIR_ENV_VAR = "XDG_RUNTIME_DIR"
+SOCKET_DIR_TEMPLATE = "bourbaki-{}"
+SOCKET_TEMPLATE = "{}.sock"
+_HEADER = struct.Struct(">I")
+# pid, uid, gid
+_PEERCRED = struct.Struct("3i")
+# seconds a server waits for a connected client to send its request
+DEFAULT_REQUEST_TIMEOUT = 10.0
+STDOUT = "stdout"
+STDERR = "stderr"
+
+
+class BadRequest(ValueError):
+    pass
+
+
+class ServerAlreadyRunning(OSError):
+    def __init__(self, path):
+        super().__init__(path)
+
+    def __str__(self):
+        return "a server is already listening on socket {}".format(self.args[0])
+
+
+def default_socket_path(cmd_name: str) -> str:
+    """A per-user socket path for the command `cmd_name`, in the directory given by `socket_dir()`"""
+    return os.path.join(socket_dir(), SOCKET_TEMPLATE.format(cmd_name))
+
+
+def socket_dir() -> str:
+    """A private per-user directory for sockets, in $XDG_RUNTIME_DIR if set, else the temp dir. It's created with mode
+    0700 if it doesn't exist; if it does, it must be a directory owned by the current user with no access for anyone
+    else, since a client sends its whole environment to whatever is listening there."""
+    base = os.environ.get(SOCKET_DIR_ENV_VAR) or tempfile.gettempdir()
+    path = os.path.join(base, SOCKET_DIR_TEMPLATE.format(os.getuid()))
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    # lstat, so that a symlink planted by another user isn't followed
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(
+            "socket directory {} must be a directory owned by the current user and accessible only to them".format(
+                path
+            )
+        )
+    return path
+
+
+def _socket_path(path_or_cmd_name: str) -> str:
+    # only a bare command name maps to the default path; anything with a directory or an extension is a path
+    if os.sep in path_or_cmd_name or os.path.splitext(path_or_cmd_name)[1]:
+        return path_or_cmd_name
+    return default_socket_path(path_or_cmd_name)
+
+
+def _check_server_owner(sock: socket.socket, path: str):
+    if hasattr(socket, "SO_PEERCRED"):
+        # the credentials of the process listening, rather than of whoever created the socket file
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, _PEERCRED.size)
+        _, uid, _ = _PEERCRED.unpack(creds)
+    else:
+        uid = os.stat(path).st_uid
+    if uid != os.getuid():
+        raise PermissionError(
+            "the server listening on socket {} is run by uid {}, not the current user".format(
+                path, uid
+            )
+        )
+
+
+#################
+# wire protocol #
+#################
+
+
+def send_message(sock: socket.socket, message: Mapping):
+    data = json.dumps(message).encode()
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def recv_message(sock: socket.socket) -> Opt[Dict]:
+    header = _recv_exactly(sock, _HEADER.size)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    data = _recv_exactly(sock, size)
+    if data is None:
+        raise EOFError("connection closed in the middle of a message")
+    return json.loads(data.decode())
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> Opt[bytes]:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            if chunks:
+                raise EOFError("connection closed in the middle of a message")
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+##########
+# client #
+##########
+
+
+def run_client(
+    path: str,
+    argv: Opt[Sequence[str]] = None,
+    env: Opt[Mapping[str, str]] = None,
+    cwd: Opt[str] = None,
+) -> Opt[int]:
+    """Send a command line to the server listening at `path` (or at the default path for a command name), writing its
+    streamed output to this process' stdout/stderr. Returns the exit code of the command, or None if no server is
+    listening. Raises PermissionError without sending anything if the server is run by another user.
+
+    :param argv: the args to run; defaults to sys.argv[1:]
+    :param env: the environment to run the command in; defaults to os.environ
+    :param cwd: the working dir to run the command in; defaults to the current dir
+    """
+    path = _socket_path(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        _check_server_owner(sock, path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
+    except BaseException:
+        sock.close()
+        raise
+
+    request = dict(
+        argv=list(sys.argv[1:] if argv is None else argv),
+        env=dict(os.environ if env is None else env),
+        cwd=os.getcwd() if cwd is None else cwd,
+    )
+    streams = {STDOUT: sys.stdout, STDERR: sys.stderr}
+    with sock:
+        send_message(sock, request)
+        while True:
+            message = recv_message(sock)
+            if message is None:
+                raise EOFError("server closed the connection without an exit code")
+            if "exit_code" in message:
+                return message["exit_code"]
+            stream = streams[message["stream"]]
+            stream.write(message["data"])
+            stream.flush()
+
+
+def forward_to_server(path: str, argv: Opt[Sequence[str]] = None):
+    """Run the command line via the server at `path` (or at the default path for a command name) and exit with its
+    exit code if a server is listening there; otherwise return None so that the caller can run the command in-process
+    """
+    code = run_client(path, argv)
+    if code is not None:
+        sys.exit(code)
+
+
+##########
+# server #
+##########
+
+
+class _SocketStream(io.TextIOBase):
+    """Text stream forwarding writes to the client of the current request, or to `fallback` outside of a request"""
+
+    def __init__(self, name: str, fallback):
+        self.name = name
+        self.fallback = fallback
+        self.sock = None
+
+    def writable(self):
+        return True
+
+    def write(self, s):
+        if self.sock is None:
+            return self.fallback.write(s)
+        if s:
+            try:
+                send_message(self.sock, dict(stream=self.name, data=s))
+            except OSError:
+                # client went away; discard the rest of the output for this request
+                self.sock = None
+        return len(s)
+
+    def flush(self):
+        if self.sock is None:
+            self.fallback.flush()
+
+
+class CLIServer:
+    """Serve command lines over a Unix domain socket by passing them to `run`; typically the `run` method of a fully
+    defined `application.cli.CommandLineInterface`.
+
+    By default requests are handled one at a time in the server process. When `fork` is True, the server acts as a
+    "zygote": a child process is forked from it for each request, so that each command runs in isolation (and can't
+    leak memory or state into later commands) while still skipping import and definition cost. The child's exit status
+    is then sent to the client as the exit code, and requests are handled concurrently.
+
+    Each request runs with the process-global environment, working dir, and standard streams swapped for those of the
+    client, so `handle` runs one request at a time in any one process, even when called from several threads. Log
+    handlers writing to stdout/stderr are pointed at the client's streams for the duration of its request.
+
+    A client that doesn't send a well-formed request within `request_timeout` seconds of connecting, or that goes away
+    mid-request, is logged and disconnected; the server keeps accepting other clients.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[Sequence[str]], object],
+        path: str,
+        fork: bool = False,
+        request_timeout: Opt[float] = DEFAULT_REQUEST_TIMEOUT,
+    ):
+        self.run = run
+        self.path = _socket_path(path)
+        self.fork = bool(fork)
+        self.request_timeout = request_timeout
+        self.sock = None
+        # pid -> client connection, for forked children
+        self._children = {}
+        # serializes swapping the process-global state for a request
+        self._lock = threading.Lock()
+
+    def bind(self):
+        if os.path.exists(self.path):
+            if server_is_running(self.path):
+                raise ServerAlreadyRunning(self.path)
+            # stale socket file from a server that didn't shut down cleanly
+            os.remove(self.path)
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            sock.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        sock.listen()
+        self.sock = sock
+        return self
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def serve_forever(self):
+        if self.sock is None:
+            self.bind()
+        try:
+            if self.fork:
+                self._serve_forking()
+            else:
+                for conn in self._accept():
+                    with conn:
+                        try:
+                            self.handle(conn)
+                        except Exception as e:
+                            # one bad client doesn't take down the server
+                            _log_dropped_client(e)
+        finally:
+            self.close()
+
+    def _accept(self) -> Iterator[socket.socket]:
+        while True:
+            conn, _ = self.sock.accept()
+            yield conn
+
+    def _serve_forking(self):
+        # the SIGCHLD handler does nothing; it's only there so that the wakeup fd is written to when a child exits
+        wakeup_r, wakeup_w = os.pipe()
+        os.set_blocking(wakeup_r, False)
+        os.set_blocking(wakeup_w, False)
+        old_handler = signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+        old_wakeup_fd = signal.set_wakeup_fd(wakeup_w)
+        selector = selectors.DefaultSelector()
+        selector.register(self.sock, selectors.EVENT_READ)
+        selector.register(wakeup_r, selectors.EVENT_READ)
+        try:
+            while True:
+                for key, _ in selector.select():
+                    if key.fileobj is self.sock:
+                        conn, _ = self.sock.accept()
+                        self._fork_child(conn, close_in_child=(wakeup_r, wakeup_w))
+                    else:
+                        try:
+                            os.read(wakeup_r, 1024)
+                        except BlockingIOError:
+                            pass
+                self._reap_children()
+        finally:
+            selector.close()
+            signal.set_wakeup_fd(old_wakeup_fd)
+            signal.signal(signal.SIGCHLD, old_handler)
+            os.close(wakeup_r)
+            os.close(wakeup_w)
+            self._reap_children(block=True)
+
+    def _fork_child(self, conn: socket.socket, close_in_child: Sequence[int] = ()):
+        # anything buffered would otherwise be written by both processes
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid:
+            self._children[pid] = conn
+            return
+
+        code = 1
+        try:
+            signal.set_wakeup_fd(-1)
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            for fd in close_in_child:
+                os.close(fd)
+            self.sock.close()
+            for other in self._children.values():
+                other.close()
+            code = self.handle(conn, send_exit_code=False)
+        finally:
+            # never return into the server loop from a child; code is None for a probe for a running server
+            os._exit(code or 0)
+
+    def _reap_children(self, block: bool = False):
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, 0 if block else os.WNOHANG)
+            except ChildProcessError:
+                break
+            if not pid:
+                break
+            conn = self._children.pop(pid, None)
+            if conn is None:
+                continue
+            if os.WIFSIGNALED(status):
+                # conventional shell exit code for a process killed by a signal
+                code = 128 + os.WTERMSIG(status)
+            else:
+                code = os.WEXITSTATUS(status)
+            with conn:
+                try:
+                    send_message(conn, dict(exit_code=code))
+                except OSError:
+                    pass
+
+    def handle(self, conn: socket.socket, send_exit_code: bool = True) -> Opt[int]:
+        try:
+            request = self._recv_request(conn)
+        except (OSError, EOFError, ValueError) as e:
+            _log_dropped_client(e)
+            return None
+        if request is None:
+            # e.g. a probe for a running server
+            return None
+
+        with self._lock:
+            code = self._handle_request(conn, request)
+
+        if send_exit_code:
+            try:
+                send_message(conn, dict(exit_code=code))
+            except OSError:
+                # client went away
+                pass
+        return code
+
+    def _recv_request(self, conn: socket.socket) -> Opt[Dict]:
+        conn.settimeout(self.request_timeout)
+        request = recv_message(conn)
+        if request is None:
+            return None
+        if not isinstance(request, dict):
+            raise BadRequest("request is not a JSON object")
+        argv = request.get("argv")
+        if not isinstance(argv, list) or not all(isinstance(a, str) for a in argv):
+            raise BadRequest("request has no list of str 'argv'")
+        env = request.get("env")
+        if env is not None and not (
+            isinstance(env, dict)
+            and all(isinstance(v, str) for v in env.values())
+        ):
+            raise BadRequest("request 'env' is not a mapping of str to str")
+        cwd = request.get("cwd")
+        if cwd is not None and not isinstance(cwd, str):
+            raise BadRequest("request 'cwd' is not a str")
+        # the command may take as long as it takes
+        conn.settimeout(None)
+        return request
+
+    def _handle_request(self, conn: socket.socket, request: Mapping) -> int:
+        stdout = _SocketStream(STDOUT, sys.stdout)
+        stderr = _SocketStream(STDERR, sys.stderr)
+        stdout.sock = stderr.sock = conn
+        old_streams = sys.stdin, sys.stdout, sys.stderr
+        old_env = dict(os.environ)
+        old_cwd = os.getcwd()
+        redirected = _redirect_log_handlers(
+            {STDOUT: (sys.stdout, stdout), STDERR: (sys.stderr, stderr)}
+        )
+        try:
+            # stdin isn't forwarded
+            sys.stdin, sys.stdout, sys.stderr = io.StringIO(), stdout, stderr
+            if request.get("env") is not None:
+                os.environ.clear()
+                os.environ.update(request["env"])
+            if request.get("cwd") is not None:
+                os.chdir(request["cwd"])
+
+            return self._run(request["argv"])
+        finally:
+            sys.stdin, sys.stdout, sys.stderr = old_streams
+            os.environ.clear()
+            os.environ.update(old_env)
+            os.chdir(old_cwd)
+            for handler, stream in redirected:
+                handler.setStream(stream)
+            # any handlers configured during the request still reference these; they go back to the real streams
+            stdout.sock = stderr.sock = None
+
+    def _run(self, argv: Sequence[str]) -> int:
+        try:
+            self.run(argv)
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                return e.code or 0
+            print(e.code, file=sys.stderr)
+            return 1
+        except BrokenPipeError:
+            return 1
+        except Exception:
+            traceback.print_exc(file=sys.stderr)
+            return 1
+        return 0
+
+
+def _redirect_log_handlers(
+    streams: Mapping[str, Tuple[object, _SocketStream]]
+) -> List[Tuple[object, object]]:
+    """Point the stream handlers of all loggers that write to the real stdout/stderr (or to the client streams of an
+    earlier request, if logging was configured during it) at the client streams in `streams`, which maps stream name
+    to (real stream, client stream). Returns (handler, old stream) pairs for restoring them."""
+    import logging
+
+    loggers = [logging.getLogger()]
+    loggers.extend(
+        logger
+        for logger in list(logging.Logger.manager.loggerDict.values())
+        if isinstance(logger, logging.Logger)
+    )
+    redirected = []
+    for handler in {h for logger in loggers for h in logger.handlers}:
+        # process-safe handlers write through a wrapped handler
+        handler = getattr(handler, "_handler", handler)
+        if not isinstance(handler, logging.StreamHandler):
+            continue
+        old = handler.stream
+        for name, (real, client) in streams.items():
+            if old is real or (isinstance(old, _SocketStream) and old.name == name):
+                handler.setStream(client)
+                redirected.append((handler, old))
+                break
+    return redirected
+
+
+def _log_dropped_client(e: BaseException):
+    import logging
+
+    logging.getLogger(__name__).warning(
+        "dropped client connection: %s: %s", type(e).__name__, e
+    )
+
+
+def server_is_running(path: str) -> bool:
+    """Return True if a server is listening at `path`"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(path)
+    except OSError:
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    # python -m bourbaki.application.server <socket path or command name> [args...]
+    if len(sys.argv) < 2:
+        print(
+            "usage: python -m {} SOCKET [ARGS ...]".format(__spec__.name),
+            file=sys.stderr,
+        )
+        sys.exit(2)
+    code = run_client(sys.argv[1], sys.argv[2:])
+    if code is None:
+        print("no server is listening at {}".format(sys.argv[1]), file=sys.stderr)
+        sys.exit(2)
+    sys.exit(code)
@@ -10,4 +10,4 @@ from .config_encode import config_encoder, config_key_encoder
 from .config_decode import config_decoder, config_key_decoder
 from .config_repr_ import config_repr
 from .env_parse import env_parser
-from .utils import File
+from .utils import File, LazyFile, MMapFile
@@ -34,7 +34,7 @@ from bourbaki.application.completion.completers import (
     NoComplete,
 )
 from .cli_repr_ import cli_repr
-from .utils import File
+from .utils import File, LazyIterable, MMapFile
 
 NoneType = type(None)
 
@@ -55,6 +55,8 @@ cli_completer.register(pathlib.Path, as_const=True)(CompleteFilesAndDirs())
 
 cli_completer.register(File, as_const=True)(CompleteFiles())
 
+cli_completer.register(MMapFile, as_const=True)(CompleteFiles())
+
 cli_completer.register(typing.Callable, as_const=True)(CompletePythonCallables())
 
 cli_completer.register(NoneType, as_const=True)(NoComplete)
@@ -64,6 +66,7 @@ cli_completer.register_all(enum.Enum, enum.Flag, enum.IntEnum, enum.IntFlag)(
 )
 
 
+@cli_completer.register(LazyIterable)
 @cli_completer.register(NonAnyStrCollection)
 def completer_for_collection(coll, v=None):
     if v is None:
@@ -13,7 +13,7 @@ from bourbaki.introspection.generic_dispatch import (
     GenericTypeLevelSingleDispatch,
     UnknownSignature,
 )
-from .utils import maybe_map
+from .utils import maybe_map, LazyIterable
 from .exceptions import CLIIOUndefined
 
 
@@ -93,6 +93,14 @@ def seq_nargs(*types):
     return ZERO_OR_MORE
 
 
+@cli_nargs.register(LazyIterable)
+def iterable_nargs(t, v=typing.Any):
+    # lazily-parsed Iterator[T] and Iterable[T]; one value per arg, like other collections
+    if cli_nargs(v) is not None:
+        raise NestedCollectionsCLIArgError((t, v))
+    return ZERO_OR_MORE
+
+
 @cli_nargs.register_all(NestedCollectionTypes)
 def nested_collections_cli_error(t, *args):
     # collections of collections
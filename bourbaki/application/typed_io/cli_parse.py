@@ -13,6 +13,8 @@ from inspect import Parameter
 from functools import lru_cache
 from warnings import warn
 from bourbaki.introspection.types import (
+    get_generic_args,
+    get_generic_origin,
     get_named_tuple_arg_types,
     is_named_tuple_class,
     issubclass_generic,
@@ -27,6 +29,7 @@ from bourbaki.introspection.generic_dispatch import (
     DEBUG,
 )
 from bourbaki.introspection.generic_dispatch_helpers import (
+    PicklableWithType,
     CollectionWrapper,
     MappingWrapper,
     UnionWrapper,
@@ -60,6 +63,8 @@ from .utils import (
     Empty,
     identity,
     KEY_VAL_JOIN_CHAR,
+    LazyIterable,
+    MMapFile,
     parser_constructor_for_collection,
 )
 
@@ -318,6 +323,22 @@ class TupleCLIParser(GenericCLIParserMixin, TupleWrapper):
         return (f(a) for f, a in zip(self.funcs, self.iter_chunks(arg)))
 
 
+@cli_parser.register(LazyIterable)
+class IterableCLIParser(PicklableWithType):
+    """Parser for `Iterator[T]` and `Iterable[T]`; values are parsed lazily as the command consumes them, so that
+    '@path' arguments (see `application.cli.cli_spec.arg_files`) may stream more values from files than would fit in
+    memory."""
+
+    def __init__(self, iter_type, val_type=object):
+        if issubclass_generic(val_type, NonStrCollection):
+            raise CLINestedCollectionsNotAllowed((iter_type, val_type))
+        super().__init__(iter_type, val_type)
+        self.parse_element = cli_parser(val_type)
+
+    def __call__(self, args):
+        return map(self.parse_element, args)
+
+
 @cli_parser.register(LazyType)
 class LazyCLIParser(GenericCLIParserMixin, LazyWrapper):
     pass
@@ -335,6 +356,7 @@ def cli_flag_parser(enum_):
 
 # File subclasses are their own parsers
 cli_parser.register(File)(identity)
+cli_parser.register(MMapFile)(identity)
 
 
 cli_parser.register_from_mapping(cli_parse_methods, as_const=True)
@@ -348,3 +370,50 @@ cli_option_parser = GenericTypeLevelSingleDispatch(
 @cli_option_parser.register(typing.Collection[NonStrCollection])
 class CollectionCLIOptionParser(GenericCLIParserMixin, CollectionWrapper):
     pass
+
+
+######################
+# variadic fast path #
+######################
+
+
+class VariadicCLIParser(PicklableWithType):
+    """Parser for homogeneous variable-length collections of single-token values, such as `List[int]`,
+    `Tuple[float, ...]` or `Set[Path]`. These may be passed tens of thousands of values on the command line, so all
+    are converted in one pass rather than through the generic per-element wrappers; the result is the same."""
+
+    def __init__(self, coll_type, parse_element, reduce):
+        super().__init__(coll_type)
+        self.parse_element = parse_element
+        self.reduce = reduce
+
+    def __call__(self, args):
+        return self.reduce(map(self.parse_element, args))
+
+
+def variadic_cli_parser(t) -> typing.Optional[VariadicCLIParser]:
+    """A `VariadicCLIParser` for type `t` if the command line parser registered for it is the generic collection
+    (or variable-length tuple) parser and its elements are single tokens, else None"""
+    try:
+        f = cli_parser.resolve((t,))
+    except (UnknownSignature, TypeError):
+        return None
+
+    args = get_generic_args(t)
+    if f is CollectionCLIParser and len(args) == 1:
+        val_type = args[0]
+    elif f is TupleCLIParser and len(args) == 2 and args[1] is Ellipsis:
+        val_type = args[0]
+    else:
+        return None
+
+    org = get_generic_origin(t)
+    if is_named_tuple_class(org) or issubclass_generic(val_type, NonStrCollection):
+        return None
+    try:
+        if cli_nargs(val_type) is not None:
+            return None
+        parse_element = cli_parser(val_type)
+    except (CLIIOUndefined, UnknownSignature, NotImplementedError):
+        return None
+    return VariadicCLIParser(t, parse_element, parser_constructor_for_collection(org))
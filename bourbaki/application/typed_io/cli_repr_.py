@@ -19,6 +19,7 @@ from .utils import (
     any_repr,
     classpath_function_repr,
     default_repr_values,
+    LazyIterable,
     repr_type,
 )
 from .utils import type_spec, KEY_VAL_JOIN_CHAR, to_str_cli_repr
@@ -115,6 +116,13 @@ def cli_repr_seq(s, t=typing.Any):
     return cli_repr(t)
 
 
+@cli_repr.register(LazyIterable)
+def cli_repr_iterable(i, t=typing.Any):
+    if issubclass_generic(t, NonStrCollection):
+        raise CLINestedCollectionsNotAllowed((i, t))
+    return cli_repr(t)
+
+
 @cli_repr.register(typing.Collection[NonStrCollection])
 @cli_repr.register(typing.Tuple[NonStrCollection, ...])
 def cli_repr_nested_seq(s, t=typing.Any, ellipsis=Ellipsis):
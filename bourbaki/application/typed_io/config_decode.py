@@ -53,7 +53,16 @@ from .exceptions import (
     ConfigCollectionKeysNotAllowed,
     ConfigCallableInputError,
 )
-from .utils import identity, Empty, IODispatch, TypeCheckInput, PicklableWithType, File
+from .utils import (
+    identity,
+    Empty,
+    IODispatch,
+    TypeCheckInput,
+    PicklableWithType,
+    File,
+    MMapFile,
+    LazyIterable,
+)
 from .parsers import TypeCheckImportFunc, TypeCheckImportType
 from .config_repr_ import bytes_config_key_repr
 
@@ -208,6 +217,7 @@ config_decoder.register(Empty, as_const=True)(inflate_config)
 # File subclasses are their own parsers
 config_decoder.register(File)(identity)
 config_key_decoder.register(File)(identity)
+config_decoder.register(MMapFile)(identity)
 
 
 # don't allow inflation for simple JSON-encodable atomic types
@@ -379,6 +389,25 @@ class UnionConfigDecoder(GenericConfigDecoderMixin, UnionWrapper):
     exc_class = ConfigUnionInputError
 
 
+@config_decoder.register(LazyIterable)
+class IterableConfigDecoder(PicklableWithType):
+    """Decoder for `Iterator[T]` and `Iterable[T]` from a list of values; these are decoded lazily as the command
+    consumes them, as they are when passed on the command line"""
+
+    def __init__(self, iter_type, val_type=typing.Any):
+        super().__init__(iter_type, val_type)
+        self.decode_element = config_decoder(val_type)
+
+    def __call__(self, conf):
+        if not isinstance(conf, NonAnyStrCollection):
+            raise ConfigTypedInputError(
+                self.type_,
+                conf,
+                TypeError("{!r} is not a list of values".format(conf)),
+            )
+        return map(self.decode_element, conf)
+
+
 @config_decoder.register(LazyType)
 class LazyConfigDecoder(LazyWrapper):
     getter = config_decoder
@@ -40,6 +40,7 @@ from .utils import (
     Empty,
     identity,
     File,
+    LazyFileHandle,
     IODispatch,
     TypeCheckOutput,
     TypeCheckOutputFunc,
@@ -150,6 +151,8 @@ encode_str_re = attrgetter("pattern")
 def config_file_encode(file: io.IOBase):
     if file in (sys.stdout, sys.stderr, sys.stdin):
         return "-"
+    if isinstance(file, LazyFileHandle) and file.is_std_stream:
+        return "-"
     try:
         name = file.name
     except AttributeError as e:
@@ -11,7 +11,7 @@ from bourbaki.introspection.types import (
     issubclass_generic,
 )
 from bourbaki.introspection.types.abcs import NonStrCollection
-from .cli_parse import cli_parser, cli_option_parser
+from .cli_parse import cli_parser, cli_option_parser, variadic_cli_parser
 from .cli_nargs_ import cli_nargs, cli_option_nargs, cli_action
 from .cli_repr_ import cli_repr
 from .cli_complete import cli_completer
@@ -249,6 +249,10 @@ class TypedIO(PicklableWithType):
 
     @cached_property
     def cli_parser(self):
+        # long lists of scalars are converted in one pass rather than element by element
+        parser = variadic_cli_parser(self.type_)
+        if parser is not None:
+            return parser
         return cli_parser(self.type_)
 
     @cached_property
@@ -372,7 +376,7 @@ class TypedIO(PicklableWithType):
                 variadic = True
                 positional = True
             elif kind == Parameter.KEYWORD_ONLY:
-                variadic = self.is_collection
+                variadic = self.is_collection or self.is_variadic
                 positional = False
             else:
                 # Parameter.POSITIONAL_OR_KEYWORD and Parameter.POSITIONAL_ONLY
@@ -3,9 +3,13 @@ from typing import IO, TextIO, BinaryIO, Sequence, AbstractSet, Union
 import typing
 import datetime
 import enum
+import errno
 import operator
+import os
 import pathlib
 import re
+import stat
+import sys
 from functools import reduce, lru_cache
 from inspect import Parameter
 from argparse import ZERO_OR_MORE, ONE_OR_MORE, OPTIONAL
@@ -18,6 +22,10 @@ Empty = Parameter.empty
 
 NARGS_OPTIONS = (None, ZERO_OR_MORE, ONE_OR_MORE, OPTIONAL)
 
+ARG_FILE_PREFIX = "@"
+STDIN_ARG_FILE = "-"
+_is_arg_file_ref = operator.methodcaller("startswith", ARG_FILE_PREFIX)
+
 
 class TypedIOException(ValueError):
     def __init__(self, type_, value):
@@ -39,6 +47,18 @@ class TypedIOConfigReprError(TypedIOException):
         )
 
 
+class ArgFileError(ValueError):
+    def __init__(self, path, exc):
+        super().__init__(path, exc)
+        self.path = path
+        self.exc = exc
+
+    def __str__(self):
+        return "could not read argument file {}: {}".format(
+            repr(str(self.path)), self.exc
+        )
+
+
 bool_constants = {"true": True, "false": False}
 
 
@@ -65,6 +85,85 @@ def parse_path(s: str):
     return pathlib.Path(s)
 
 
+def iter_arg_file(path: Union[str, pathlib.Path]) -> typing.Iterator[str]:
+    """Lazily read the values in an argument file, one per line, or from stdin if `path` is '-'. Blank lines are
+    skipped."""
+    if str(path) == STDIN_ARG_FILE:
+        lines = sys.stdin
+        close = False
+    else:
+        try:
+            lines = open(path, "r")
+        except OSError as e:
+            raise ArgFileError(path, e) from e
+        close = True
+
+    try:
+        for line in lines:
+            line = line.rstrip("\r\n")
+            if line:
+                yield line
+    finally:
+        if close:
+            lines.close()
+
+
+def expand_arg_files(args: typing.Iterable[str]) -> typing.Iterable[str]:
+    """Replace each '@path' in `args` with the values in the file at `path` (stdin for '@-'), streamed line by line
+    rather than read into memory. '@@value' passes the literal value '@value'."""
+    if isinstance(args, (list, tuple)):
+        try:
+            # one pass at C speed in the usual case of no '@' args; long argument lists are returned as they are
+            if not any(map(_is_arg_file_ref, args)):
+                return args
+        except AttributeError:
+            # not all strings
+            pass
+    return _expand_arg_files(args)
+
+
+def check_arg_files(args: Sequence[str], stdin_read: bool = False) -> bool:
+    """Raise `ArgFileError` if any '@path' in `args` refers to a file that can't be read, so that a bad reference is
+    reported before any values are consumed. Files aren't opened here, since that would drain a named pipe before it is
+    read. stdin can only be read once, so '@-' may appear at most once, and not at all if `stdin_read`. Return whether
+    `args` read stdin."""
+    if not any(map(_is_arg_file_ref, args)):
+        return False
+    reads_stdin = False
+    for arg in args:
+        if arg.startswith(ARG_FILE_PREFIX) and not arg.startswith(ARG_FILE_PREFIX, 1):
+            path = arg[1:]
+            if path != STDIN_ARG_FILE:
+                _check_readable(path)
+            elif stdin_read or reads_stdin:
+                raise ArgFileError(
+                    path, ValueError("stdin can back only one '@-' reference")
+                )
+            else:
+                reads_stdin = True
+    return reads_stdin
+
+
+def _check_readable(path: str):
+    try:
+        if stat.S_ISDIR(os.stat(path).st_mode):
+            raise IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), path)
+        if not os.access(path, os.R_OK):
+            raise PermissionError(errno.EACCES, os.strerror(errno.EACCES), path)
+    except OSError as e:
+        raise ArgFileError(path, e) from e
+
+
+def _expand_arg_files(args):
+    for arg in args:
+        if isinstance(arg, str) and arg.startswith(ARG_FILE_PREFIX):
+            arg = arg[1:]
+            if not arg.startswith(ARG_FILE_PREFIX):
+                yield from iter_arg_file(arg)
+                continue
+        yield arg
+
+
 def parse_iso_date(s):
     return datetime.datetime.strptime(s, "%Y-%m-%d").date()
 
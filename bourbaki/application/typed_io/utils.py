@@ -1,6 +1,7 @@
 # coding:utf-8
 from typing import Union, Optional, TextIO, BinaryIO, IO
-from argparse import FileType, ZERO_OR_MORE, ONE_OR_MORE, OPTIONAL
+from argparse import ArgumentTypeError, FileType, ZERO_OR_MORE, ONE_OR_MORE, OPTIONAL
+import collections.abc
 import io
 import typing
 import types
@@ -9,7 +10,9 @@ import decimal
 import encodings
 import fractions
 import ipaddress
+import mmap
 import numbers
+import os
 import pathlib
 import sys
 import uuid
@@ -37,6 +40,7 @@ Doc = Union[CallableDocs, ParamDocs, ParamDoc]
 READ_MODES = {"r", "rb", "r+", "rb+", "a+", "ab+", "wb+"}
 WRITE_MODES = {"w", "wb", "w+", "wb+", "a", "ab", "a+", "ab+", "rb+", "x", "xb"}
 FILE_MODES = READ_MODES.union(WRITE_MODES)
+MMAP_MODES = {"r": mmap.ACCESS_READ, "r+": mmap.ACCESS_WRITE}
 
 NARGS_OPTIONS = (ZERO_OR_MORE, ONE_OR_MORE, OPTIONAL, None)
 CLI_PREFIX_CHAR = "-"
@@ -96,6 +100,15 @@ class _FileHandleConstructor(PseudoGenericMeta):
     def binary(cls):
         return "b" in cls.mode
 
+    @property
+    def lazy(cls):
+        """The `LazyFile` type with the same mode and encoding as this one"""
+        if cls.mode is None:
+            return LazyFile
+        if cls.encoding is None:
+            return LazyFile[cls.mode]
+        return LazyFile[cls.mode, cls.encoding]
+
     @property
     def mode(cls):
         if not cls.__args__:
@@ -131,6 +144,219 @@ class BinaryFile(File):
         return super().__new__(cls, path)
 
 
+class LazyFileHandle:
+    """A file which is opened on first use rather than when the command line is parsed, with '-' standing for
+    stdin/stdout as for `File`. Attribute access is passed to the open file. Iterating reads to the end and then
+    closes the file, as does leaving a `with` block, so that commands taking many files hold only one open at a time.
+    """
+
+    def __init__(self, path, mode: str = "r", encoding: Optional[str] = None):
+        self.name = str(path)
+        self.mode = mode
+        self.encoding = encoding
+        self._file = None
+
+    def __repr__(self):
+        return "{}({}, mode={}{})".format(
+            type(self).__name__,
+            repr(self.name),
+            repr(self.mode),
+            ""
+            if self.encoding is None
+            else ", encoding={}".format(repr(self.encoding)),
+        )
+
+    @property
+    def is_std_stream(self) -> bool:
+        return self.name == "-"
+
+    @property
+    def opened(self) -> bool:
+        return self._file is not None
+
+    @property
+    def file(self) -> IO:
+        """The open file, opening it if this is the first use"""
+        if self._file is None:
+            if self.is_std_stream:
+                stream = sys.stdin if is_read_mode(self.mode) else sys.stdout
+                self._file = stream.buffer if is_binary_mode(self.mode) else stream
+            else:
+                self._file = open(self.name, self.mode, encoding=self.encoding)
+        return self._file
+
+    def close(self):
+        # stdin/stdout are left open for the rest of the process
+        if self._file is not None and not self.is_std_stream:
+            self._file.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._file is None or self._file.closed
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return getattr(self.file, attr)
+
+    def __iter__(self):
+        file = self.file
+        try:
+            yield from file
+        finally:
+            self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class _LazyFileHandleConstructor(_FileHandleConstructor):
+    def __getitem__(cls, mode_enc) -> type:
+        if isinstance(mode_enc, tuple):
+            mode, encoding = mode_enc
+        else:
+            mode, encoding = mode_enc, None
+
+        if cls.mode is not None or cls.encoding is not None:
+            raise TypeError(
+                "Can't subscript LazyFile more than once; tried to subscript {} with {}".format(
+                    repr(cls), mode_enc
+                )
+            )
+        mode, encoding, is_binary, _ = _file_args(mode, encoding)
+        # cached on the normalized mode and encoding so that e.g. LazyFile['r'] is File['r'].lazy
+        return _lazy_file_type(mode, encoding, is_binary)
+
+    @property
+    def lazy(cls):
+        return cls
+
+    def __instancecheck__(cls, instance):
+        return isinstance(instance, LazyFileHandle) and (
+            cls.mode is None or instance.mode == cls.mode
+        )
+
+
+class LazyFile(File, metaclass=_LazyFileHandleConstructor):
+    """Like `File`, but parses to a `LazyFileHandle` which opens the file on first use. `LazyFile['r']`,
+    `LazyFile['wb']`, `LazyFile['r', 'utf-8']` etc. specify the mode and encoding; `File[...].lazy` is the same."""
+
+    def __new__(cls, path) -> LazyFileHandle:
+        return LazyFileHandle(path, cls.mode or "r", encoding=cls.encoding)
+
+
+@lru_cache(None)
+def _lazy_file_type(mode: str, encoding: Optional[str], is_binary: bool) -> type:
+    base = BinaryFile if is_binary else TextFile
+    return type.__new__(
+        type(LazyFile),
+        LazyFile.__name__,
+        (LazyFile, base),
+        dict(__args__=(mode, encoding), __origin__=LazyFile),
+    )
+
+
+class _MMapConstructor(PseudoGenericMeta):
+    @lru_cache(None)
+    def __getitem__(cls, mode) -> type:
+        if cls.mode is not None:
+            raise TypeError(
+                "Can't subscript MMapFile more than once; tried to subscript {} with {}".format(
+                    repr(cls), mode
+                )
+            )
+        if mode not in MMAP_MODES:
+            raise ValueError(
+                "{} is not a valid memory-map mode; choose one of {}".format(
+                    repr(mode), tuple(MMAP_MODES)
+                )
+            )
+        return type.__new__(
+            type(cls), cls.__name__, (cls,), dict(__args__=(mode,), __origin__=MMapFile)
+        )
+
+    def __repr__(cls):
+        if cls.mode:
+            return "{}[{}]".format(cls.__name__, repr(cls.mode))
+        return cls.__name__
+
+    @property
+    def mode(cls):
+        if not cls.__args__:
+            return None
+        return cls.__args__[0]
+
+    @property
+    def writable(cls):
+        return cls.mode == "r+"
+
+    def __instancecheck__(cls, instance):
+        if not isinstance(instance, mmap.mmap):
+            return False
+        if cls.mode is None:
+            return True
+        try:
+            with memoryview(instance) as view:
+                readonly = view.readonly
+        except ValueError:
+            # closed
+            return False
+        return readonly != cls.writable
+
+
+class MMapFile(metaclass=_MMapConstructor):
+    """Memory-mapped file, parsed from a path: `MMapFile['r']` is a read-only `mmap.mmap` over the whole file and
+    `MMapFile['r+']` a writable one whose writes go through to the file; unsubscripted, the map is read-only.
+    Pages are read on demand, so large binary inputs needn't fit in memory. The file itself is closed once it is
+    mapped. Empty files can't be memory-mapped, so they're rejected like missing ones."""
+
+    mode = None
+
+    def __new__(cls, path) -> mmap.mmap:
+        mode = cls.mode or "r"
+        if str(path) == "-":
+            raise ArgumentTypeError(
+                "stdin/stdout can't be memory-mapped; pass a file path"
+            )
+        try:
+            f = open(path, "rb" if mode == "r" else "r+b")
+        except OSError as e:
+            raise ArgumentTypeError("can't open '{}': {}".format(path, e))
+        with f:
+            if not os.fstat(f.fileno()).st_size:
+                raise ArgumentTypeError(
+                    "can't memory-map '{}': the file is empty".format(path)
+                )
+            # length 0 maps the whole file
+            return mmap.mmap(f.fileno(), 0, access=MMAP_MODES[mode])
+
+
+_lazy_iterable_types = (
+    typing.Iterable,
+    typing.Iterator,
+    collections.abc.Iterable,
+    collections.abc.Iterator,
+)
+
+
+class _LazyIterableMeta(type):
+    def __instancecheck__(cls, instance):
+        return cls.__subclasscheck__(type(instance))
+
+    def __subclasscheck__(cls, subclass):
+        return subclass is cls or subclass in _lazy_iterable_types
+
+
+class LazyIterable(metaclass=_LazyIterableMeta):
+    """Matches `Iterator[T]` and `Iterable[T]` annotations but not concrete collections (which are also iterable);
+    arguments for these are parsed lazily as the command consumes them"""
+
+    pass
+
+
 class PositionalMetavarFormatter:
     """Hack to deal with the fact that argparse doesn't allow tuples for positional arg metavars 
     (in contrast to the behavior for options)"""
@@ -338,6 +564,7 @@ regex_bytes_repr = "<byte-regex>"
 date_repr = "YYYY-MM-DD"
 path_repr = "<path>"
 binary_path_repr = "<binary-file>"
+mmap_path_repr = "<mmap-file>"
 text_path_repr = "<text-file>"
 classpath_type_repr = "path.to.type[params]"
 classpath_function_repr = "path.to.function"
@@ -370,6 +597,7 @@ default_repr_values = {
     File: path_repr,
     BinaryFile: binary_path_repr,
     TextFile: text_path_repr,
+    MMapFile: mmap_path_repr,
     typing.Pattern: regex_repr,
     typing.Pattern[bytes]: regex_bytes_repr,
     ipaddress.IPv4Address: ipv4_repr,
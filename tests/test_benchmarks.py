@@ -0,0 +1,31 @@
+# coding:utf-8
+from pathlib import Path
+import sys
+
+top_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(top_dir / "benchmarks"))
+from bench_cli import METRICS, PARAM_KINDS, compare, run_benchmarks
+import bench_variadic
+
+
+def test_benchmarks_run():
+    # one of each param kind
+    results = run_benchmarks(["2x{}".format(len(PARAM_KINDS))], repeat=1)
+    size = "2x{}".format(len(PARAM_KINDS))
+    assert set(results) == {size}
+    assert set(results[size]) == set(METRICS)
+    assert all(value > 0 for value in results[size].values())
+
+    assert compare(results, results, threshold=1.0) == []
+    halved = {size: {k: v / 2 for k, v in results[size].items()}}
+    regressions = compare(results, halved, threshold=1.5)
+    assert sorted(r[1] for r in regressions) == sorted(METRICS)
+
+
+def test_variadic_benchmarks_run():
+    results = bench_variadic.run_benchmarks([10, 100], repeat=1)
+    assert set(results) == {kind.command for kind in bench_variadic.KINDS}
+    assert all(set(times) == {10, 100} for times in results.values())
+    assert all(t > 0 for times in results.values() for t in times.values())
+    assert bench_variadic.scaling({10: 1.0, 100: 10.0}) == 1.0
+    assert bench_variadic.scaling({10: 1.0, 100: 100.0}) == 10.0
@@ -1,10 +1,16 @@
+import argparse
 from io import StringIO
 from fractions import Fraction
 from itertools import cycle
+import json
 from operator import itemgetter
 from pathlib import Path
+import os
 import pickle
 from random import choices
+import subprocess
+import textwrap
+from typing import List
 
 from cytoolz import assoc, groupby, valmap
 import pytest
@@ -24,6 +30,31 @@ def maybe(key):
     return OPTIONAL_ARG_TEMPLATE.format(key)
 
 
+def subprocess_env(*paths, **env_vars) -> dict:
+    """os.environ with this package and `paths` importable, updated with `env_vars`"""
+    pythonpath = os.pathsep.join(map(str, [*paths, DIR.parent, *sys.path]))
+    return {**os.environ, "PYTHONPATH": pythonpath, **env_vars}
+
+
+def write_script(path: Path, source: str, **format_kwargs) -> Path:
+    if format_kwargs:
+        source = source.format(**format_kwargs)
+    path.write_text(textwrap.dedent(source))
+    return path
+
+
+def run_script(*args, env=None, code=0) -> subprocess.CompletedProcess:
+    """Run `python *args` in a subprocess, asserting its exit code and capturing stdout and stderr"""
+    result = subprocess.run(
+        [sys.executable, *map(str, args)],
+        env=subprocess_env() if env is None else env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    assert result.returncode == code, result.stderr
+    return result
+
+
 output_args = {
     "pretty": False,
     "literal": False,
@@ -235,3 +266,1547 @@ def test_cli_parses_env(monkeypatch):
     ns = cli.run(['print', 'ns'])
     assert ns['b'] == [Fraction(1, 2), 34, 56]
     monkeypatch.delenv('CLI_ARG_B')
+
+
+CACHED_CLI_SOURCE = """
+from typing import List
+from bourbaki.application.cli import CommandLineInterface
+
+cli = CommandLineInterface(
+    prog="cached.py",
+    require_subcommand=True,
+    source_file=__file__,
+    add_install_bash_completion_flag=False,
+    cache_definition={cache_path},
+)
+
+def show(value):
+    print(value)
+
+@cli.subcommand(output_handler=show)
+def add(a: int, b: List[int] = ()):
+    return a + sum(b)
+
+if __name__ == "__main__":
+    cli.run()
+"""
+
+
+def test_cli_definition_cache(tmp_path):
+    cache_path = tmp_path / "cache" / "cached.pkl"
+    source = write_script(
+        tmp_path / "cached.py", CACHED_CLI_SOURCE, cache_path=repr(str(cache_path))
+    )
+
+    def run():
+        return run_script(source, "add", "-a", "1", "-b", "2", "3").stdout
+
+    assert run() == b"6\n"
+    assert cache_path.exists()
+    cache_mtime = cache_path.stat().st_mtime
+    # loaded, not rewritten
+    assert run() == b"6\n"
+    assert cache_path.stat().st_mtime == cache_mtime
+
+
+HELP_CACHED_CLI_SOURCE = """
+import sys
+from bourbaki.application.cli import CommandLineInterface
+
+cli = CommandLineInterface(
+    prog="help_cached.py",
+    source_file=__file__,
+    add_install_bash_completion_flag=False,
+    cache_help={cache_path},
+)
+print("defining", file=sys.stderr)
+
+@cli.subcommand(command_prefix="math")
+def add(a: int, b: int):
+    \"\"\"add two ints\"\"\"
+    print(a + b)
+
+if __name__ == "__main__":
+    cli.run()
+"""
+
+
+def test_cli_help_cache(tmp_path):
+    cache_path = tmp_path / "cache" / "help.json"
+    source = write_script(
+        tmp_path / "help_cached.py",
+        HELP_CACHED_CLI_SOURCE,
+        cache_path=repr(str(cache_path)),
+    )
+    env = subprocess_env(COLUMNS="100")
+
+    def run(*args):
+        result = run_script(source, *args, env=env)
+        return result.stdout, result.stderr
+
+    help_text, stderr = run("math", "add", "-h")
+    assert b"add two ints" in help_text
+    assert stderr == b"defining\n"
+    assert cache_path.exists()
+
+    # answered without defining any commands
+    assert run("math", "add", "-h") == (help_text, b"")
+    assert run("--help")[1] == b""
+    # not a bare help request
+    assert run("math", "add", "-a", "1", "-b", "2") == (b"3\n", b"defining\n")
+    # a different width isn't cached yet
+    env = subprocess_env(COLUMNS="60")
+    assert run("math", "add", "-h")[1] == b"defining\n"
+    assert run("math", "add", "-h")[1] == b""
+
+
+HELP_CACHED_PLUGIN_CLI_SOURCE = """
+import sys
+from bourbaki.application.cli import CommandLineInterface
+
+cli = CommandLineInterface(
+    prog="help_plugins.py",
+    source_file=__file__,
+    require_subcommand=True,
+    add_install_bash_completion_flag=False,
+    cache_help={cache_path},
+)
+print("defining", file=sys.stderr)
+cli.add_plugin_command("greet", "help_plugin:greet", help="greet someone")
+
+if __name__ == "__main__":
+    cli.run()
+"""
+
+HELP_PLUGIN_SOURCE = """
+import sys
+print("importing plugin", file=sys.stderr)
+
+def greet(name: str):
+    \"\"\"{doc}\"\"\"
+    print("hello", name)
+"""
+
+
+def test_cli_help_cache_plugins(tmp_path):
+    cache_path = tmp_path / "cache" / "help.json"
+    source = write_script(
+        tmp_path / "help_plugins.py",
+        HELP_CACHED_PLUGIN_CLI_SOURCE,
+        cache_path=repr(str(cache_path)),
+    )
+    plugin = write_script(tmp_path / "help_plugin.py", HELP_PLUGIN_SOURCE, doc="say hi")
+    env = subprocess_env(tmp_path, COLUMNS="100")
+
+    def run(*args):
+        result = run_script(source, *args, env=env)
+        return result.stdout, result.stderr
+
+    # the top-level help doesn't import plugins, when rendered or cached
+    help_text, stderr = run("--help")
+    assert b"greet someone" in help_text
+    assert stderr == b"defining\n"
+    assert run("--help") == (help_text, b"")
+
+    help_text, stderr = run("greet", "--help")
+    assert b"say hi" in help_text
+    assert stderr == b"defining\nimporting plugin\n"
+    assert run("greet", "--help") == (help_text, b"")
+
+    # the plugin's help is stale once its source changes
+    write_script(plugin, HELP_PLUGIN_SOURCE, doc="say hello")
+    mtime = os.stat(plugin).st_mtime + 10
+    os.utime(plugin, (mtime, mtime))
+    help_text, stderr = run("greet", "--help")
+    assert b"say hello" in help_text
+    assert stderr == b"defining\nimporting plugin\n"
+    assert run("greet", "--help") == (help_text, b"")
+
+
+def test_cli_help_cache_in_process(tmp_path, monkeypatch, capsys):
+    from bourbaki.application.cli import CommandLineInterface
+
+    cache_path = tmp_path / "help.json"
+    source_file = tmp_path / "app.py"
+    source_file.write_text("")
+
+    def make_cli():
+        cli = CommandLineInterface(
+            prog="app.py",
+            source_file=str(source_file),
+            add_install_bash_completion_flag=False,
+            cache_help=str(cache_path),
+        )
+
+        @cli.subcommand()
+        def add(a: int, b: int):
+            """add two ints"""
+            return a + b
+
+        return cli
+
+    monkeypatch.setenv("COLUMNS", "100")
+    with pytest.raises(SystemExit):
+        make_cli().parse_args(["add", "-h"])
+    help_text = capsys.readouterr().out
+    assert "add two ints" in help_text
+    assert cache_path.exists()
+
+    # the process's args are ignored when constructing a CLI outside of __main__
+    monkeypatch.setattr(sys, "argv", ["app.py", "add", "-h"])
+    cli = make_cli()
+    assert cli.run(["add", "-a", "1", "-b", "2"]) == 3
+    # the args actually passed are answered from the cache
+    with pytest.raises(SystemExit):
+        cli.parse_args(["add", "-h"])
+    assert capsys.readouterr().out == help_text
+
+
+CODEGEN_CLI_SOURCE = """
+from typing import List
+from bourbaki.application.cli import CommandLineInterface
+
+cli = CommandLineInterface(
+    prog="codegen_app.py",
+    require_subcommand=True,
+    use_execution_flag=True,
+    add_install_bash_completion_flag=False,
+)
+
+@cli.subcommand(command_prefix="math")
+def add(a: int, b: List[int] = ()):
+    \"\"\"add ints\"\"\"
+    print(a + sum(b))
+
+@cli.subcommand()
+def whoami():
+    \"\"\"report how this module was loaded\"\"\"
+    print(type(add).__name__)
+"""
+
+
+def test_cli_codegen(tmp_path):
+    write_script(tmp_path / "codegen_app.py", CODEGEN_CLI_SOURCE)
+    entry_point = tmp_path / "codegen_main.py"
+    env = subprocess_env(tmp_path, COLUMNS="100")
+
+    def run(*args, code=0):
+        return run_script(*args, env=env, code=code).stdout
+
+    run(
+        "-m", "bourbaki.application.cli.codegen", "codegen_app:cli",
+        "-o", str(entry_point),
+    )
+    original_help = run(
+        "-c", "import codegen_app; codegen_app.cli.run(['math', 'add', '-h'])"
+    )
+    assert run(str(entry_point), "math", "add", "-h") == original_help
+    # help and argument errors never import the library
+    imported = run(
+        "-c",
+        "import sys, codegen_main\n"
+        "try:\n"
+        "    codegen_main.main(['-h'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print('bourbaki' in sys.modules)",
+    )
+    assert imported.endswith(b"False\n")
+    run(str(entry_point), "math", "sub", code=2)
+
+    assert run(str(entry_point), "math", "add", "-a", "1", "-b", "2", "3") == b"6\n"
+    # the command module is imported with its decorators passed through
+    assert run(str(entry_point), "-x", "whoami") == b"function\n"
+
+
+def test_cli_lazy_subparsers(capsys):
+    from bourbaki.application.cli import CommandLineInterface
+
+    lazy_cli = CommandLineInterface(
+        prog="lazy.py",
+        require_subcommand=True,
+        lazy_subparsers=True,
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+    )
+
+    @lazy_cli.subcommand()
+    def add(a: int, b: List[int] = ()):
+        return a + sum(b)
+
+    @lazy_cli.subcommand(command_prefix="neg")
+    def int_(a: int):
+        return -a
+
+    def n_actions(*cmd_path):
+        return len(lazy_cli.get_subcommand_func(cmd_path)[1].parser._actions)
+
+    # only the help action before the parser is used
+    assert n_actions("add") == n_actions("neg", "int") == 1
+    assert lazy_cli.run(["add", "-a", "1", "-b", "2", "3"]) == 6
+    assert n_actions("add") > 1
+    assert n_actions("neg", "int") == 1
+
+    with pytest.raises(SystemExit):
+        lazy_cli.run(["neg", "int", "--help"])
+    assert "-a <int>" in capsys.readouterr().out
+    assert lazy_cli.run(["neg", "int", "-a", "3"]) == -3
+
+
+PLUGIN_SOURCE = """
+from typing import List
+
+def add(a: int, b: List[int] = ()):
+    \"\"\"add ints\"\"\"
+    return a + sum(b)
+
+def negate(x: float):
+    \"\"\"negate a number\"\"\"
+    return -x
+"""
+
+
+def test_cli_plugin_commands(tmp_path, monkeypatch, capsys):
+    from bourbaki.application.cli import CommandLineInterface
+
+    write_script(tmp_path / "cli_plugin_math.py", PLUGIN_SOURCE)
+    # an installed distribution advertising the plugins as entry points
+    dist_info = tmp_path / "cli_plugins-0.1.dist-info"
+    dist_info.mkdir()
+    (dist_info / "METADATA").write_text("Name: cli-plugins\nVersion: 0.1\n")
+    (dist_info / "entry_points.txt").write_text(
+        "[bourbaki_test.commands]\nmath neg = cli_plugin_math:negate\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    plugin_cli = CommandLineInterface(
+        prog="plugins.py",
+        require_subcommand=True,
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+    )
+    plugin_cli.add_plugin_command("math add", "cli_plugin_math:add", help="add ints")
+    plugin_cli.add_entry_point_commands(
+        "bourbaki_test.commands", help={"math neg": "negate a number"}
+    )
+    with pytest.raises(NameError):
+        plugin_cli.add_plugin_command("math add", "cli_plugin_math:add")
+
+    with pytest.raises(SystemExit):
+        plugin_cli.run(["math", "--help"])
+    out = capsys.readouterr().out
+    assert "add ints" in out and "negate a number" in out
+    assert "cli_plugin_math" not in sys.modules
+
+    assert plugin_cli.run(["math", "add", "-a", "1", "-b", "2", "3"]) == 6
+    assert "cli_plugin_math" in sys.modules
+    assert set(plugin_cli._plugin_commands) == {("math", "neg")}
+    with pytest.raises(SystemExit):
+        plugin_cli.run(["math", "neg", "--help"])
+    assert "-x <float>" in capsys.readouterr().out
+    assert plugin_cli.run(["math", "neg", "-x", "2"]) == -2.0
+    assert dict(plugin_cli.all_subcommands("math")).keys() == {
+        ("math", "add"),
+        ("math", "neg"),
+    }
+    monkeypatch.delitem(sys.modules, "cli_plugin_math")
+
+
+def test_cli_plugin_commands_init_config(tmp_path, monkeypatch, capsys):
+    from bourbaki.application.cli import CommandLineInterface
+
+    write_script(tmp_path / "cli_plugin_config.py", PLUGIN_SOURCE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    plugin_cli = CommandLineInterface(
+        prog="plugins.py",
+        require_subcommand=True,
+        use_config_file=True,
+        add_init_config_command=True,
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+    )
+    plugin_cli.add_plugin_command("math add", "cli_plugin_config:add")
+    plugin_cli.add_plugin_command("math neg", "cli_plugin_config:negate")
+    plugin_cli.add_plugin_command("broken", "cli_plugin_missing:broken")
+
+    @plugin_cli.subcommand()
+    def echo(x: str):
+        return x
+
+    assert plugin_cli.run(["echo", "-x", "hi"]) == "hi"
+    assert "cli_plugin_config" not in sys.modules
+    with pytest.raises(SystemExit):
+        plugin_cli.run(["init", "config", "--help"])
+    help_text = " ".join(capsys.readouterr().out.split())
+    assert "'math add'" in help_text and "'math neg'" in help_text
+    assert "cli_plugin_config" not in sys.modules
+
+    # a plugin that fails to import is a usage error for that command only
+    with pytest.raises(SystemExit) as e:
+        plugin_cli.run(["broken"])
+    assert e.value.code == 2
+    err = capsys.readouterr().err
+    assert "could not import command 'broken' from cli_plugin_missing:broken" in err
+    assert plugin_cli.run(["math", "neg", "-x", "2"]) == -2.0
+
+    plugin_cli.run(
+        ["init", "config", "--only-commands", "math add", "--format", "json"]
+    )
+    config = json.loads(capsys.readouterr().out)
+    assert list(config) == ["math"] and list(config["math"]) == ["add"]
+    monkeypatch.delitem(sys.modules, "cli_plugin_config")
+
+
+def test_cli_binding_plan(monkeypatch):
+    from bourbaki.application.cli import CommandLineInterface
+    from bourbaki.application.cli.main import RepeatedCLIKeywordArgs
+
+    bind_cli = CommandLineInterface(
+        prog="bind.py",
+        require_subcommand=True,
+        use_config_file=True,
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+    )
+    shown = []
+
+    def show(value, prefix: str = ">"):
+        shown.append((prefix, value))
+
+    @bind_cli.subcommand(parse_env={"b": "BIND_B"}, output_handler=show)
+    def bind(a: int, *rest: float, b: List[int] = (), c: str = "c", **kw: int):
+        return a, rest, b, c, kw
+
+    func = bind_cli.get_subcommand_func(("bind",))[1]
+
+    def prepare(*args, config=None):
+        ns = bind_cli.parse_args(["bind", *args])
+        return func.prepare_args_kwargs(ns, config=config)
+
+    # command line and defaults; named positionals are bound ahead of *args
+    assert prepare("-a", "1", "--rest", "2.5", "3", "--kw", "x=1") == (
+        (1, 2.5, 3.0),
+        {"b": (), "c": "c", "x": 1},
+        (">",),
+        {},
+    )
+    # config fills in for the main and output signatures
+    assert prepare("-a", "1", config={"bind": {"c": "conf", "prefix": "#"}}) == (
+        (1,),
+        {"b": (), "c": "conf"},
+        ("#",),
+        {},
+    )
+    # environment takes precedence over config, command line over both
+    monkeypatch.setenv("BIND_B", "4 5")
+    config = {"bind": {"b": [6], "kw": {"y": 2}}}
+    assert prepare("-a", "1", config=config)[:2] == (
+        (1,),
+        {"b": [4, 5], "c": "c", "y": 2},
+    )
+    assert prepare("-a", "1", "-b", "7", config=config)[1]["b"] == [7]
+    monkeypatch.delenv("BIND_B")
+    assert prepare("-a", "1", config=config)[1]["b"] == [6]
+
+    with pytest.raises(ValueError, match=r"\['a'\]"):
+        prepare("-c", "x")
+    with pytest.raises(RepeatedCLIKeywordArgs):
+        prepare("-a", "1", "--kw", "c=1")
+
+    # plans are dropped from the pickled state and recompiled on load
+    import copy
+
+    assert "main_binding_plan" not in func.__getstate__()
+    func_ = copy.copy(func)
+    assert func_.main_binding_plan is not func.main_binding_plan
+    ns = bind_cli.parse_args(["bind", "-a", "1", "--rest", "2", "--kw", "z=3"])
+    assert func_.prepare_args_kwargs(ns) == func.prepare_args_kwargs(ns)
+
+    assert bind_cli.run(["bind", "-a", "1", "--prefix", "#"]) == (1, (), (), "c", {})
+    assert shown == [("#", (1, (), (), "c", {}))]
+
+
+def test_cli_run_many(tmp_path, capsys):
+    from bourbaki.application.cli import CommandLineInterface
+
+    batch_cli = CommandLineInterface(
+        prog="batch.py",
+        require_subcommand=True,
+        use_batch_flag=True,
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+    )
+
+    @batch_cli.subcommand()
+    def add(a: int, b: List[int] = ()):
+        return a + sum(b)
+
+    results = batch_cli.run_many(["add -a 1 -b 2 3", ["add", "-a", "x"], "nope"])
+    assert [r.success for r in results] == [True, False, False]
+    assert results[0].result == 6
+    assert isinstance(results[1].error, ValueError)
+    assert results[2].exit_code == 2
+    assert all(r.time >= 0 for r in results)
+
+    argvs = ["add -a {}".format(i) for i in range(10)] + ["add -a x"]
+    results = batch_cli.run_many(argvs, nproc=2, chunksize=3)
+    assert [r.index for r in results] == list(range(11))
+    assert [r.result for r in results] == [*range(10), None]
+    assert not results[-1].success
+
+    batch_file = tmp_path / "batch.txt"
+    batch_file.write_text('add -a 1\n# a comment\n\n["add", "-a", "2", "-b", "3"]\n')
+    results = batch_cli.run(["--batch", str(batch_file)])
+    assert [r.result for r in results] == [1, 5]
+
+    batch_file.write_text("add -a 1\nadd -a x\n")
+    with pytest.raises(SystemExit):
+        batch_cli.run(["--batch", str(batch_file)])
+
+
+SERVED_CLI_SOURCE = """
+import logging
+import os
+from bourbaki.application.cli import CommandLineInterface
+
+cli = CommandLineInterface(
+    prog="served.py",
+    require_subcommand=True,
+    use_serve_flag=True,
+    add_install_bash_completion_flag=False,
+)
+COUNT = 0
+
+@cli.subcommand()
+def count():
+    global COUNT
+    COUNT += 1
+    print(COUNT)
+
+@cli.subcommand()
+def env(name: str):
+    print(os.environ.get(name))
+
+@cli.subcommand()
+def fail():
+    raise ValueError("fail")
+
+@cli.subcommand()
+def log(msg: str):
+    logging.getLogger("served.py").error(msg)
+
+if __name__ == "__main__":
+    cli.run()
+"""
+
+
+@pytest.mark.parametrize("fork", [False, True])
+def test_cli_serve(tmp_path, capfd, fork):
+    import time
+    from bourbaki.application.server import run_client, server_is_running
+
+    source = write_script(tmp_path / "served.py", SERVED_CLI_SOURCE)
+    socket_path = str(tmp_path / "served.sock")
+    assert run_client(socket_path, ["env", "--name", "FOO"]) is None
+
+    server_log = tmp_path / "server.log"
+    server = subprocess.Popen(
+        [sys.executable, str(source), "--serve", socket_path]
+        + (["--serve-fork"] if fork else []),
+        env=subprocess_env(),
+        stderr=server_log.open("w"),
+    )
+    try:
+        for _ in range(100):
+            if server_is_running(socket_path):
+                break
+            time.sleep(0.1)
+
+        code = run_client(socket_path, ["env", "--name", "FOO"], env={"FOO": "bar"})
+        assert code == 0
+        assert capfd.readouterr().out == "bar\n"
+        assert run_client(socket_path, ["fail"]) == 1
+        assert "ValueError: fail" in capfd.readouterr().err
+        assert run_client(socket_path, ["nope"]) == 2
+        counts = []
+        for _ in range(2):
+            assert run_client(socket_path, ["count"]) == 0
+            counts.append(capfd.readouterr().out)
+        # forked children can't leak state into later commands
+        assert counts == (["1\n", "1\n"] if fork else ["1\n", "2\n"])
+        # logs go to the client of each request, not the server's stderr
+        for msg in ["logged1", "logged2"]:
+            assert run_client(socket_path, ["log", "--msg", msg]) == 0
+            assert msg in capfd.readouterr().err
+    finally:
+        server.terminate()
+        server.wait()
+    assert "logged" not in server_log.read_text()
+
+
+def test_server_socket_security(tmp_path, monkeypatch):
+    import socket
+    import threading
+    from bourbaki.application import server
+
+    monkeypatch.setenv(server.SOCKET_DIR_ENV_VAR, str(tmp_path))
+    path = server.default_socket_path("my-cli")
+    sock_dir = Path(path).parent
+    assert sock_dir.parent == tmp_path
+    assert sock_dir.stat().st_mode & 0o777 == 0o700
+    # only bare command names map to the default path
+    assert server._socket_path("my-cli") == path
+    assert server._socket_path("served.sock") == "served.sock"
+    sock_dir.chmod(0o755)
+    with pytest.raises(PermissionError):
+        server.default_socket_path("my-cli")
+
+    # a server run by someone else gets nothing
+    received = []
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(tmp_path / "other.sock"))
+    listener.listen()
+
+    def accept():
+        conn, _ = listener.accept()
+        with conn:
+            received.append(conn.recv(1024))
+
+    thread = threading.Thread(target=accept)
+    thread.start()
+    monkeypatch.setattr(server.os, "getuid", lambda: os.geteuid() + 1)
+    try:
+        with pytest.raises(PermissionError):
+            server.run_client(str(tmp_path / "other.sock"), ["env"])
+    finally:
+        thread.join()
+        listener.close()
+    assert received == [b""]
+
+
+def test_server_bad_clients(tmp_path, capsys):
+    import socket
+    import threading
+    from bourbaki.application import server
+
+    ran = []
+    cli_server = server.CLIServer(
+        ran.append, str(tmp_path / "robust.sock"), request_timeout=0.2
+    ).bind()
+    thread = threading.Thread(target=cli_server.serve_forever, daemon=True)
+    thread.start()
+
+    def send(data: bytes):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(cli_server.path)
+            sock.sendall(data)
+            sock.shutdown(socket.SHUT_WR)
+            return sock.recv(1024)
+
+    try:
+        # truncated body, invalid JSON, missing argv
+        assert send(server._HEADER.pack(100) + b"{}") == b""
+        assert send(server._HEADER.pack(3) + b"{{{") == b""
+        assert send(server._HEADER.pack(2) + b"{}") == b""
+        # a client that connects and sends nothing doesn't block the others forever
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as idle:
+            idle.connect(cli_server.path)
+            assert server.run_client(cli_server.path, ["a", "b"]) == 0
+        assert ran == [["a", "b"]]
+        assert thread.is_alive()
+    finally:
+        cli_server.close()
+
+
+PROFILED_CLI_SOURCE = """
+from bourbaki.application.cli import CommandLineInterface
+
+cli = CommandLineInterface(
+    prog="profiled.py",
+    require_subcommand=True,
+    use_profile_startup_flag=True,
+    add_install_bash_completion_flag=False,
+)
+
+@cli.subcommand()
+def add(a: int, b: int = 1):
+    print(a + b)
+
+if __name__ == "__main__":
+    cli.run()
+"""
+
+
+def test_cli_profile_startup(tmp_path):
+    import json
+    from bourbaki.application.cli.profiling import PROFILE_STARTUP_ENV_VAR
+
+    source = write_script(tmp_path / "profiled.py", PROFILED_CLI_SOURCE)
+    profile_path = tmp_path / "profile.json"
+
+    result = run_script(
+        source, "--profile-startup-json", profile_path, "add", "-a", "1"
+    )
+    assert result.stdout == b"2\n"
+    with open(profile_path) as f:
+        profile = json.load(f)
+    phases = {p["phase"]: p for p in profile["phases"]}
+    for phase in [
+        "import bourbaki.application.cli",
+        "SubCommandFunc construction",
+        "parse_args",
+        "logging configuration",
+        "argument decoding",
+        "command execution",
+    ]:
+        assert phase in phases
+        assert phases[phase]["total_ms"] <= profile["wall_time_ms"]
+
+    # the bare flag doesn't take the subcommand as a path
+    result = run_script(source, "--profile-startup", "add", "-a", "1")
+    assert result.stdout == b"2\n"
+    assert b"startup profile for profiled.py" in result.stderr
+    assert b"SubCommandFunc construction" in result.stderr
+
+    for setting, profiled in [("1", True), ("0", False)]:
+        env = subprocess_env(**{PROFILE_STARTUP_ENV_VAR: setting})
+        result = run_script(source, "add", "-a", "1", env=env)
+        assert result.stdout == b"2\n"
+        assert (b"startup profile for profiled.py" in result.stderr) == profiled
+        assert (b"command execution" in result.stderr) == profiled
+
+
+def test_cli_cache_results(tmp_path, monkeypatch):
+    from bourbaki.application.cli import CommandLineInterface, cli_spec
+    from bourbaki.application.cli.result_cache import ResultCache
+
+    calls = []
+    cache_dir = tmp_path / "results"
+    cached_cli = CommandLineInterface(
+        prog="cached_results.py",
+        require_subcommand=True,
+        cache_results=ResultCache(str(cache_dir), max_entries=2),
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+    )
+
+    @cached_cli.subcommand()
+    def add(a: int, b: List[int] = ()):
+        calls.append(a)
+        return a + sum(b)
+
+    @cached_cli.subcommand()
+    @cli_spec.cache_results(False)
+    def neg(a: int):
+        calls.append(-a)
+        return -a
+
+    assert cached_cli.run(["add", "-a", "1", "-b", "2", "3"]) == 6
+    assert cached_cli.run(["add", "-a", "1", "-b", "2", "3"]) == 6
+    assert calls == [1]
+    assert len(os.listdir(cache_dir)) == 1
+    assert cached_cli.run(["--no-cache", "add", "-a", "1", "-b", "2", "3"]) == 6
+    assert calls == [1, 1]
+    assert cached_cli.run(["add", "-a", "1", "-b", "2"]) == 3
+    assert calls == [1, 1, 1]
+
+    # least recently used is evicted
+    assert cached_cli.run(["add", "-a", "1", "-b", "2", "3"]) == 6
+    assert cached_cli.run(["add", "-a", "2"]) == 2
+    assert len(os.listdir(cache_dir)) == 2
+    assert cached_cli.run(["add", "-a", "1", "-b", "2", "3"]) == 6
+    assert cached_cli.run(["add", "-a", "1", "-b", "2"]) == 3
+    assert calls == [1, 1, 1, 2, 1]
+
+    assert cached_cli.run(["neg", "-a", "1"]) == -1
+    assert cached_cli.run(["neg", "-a", "1"]) == -1
+    assert calls[-2:] == [-1, -1]
+
+    method_cli = CommandLineInterface(
+        prog="cached_methods.py",
+        require_subcommand=True,
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+    )
+
+    @method_cli.definition
+    class App:
+        def __init__(self, offset: int = 0):
+            self.offset = offset
+
+        @cli_spec.cache_results(str(cache_dir / "methods"))
+        def add(self, a: int):
+            calls.append(a)
+            return a + self.offset
+
+    del calls[:]
+    assert method_cli.run(["add", "-a", "1"]) == 1
+    assert method_cli.run(["add", "-a", "1"]) == 1
+    # the instance is part of the key
+    assert method_cli.run(["--offset", "1", "add", "-a", "1"]) == 2
+    assert calls == [1, 1]
+
+    # commands writing to their args run every time
+    @cached_cli.subcommand()
+    def write(n: int, out: File["w"]):
+        out.write(str(n))
+        return n
+
+    @cached_cli.subcommand()
+    def write_lazy(n: int, out: LazyFile["w"]):
+        with out:
+            out.write(str(n))
+        return n
+
+    @cached_cli.subcommand()
+    def write_mmap(data: MMapFile["r+"]):
+        data[:1] = b"x"
+        return len(data)
+
+    out_path = tmp_path / "out.txt"
+    for cmd in ["write", "write-lazy"]:
+        for _ in range(2):
+            assert cached_cli.run([cmd, "-n", "1", "--out", str(out_path)]) == 1
+            assert out_path.read_text() == "1"
+    for _ in range(2):
+        out_path.write_text("abc")
+        assert cached_cli.run(["write-mmap", "--data", str(out_path)]) == 3
+        assert out_path.read_text() == "xbc"
+
+    # nor do commands reading streams other than regular files, or consuming iterators
+    from typing import Iterator, Set
+
+    @cached_cli.subcommand()
+    def count(f: File["r"]):
+        return sum(1 for _ in f)
+
+    @cached_cli.subcommand()
+    def total(ns: Iterator[int]):
+        calls.append("total")
+        return sum(ns)
+
+    @cached_cli.subcommand()
+    def count_all(fs: Set[LazyFile["r"]]):
+        return sum(sum(1 for _ in f) for f in fs)
+
+    for text, n in [("a\nb\n", 2), ("a\nb\nc\nd\n", 4)]:
+        monkeypatch.setattr("sys.stdin", StringIO(text))
+        assert cached_cli.run(["count", "-f", "-"]) == n
+    assert cached_cli.run(["total", "--ns", "1", "2"]) == 3
+    assert cached_cli.run(["total", "--ns", "1", "2"]) == 3
+    assert calls[-2:] == ["total", "total"]
+    for text, n in [("a\n", 1), ("a\nb\n", 2)]:
+        monkeypatch.setattr("sys.stdin", StringIO(text))
+        assert cached_cli.run(["count-all", "--fs", "-"]) == n
+
+
+def test_cli_async(capsys):
+    import asyncio
+    from time import perf_counter
+    from bourbaki.application.cli import CommandLineInterface, cli_spec
+
+    async_cli = CommandLineInterface(
+        prog="async.py",
+        require_subcommand=True,
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+    )
+
+    async def show(value):
+        await asyncio.sleep(0)
+        print(value)
+
+    @async_cli.definition
+    class App:
+        @cli_spec.output_handler(show)
+        async def sleep(self, seconds: float, value: int = 0):
+            await asyncio.sleep(seconds)
+            return value
+
+        def add(self, a: int, b: int = 1):
+            return a + b
+
+    assert async_cli.run(["sleep", "--seconds", "0", "--value", "3"]) == 3
+    assert capsys.readouterr().out == "3\n"
+    assert async_cli.run(["add", "-a", "1"]) == 2
+
+    async def run_concurrently():
+        single = await async_cli.arun(["add", "-a", "2"])
+        results = await async_cli.arun_many(
+            ["sleep --seconds 0.2 --value {}".format(i) for i in range(5)]
+            + ["add -a 1", "sleep --seconds x"]
+        )
+        return single, results
+
+    tic = perf_counter()
+    single, results = asyncio.run(run_concurrently())
+    # waits overlap rather than adding up
+    assert perf_counter() - tic < 0.8
+    assert single == 3
+    assert [r.result for r in results] == [0, 1, 2, 3, 4, 2, None]
+    assert [r.success for r in results] == [True] * 6 + [False]
+    assert isinstance(results[-1].error, ValueError)
+
+    # run() can't start another loop; arun() is the way to run async commands there
+    async def run_in_loop():
+        return async_cli.run(["sleep", "--seconds", "0"])
+
+    with pytest.raises(SystemExit):
+        asyncio.run(run_in_loop())
+    assert "arun()" in capsys.readouterr().err
+
+    # async generators with no output handler are consumed
+    produced = []
+
+    @async_cli.subcommand()
+    async def produce(n: int):
+        for i in range(n):
+            produced.append(i)
+            yield i
+
+    assert async_cli.run(["produce", "-n", "3"]) == [0, 1, 2]
+    assert produced == [0, 1, 2]
+
+
+def test_cli_streaming_output(tmp_path, capsys):
+    from bourbaki.application.cli import (
+        CommandLineInterface,
+        StreamingOutputHandler,
+        LinesOutput,
+    )
+
+    produced = []
+    written = []
+
+    class Record(StreamingOutputHandler):
+        buffer_size = 2
+
+        def __init__(self, prefix: str = ""):
+            self.prefix = prefix
+            self.closed = False
+
+        def write_item(self, item):
+            # items are written before the whole iterator is consumed
+            written.append((self.prefix + str(item), len(produced)))
+
+        def close(self):
+            written.append("closed")
+
+    streaming_cli = CommandLineInterface(
+        prog="streaming.py",
+        require_subcommand=True,
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+    )
+
+    @streaming_cli.subcommand(output_handler=Record)
+    def count(n: int):
+        for i in range(n):
+            produced.append(i)
+            yield i
+
+    @streaming_cli.subcommand(output_handler=LinesOutput)
+    async def acount(n: int):
+        for i in range(n):
+            yield i
+
+    @streaming_cli.subcommand(output_handler=LinesOutput)
+    def single(n: int):
+        return {"n": n}
+
+    outfiles = []
+
+    class RecordLines(LinesOutput):
+        def open(self):
+            super().open()
+            outfiles.append(self.outfile)
+
+    @streaming_cli.subcommand(output_handler=RecordLines)
+    def pair(n: int):
+        return [n, n]
+
+    streaming_cli.run(["count", "-n", "5", "--prefix", "x"])
+    assert written == [
+        ("x0", 2), ("x1", 2), ("x2", 4), ("x3", 4), ("x4", 5), "closed"
+    ]
+
+    streaming_cli.run(["acount", "-n", "3"])
+    assert capsys.readouterr().out == "0\n1\n2\n"
+
+    outfile = tmp_path / "out.txt"
+    streaming_cli.run(["single", "-n", "1", "--outfile", str(outfile), "--literal", "true"])
+    assert outfile.read_text() == "{'n': 1}\n"
+
+    # the output file is closed, but stdout isn't
+    streaming_cli.run(["pair", "-n", "1", "--outfile", str(outfile)])
+    assert outfile.read_text() == "1\n1\n"
+    assert outfiles[-1].closed
+    streaming_cli.run(["pair", "-n", "2"])
+    assert outfiles[-1] is sys.stdout and not sys.stdout.closed
+    assert capsys.readouterr().out == "2\n2\n"
+
+    with pytest.raises(TypeError):
+        StreamingOutputHandler()
+
+
+def test_cli_background_output(capsys):
+    import threading
+    import time
+    from bourbaki.application.cli import (
+        CommandLineInterface,
+        StreamingOutputHandler,
+        cli_spec,
+    )
+
+    threads = []
+
+    class WriteSlowly(StreamingOutputHandler):
+        buffer_size = 1
+
+        def __init__(self, fail_at: int = -1):
+            self.fail_at = fail_at
+            self.written = 0
+
+        def write_item(self, item):
+            threads.append(threading.current_thread())
+            if self.written == self.fail_at:
+                raise IOError("disk full")
+            time.sleep(0.05)
+            print(item)
+            self.written += 1
+
+    bg_cli = CommandLineInterface(
+        prog="background.py",
+        require_subcommand=True,
+        background_output=2,
+        output_handler=WriteSlowly,
+        exit_codes={IOError: 3},
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+    )
+
+    @bg_cli.subcommand()
+    def compute(n: int):
+        for i in range(n):
+            time.sleep(0.05)
+            yield i
+
+    @bg_cli.subcommand()
+    @cli_spec.background_output(False)
+    def compute_here(n: int):
+        yield from range(n)
+
+    tic = time.perf_counter()
+    bg_cli.run(["compute", "-n", "10"])
+    # computing and writing overlap
+    assert time.perf_counter() - tic < 0.9
+    assert capsys.readouterr().out == "".join("{}\n".format(i) for i in range(10))
+    assert all(t is not threading.main_thread() for t in threads)
+
+    del threads[:]
+    bg_cli.run(["compute-here", "-n", "2"])
+    assert threads == [threading.main_thread()] * 2
+    capsys.readouterr()
+
+    # other output handlers get the return value itself, in this thread
+    received = []
+
+    def receive(value):
+        received.append((value, threading.current_thread()))
+
+    @bg_cli.subcommand(output_handler=receive)
+    def generate(n: int):
+        yield from range(n)
+
+    value = bg_cli.run(["generate", "-n", "2"])
+    assert received == [(value, threading.main_thread())]
+
+    with pytest.raises(SystemExit) as e:
+        bg_cli.run(["compute", "-n", "10", "--fail-at", "2"])
+    assert e.value.code == 3
+    assert capsys.readouterr().out == "0\n1\n"
+
+    # the event loop isn't blocked while writing in the background
+    import asyncio
+
+    async def tick(ticks):
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0.01)
+
+    async def run_and_tick():
+        ticks = []
+        ticker = asyncio.ensure_future(tick(ticks))
+        await bg_cli.arun(["compute", "-n", "10"])
+        ticker.cancel()
+        return ticks
+
+    assert len(asyncio.run(run_and_tick())) > 10
+    assert capsys.readouterr().out == "".join("{}\n".format(i) for i in range(10))
+
+
+def test_background_writer_errors():
+    from bourbaki.application.cli.streaming import BackgroundWriter
+
+    def consume(items):
+        for _ in items:
+            raise IOError("disk full")
+
+    def produce():
+        yield 1
+        raise ValueError("bad item")
+
+    # the producer's error isn't masked by the consumer's
+    with pytest.raises(ValueError) as e:
+        BackgroundWriter(consume, batch_size=1).write_all(produce())
+    assert isinstance(e.value.__context__, IOError)
+
+    with pytest.raises(IOError):
+        BackgroundWriter(consume, batch_size=1).write_all(range(10))
+
+
+def test_cli_run_metrics(tmp_path, capsys):
+    import json
+    from bourbaki.application.cli import CommandLineInterface
+
+    def print_result(result):
+        print(result)
+
+    metrics_file = tmp_path / "metrics.jsonl"
+    metrics_cli = CommandLineInterface(
+        prog="metrics.py",
+        require_subcommand=True,
+        collect_metrics=str(metrics_file),
+        output_handler=print_result,
+        exit_codes={ValueError: 4},
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+    )
+
+    @metrics_cli.subcommand()
+    def add(a: int, b: int):
+        if a < 0:
+            raise ValueError(a)
+        return a + b
+
+    assert metrics_cli.run(["add", "-a", "1", "-b", "2"]) == 3
+    assert capsys.readouterr().out == "3\n"
+    metrics = metrics_cli.last_metrics
+    assert metrics["command"] == "add"
+    assert metrics["exit_code"] == 0
+    assert metrics["args"] == ["add", "-a", "1", "-b", "2"]
+    phases = metrics["phases_ms"]
+    for phase in (
+        "parse_args",
+        "logging configuration",
+        "argument decoding",
+        "argument decoding/a",
+        "argument decoding/b",
+        "command execution",
+        "output handling",
+    ):
+        assert phases[phase] >= 0.0
+    assert metrics["total_ms"] >= phases["command execution"]
+
+    with pytest.raises(SystemExit):
+        metrics_cli.run(["add", "-a", "-1", "-b", "2"])
+    assert metrics_cli.last_metrics["exit_code"] == 4
+
+    with open(str(metrics_file)) as f:
+        records = [json.loads(line) for line in f]
+    assert [r["exit_code"] for r in records] == [0, 4]
+
+    results = list(metrics_cli.run_many(["add -a 1 -b 1", "add -a 2 -b 2"]))
+    assert all(r.metrics["command"] == "add" for r in results)
+    capsys.readouterr()
+
+    # concurrent runs each see their own record
+    from threading import Barrier
+    from concurrent.futures import ThreadPoolExecutor
+    from bourbaki.application.cli import last_run_metrics
+
+    barrier = Barrier(2)
+
+    def run(a):
+        args = ["add", "-a", str(a), "-b", "0"]
+        metrics_cli.run(args)
+        # both runs have finished before either reads its record
+        barrier.wait(5)
+        return args, last_run_metrics()["args"]
+
+    with ThreadPoolExecutor(2) as pool:
+        for args, metrics_args in pool.map(run, [1, 2]):
+            assert metrics_args == args
+    capsys.readouterr()
+
+
+def test_cli_logging_configured_once(tmp_path):
+    import logging
+    from bourbaki.application.cli import CommandLineInterface
+
+    log_cli = CommandLineInterface(
+        prog="logging.py",
+        require_subcommand=True,
+        use_verbose_flag=True,
+        use_logfile=True,
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+    )
+
+    @log_cli.subcommand()
+    def noop():
+        pass
+
+    root = logging.getLogger()
+    log_cli.run(["noop"])
+    handlers = list(root.handlers)
+    log_cli.run(["noop"])
+    assert root.handlers == handlers
+    assert all(a is b for a, b in zip(root.handlers, handlers))
+
+    # a level change is applied in place
+    log_cli.run(["-vv", "noop"])
+    assert all(a is b for a, b in zip(root.handlers, handlers))
+    assert all(h.level == logging.INFO for h in root.handlers)
+
+    # loggers created since the last run are disabled, as on a full reconfiguration
+    new_logger = logging.getLogger("logging_configured_once.new")
+    log_cli.run(["-vv", "noop"])
+    assert all(a is b for a, b in zip(root.handlers, handlers))
+    assert new_logger.disabled
+    assert not log_cli.logger.disabled
+    assert not logging.getLogger(log_cli.cmd_name).disabled
+
+    # a different destination reconfigures
+    log_cli.run(["--logfile", str(tmp_path / "app.log"), "noop"])
+    assert not any(h in handlers for h in root.handlers)
+
+
+def test_cli_concurrent_runs_have_own_context():
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from bourbaki.application import cli as cli_module
+    from bourbaki.application.cli import CommandLineInterface, current_invocation
+
+    exec_cli = CommandLineInterface(
+        prog="concurrent.py",
+        require_subcommand=True,
+        use_execution_flag=True,
+        use_verbose_flag=True,
+        lazy_subparsers=True,
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+    )
+
+    @exec_cli.subcommand()
+    def check(i: int):
+        time.sleep(0.01)
+        context = current_invocation()
+        return i, cli_module.EXECUTE, context.verbosity, context.command
+
+    def run(i):
+        flags = (["-x"] if i % 2 else []) + ["-v"] * (i % 3 + 1)
+        return exec_cli.run(flags + ["check", "-i", str(i)])
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(run, range(32)))
+
+    assert results == [(i, bool(i % 2), i % 3 + 2, ("check",)) for i in range(32)]
+    assert current_invocation() is None
+    # parsing alone has no side effects
+    assert exec_cli.execute_flag(exec_cli.parse_args(["-x", "check", "-i", "1"]))
+    assert exec_cli.run(["check", "-i", "1"])[1] is False
+
+    # a parameter named like the flag is independent of it
+    @exec_cli.subcommand()
+    def run_plan(execute: bool = False):
+        return execute, cli_module.EXECUTE
+
+    assert exec_cli.run(["run-plan"]) == (False, False)
+    assert exec_cli.run(["-x", "run-plan"]) == (False, True)
+    assert exec_cli.run(["run-plan", "--execute", "true"]) == (True, False)
+    assert exec_cli.run(["-x", "run-plan", "--execute", "false"]) == (False, True)
+
+
+def test_cli_concurrent_runs_have_own_log_level(capsys):
+    import logging
+    from threading import Barrier
+    from concurrent.futures import ThreadPoolExecutor
+    from bourbaki.application.cli import CommandLineInterface
+
+    log_cli = CommandLineInterface(
+        prog="concurrent_logging.py",
+        require_subcommand=True,
+        use_verbose_flag=True,
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+    )
+    # both runs log only once both have configured logging
+    barrier = Barrier(2)
+
+    @log_cli.subcommand()
+    def log(name: str):
+        barrier.wait(5)
+        logger = logging.getLogger(log_cli.cmd_name)
+        logger.info("%s info", name)
+        logger.warning("%s warning", name)
+
+    with ThreadPoolExecutor(2) as pool:
+        argvs = [["-v", "log", "--name", "a"], ["-vv", "log", "--name", "b"]]
+        list(pool.map(log_cli.run, argvs))
+
+    err = capsys.readouterr().err
+    assert "a warning" in err and "b warning" in err and "b info" in err
+    assert "a info" not in err
+
+
+def test_cli_manifest(tmp_path, capsys):
+    import json
+    from io import StringIO
+    from bourbaki.application.cli import CommandLineInterface
+    from bourbaki.application.cli.manifest import (
+        load_manifest,
+        main as manifest_main,
+        manifest_empty_config,
+        manifest_help,
+    )
+    from bourbaki.application.completion.completers import print_cli_def_tree
+
+    manifest_cli = CommandLineInterface(
+        prog="manifest.py",
+        require_subcommand=True,
+        use_config_file=True,
+        add_manifest_flag=True,
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+    )
+
+    @manifest_cli.subcommand(command_prefix="math", parse_env={"b": "MANIFEST_B"})
+    def add(a: int, b: List[int] = ()):
+        """add some ints"""
+        return a + sum(b)
+
+    @manifest_cli.subcommand()
+    def greet(name: str = "world"):
+        return "hello " + name
+
+    path = tmp_path / "manifest.json"
+    with pytest.raises(SystemExit) as e:
+        manifest_cli.run(["--manifest", str(path)])
+    assert e.value.code == 0
+    manifest = load_manifest(str(path))
+    assert manifest == json.loads(json.dumps(manifest_cli.manifest()))
+
+    add_parser = manifest_cli.get_subcommand_func(("math", "add"))[1].parser
+    assert manifest_help(manifest, "math", "add") == add_parser.format_help()
+    with pytest.raises(KeyError):
+        manifest_help(manifest, "math", "sub")
+
+    params = manifest["root"]["commands"][0]["commands"][0]["command"]["params"]
+    assert [(p["name"], p["env"], p["required"]) for p in params] == [
+        ("a", None, True),
+        ("b", "MANIFEST_B", False),
+    ]
+    config = manifest_empty_config(manifest)
+    assert set(config) == {"math", "greet"}
+    assert config["greet"] == {"name": "world"}
+    assert set(manifest_empty_config(manifest, only_commands={("greet",)})) == {
+        "greet"
+    }
+
+    trees = []
+    for source in (manifest_cli, manifest["root"]):
+        f = StringIO()
+        print_cli_def_tree(source, f)
+        trees.append(f.getvalue())
+    assert trees[0] == trees[1]
+    capsys.readouterr()
+
+    manifest_main([str(path), "help", "math", "add"])
+    assert "add some ints" in capsys.readouterr().out
+
+
+def test_cli_variadic_fast_path():
+    from typing import Set, Tuple
+    from bourbaki.application.cli import CommandLineInterface
+    from bourbaki.application.typed_io.cli_parse import (
+        VariadicCLIParser,
+        variadic_cli_parser,
+    )
+
+    assert isinstance(variadic_cli_parser(List[int]), VariadicCLIParser)
+    assert isinstance(variadic_cli_parser(Tuple[float, ...]), VariadicCLIParser)
+    # fixed-length and nested collections take the general path
+    assert variadic_cli_parser(Tuple[int, int]) is None
+    assert variadic_cli_parser(List[List[int]]) is None
+
+    cli = CommandLineInterface(
+        prog="variadic",
+        require_subcommand=True,
+        require_options=False,
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+    )
+
+    @cli.subcommand(require_options=True)
+    def opts(values: List[int], paths: Set[Path] = frozenset()):
+        return values, paths
+
+    @cli.subcommand()
+    def pos(*values: float):
+        return values
+
+    @cli.subcommand()
+    def words(*values: str):
+        return values
+
+    n = 10000
+    values, paths = cli.run(
+        ["opts", "--values", *map(str, range(n)), "--paths", "a", "b", "a"]
+    )
+    assert values == list(range(n))
+    assert paths == {Path("a"), Path("b")}
+    assert cli.run(["pos", "1", "2.5"]) == (1.0, 2.5)
+    assert cli.run(["pos", "--", "-1", "2.5"]) == (-1.0, 2.5)
+    assert cli.run(["pos"]) == ()
+    # a literal '--' after the first is kept, or not, exactly as argparse does on this python version
+    parser = argparse.ArgumentParser()
+    parser.add_argument("values", nargs="*")
+    expected = parser.parse_args(["--", "a", "--", "b"]).values
+    assert cli.run(["words", "--", "a", "--", "b"]) == tuple(expected)
+
+
+def test_cli_arg_files(tmp_path, monkeypatch, capsys):
+    from typing import Dict, Iterable, Iterator
+    from bourbaki.application.cli import CommandLineInterface, cli_spec
+
+    ids = tmp_path / "ids.txt"
+    ids.write_text("1\n2\n\n3\n")
+
+    cli = CommandLineInterface(
+        prog="argfiles",
+        require_subcommand=True,
+        require_options=False,
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+        arg_files=True,
+    )
+
+    @cli.subcommand(require_options=True)
+    def opts(values: List[int], mapping: Dict[str, int] = None, names: List[str] = ()):
+        return values, mapping, names
+
+    @cli.subcommand()
+    def pos(*values: float):
+        return values
+
+    @cli.subcommand()
+    def lazy(ids: Iterator[int]):
+        assert not isinstance(ids, list)
+        return list(ids)
+
+    @cli.subcommand()
+    def kw(*, paths: Iterable[Path]):
+        return list(paths)
+
+    keyvals = tmp_path / "keyvals.txt"
+    keyvals.write_text("a=1\nb=2\n")
+    values, mapping, names = cli.run(
+        [
+            "opts",
+            "--values", "0", "@{}".format(ids), "4",
+            "--mapping", "@{}".format(keyvals),
+            "--names", "@@literal",
+        ]
+    )
+    assert values == [0, 1, 2, 3, 4]
+    assert mapping == {"a": 1, "b": 2}
+    assert names == ["@literal"]
+    assert cli.run(["pos", "@{}".format(ids), "@{}".format(ids)]) == (1.0, 2.0, 3.0) * 2
+    assert cli.run(["lazy", "5", "6"]) == [5, 6]
+    assert cli.run(["kw", "--paths", "a", "@{}".format(ids)]) == [
+        Path("a"), Path("1"), Path("2"), Path("3")
+    ]
+
+    monkeypatch.setattr("sys.stdin", StringIO("7\n8\n"))
+    assert cli.run(["lazy", "@-"]) == [7, 8]
+
+    # an unreadable file is a usage error for the command
+    for path in [tmp_path / "missing.txt", tmp_path]:
+        with pytest.raises(SystemExit) as e:
+            cli.run(["lazy", "@{}".format(path)])
+        assert e.value.code == 2
+        assert "could not read argument file" in capsys.readouterr().err
+
+    # stdin can be read only once
+    for args in [["pos", "@-", "@-"], ["opts", "--values", "@-", "--names", "@-"]]:
+        with pytest.raises(SystemExit) as e:
+            cli.run(args)
+        assert e.value.code == 2
+        assert "stdin" in capsys.readouterr().err
+
+    # a named pipe is read only by the command
+    if hasattr(os, "mkfifo"):
+        import threading
+
+        fifo = tmp_path / "ids.fifo"
+        os.mkfifo(str(fifo))
+        writer = threading.Thread(target=fifo.write_text, args=("9\n10\n",))
+        writer.start()
+        assert cli.run(["lazy", "@{}".format(fifo)]) == [9, 10]
+        writer.join()
+
+    # without opting in, '@' values are passed as they are
+    literal_cli = CommandLineInterface(
+        prog="literal",
+        require_subcommand=True,
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+    )
+
+    @literal_cli.subcommand()
+    def names(names: List[str]):
+        return names
+
+    @literal_cli.subcommand()
+    @cli_spec.arg_files("ids")
+    def count(ids: List[int], names: List[str] = ()):
+        return len(ids), names
+
+    assert literal_cli.run(["names", "--names", "@scope/pkg", "@handle"]) == [
+        "@scope/pkg",
+        "@handle",
+    ]
+    assert literal_cli.run(
+        ["count", "--ids", "@{}".format(ids), "--names", "@handle"]
+    ) == (3, ["@handle"])
+
+
+def test_cli_lazy_files(tmp_path):
+    from bourbaki.application.cli import CommandLineInterface, LazyFile
+
+    paths = []
+    for i in range(100):
+        path = tmp_path / "{}.txt".format(i)
+        path.write_text("{}\n".format(i))
+        paths.append(str(path))
+
+    cli = CommandLineInterface(
+        prog="lazyfiles",
+        require_subcommand=True,
+        require_options=False,
+        add_install_bash_completion_flag=False,
+        suppress_setup_warnings=True,
+    )
+
+    @cli.subcommand()
+    def total(*files: LazyFile["r"]):
+        assert not any(f.opened for f in files)
+        result = 0
+        for f in files:
+            result += sum(map(int, f))
+            assert f.closed
+        return result
+
+    assert cli.run(["total", *paths]) == sum(range(100))
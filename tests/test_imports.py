@@ -1,5 +1,7 @@
 # coding:utf-8
 import os
+import subprocess
+import sys
 from itertools import chain
 from pathlib import Path
 from setuptools import find_packages
@@ -28,3 +30,57 @@ def submodule_paths(parent_module_path: str):
 def test_submodule_import(module_name):
     mod = __import__(module_name)
     assert isinstance(mod, module)
+
+
+HELP_ONLY_CLI_SOURCE = """
+from bourbaki.application.cli import CommandLineInterface
+
+cli = CommandLineInterface(
+    prog="help_only.py",
+    require_subcommand=True,
+    use_verbose_flag=True,
+    add_install_bash_completion_flag=False,
+)
+
+@cli.subcommand()
+def foo(x: int):
+    print(x)
+
+if __name__ == "__main__":
+    cli.run()
+"""
+
+# these should only be imported when actually used
+LAZY_MODULES = [
+    "yaml",
+    "toml",
+    "ujson",
+    "smtplib",
+    "email",
+    "getpass",
+    "multiprocessing",
+]
+
+
+def test_help_lazy_imports(tmp_path):
+    source = tmp_path / "help_only.py"
+    source.write_text(HELP_ONLY_CLI_SOURCE)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(map(str, [top_dir, *sys.path])))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", str(source), "--help"],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    assert result.returncode == 0
+    assert "usage: help_only.py" in result.stdout
+
+    # lines look like 'import time:  self [us] | cumulative | imported package'
+    imported = {
+        line.rsplit("|", 1)[-1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+    assert "bourbaki.application.cli.main" in imported
+    assert imported.isdisjoint(LAZY_MODULES)
@@ -2,10 +2,13 @@
 # coding:utf-8
 from typing import *
 from typing import ChainMap
+import argparse
 import collections
 import itertools
+import mmap
 from numbers import Number
 import os
+import sys
 import tempfile
 
 import pytest
@@ -827,3 +830,109 @@ def test_open_file_isinstance_by_write_mode(mode):
         assert isinstance(f, File[mode])
     assert isinstance(f, File[mode])
     os.remove(path)
+
+
+@pytest.mark.parametrize(
+    "fileclass1,fileclass2",
+    [
+        (LazyFile, File),
+        (LazyFile["r"], LazyFile),
+        (LazyFile["r"], TextFile),
+        (LazyFile["wb"], BinaryFile),
+    ],
+)
+def test_lazy_file_issubclass(fileclass1, fileclass2):
+    assert issubclass(fileclass1, fileclass2)
+    assert not issubclass(fileclass2, fileclass1)
+
+
+@pytest.mark.parametrize("mode", ["r", "rb", "w", "wb"])
+def test_lazy_file_mode(mode):
+    assert File[mode].lazy is LazyFile[mode]
+    assert LazyFile[mode].lazy is LazyFile[mode]
+    assert cli_repr(LazyFile[mode]) == cli_repr(File[mode])
+
+
+def test_lazy_file_opens_on_first_use(tmp_path):
+    path = tmp_path / "lazy.txt"
+    out = LazyFile["w"](str(path))
+    assert isinstance(out, LazyFile["w"]) and not isinstance(out, LazyFile["r"])
+    assert not out.opened and not path.exists()
+    with out:
+        out.write("foo\nbar\n")
+        assert out.opened
+    assert out.closed
+
+    parse = TypedIO(List[LazyFile["r"]]).cli_parser
+    handles = parse([str(path)] * 3)
+    assert not any(f.opened for f in handles)
+    assert list(handles[0]) == ["foo\n", "bar\n"]
+    assert handles[0].closed
+    assert handles[1].readline() == "foo\n"
+    assert not handles[1].closed
+    handles[1].close()
+    assert not handles[2].opened
+
+
+def test_lazy_file_std_streams():
+    assert LazyFile["r"]("-").file is sys.stdin
+    assert LazyFile["wb"]("-").file is sys.stdout.buffer
+    assert config_encoder(LazyFile["w"])(LazyFile["w"]("-")) == "-"
+
+
+def test_iterator_config_decoder():
+    decode = TypedIO(Iterator[int]).config_decoder
+    values = decode([1, "2"])
+    assert not isinstance(values, list)
+    assert list(values) == [1, 2]
+    with pytest.raises(ConfigTypedInputError):
+        decode("12")
+
+
+def test_mmap_file(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"hello world")
+
+    assert cli_repr(MMapFile["r"]) == mmap_path_repr
+    readonly = TypedIO(MMapFile["r"]).cli_parser(str(path))
+    assert isinstance(readonly, mmap.mmap) and isinstance(readonly, MMapFile["r"])
+    assert readonly[:5] == b"hello"
+    with pytest.raises(TypeError):
+        readonly[:1] = b"H"
+
+    writable = TypedIO(MMapFile["r+"]).config_decoder(str(path))
+    writable[:1] = b"H"
+    writable.close()
+    assert path.read_bytes() == b"Hello world"
+    assert readonly[:5] == b"Hello"
+
+    maps = TypedIO(List[MMapFile]).cli_parser([str(path)] * 2)
+    assert [m[:] for m in maps] == [b"Hello world"] * 2
+
+
+@pytest.mark.parametrize("mode", ["w", "rb", "a"])
+def test_mmap_file_bad_mode(mode):
+    with pytest.raises(ValueError):
+        MMapFile[mode]
+
+
+def test_mmap_file_access_mode(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"hello world")
+
+    readonly = MMapFile["r"](str(path))
+    writable = MMapFile["r+"](str(path))
+    assert isinstance(readonly, MMapFile) and isinstance(writable, MMapFile)
+    assert isinstance(readonly, MMapFile["r"]) and not isinstance(readonly, MMapFile["r+"])
+    assert isinstance(writable, MMapFile["r+"]) and not isinstance(writable, MMapFile["r"])
+    writable.close()
+    assert not isinstance(writable, MMapFile["r+"])
+
+
+@pytest.mark.parametrize("name,contents", [("empty.bin", b""), ("missing.bin", None)])
+def test_mmap_file_bad_path(tmp_path, name, contents):
+    path = tmp_path / name
+    if contents is not None:
+        path.write_bytes(contents)
+    with pytest.raises(argparse.ArgumentTypeError, match=name):
+        TypedIO(MMapFile["r"]).cli_parser(str(path))